@@ -1,13 +1,35 @@
 import sympy as sp
+import numpy as np
+import os
+import ast
 import re
 import math
-from sympy.parsing.sympy_parser import parse_expr, standard_transformations, implicit_multiplication_application
+import sys
+import time
+import pickle
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from trazas import Traza, medir, perfilar, trazando, traza_actual
+from intervalos import (Intervalo, IntervaloNoSoportado, compilar_intervalos, dominio_intervalos,
+                        recorrido_intervalos)
+from cache_disco import cache_compartida
+import kernels
+from kernels import compilar_kernel
 
 x = sp.symbols('x')
+# Cambiar al modificar lo que calcula alguna etapa: invalida la caché en disco
+VERSION_ANALISIS = f"7/sympy-{sp.__version__}"
 # --------------------------------------------------------------
 # ------------- Conversión de expresiones ----------------------
 # --------------------------------------------------------------
-transformaciones_parser = standard_transformations + (implicit_multiplication_application,)
+@lru_cache(maxsize=1)
+def transformaciones_parser():
+    # Se arma en el primer parseo y no al importar el módulo
+    from sympy.parsing.sympy_parser import standard_transformations, implicit_multiplication_application
+    return standard_transformations + (implicit_multiplication_application,)
 #-------------------------------------------------------------------
 _local_dict = {
     'sin': sp.sin, 'cos': sp.cos, 'tan': sp.tan,
@@ -20,97 +42,1027 @@ def convertir_expresion(texto_funcion):
     texto = texto_funcion.strip()
     texto = texto.replace('^', '**').replace(',', '.')
     texto = re.sub(r'\|([^|]+)\|', r'Abs(\1)', texto)
+    from sympy.parsing.sympy_parser import parse_expr
     try:
-        expr = parse_expr(texto, transformations = transformaciones_parser, local_dict = _local_dict)          
+        with medir("conversion"):
+            expr = parse_expr(texto, transformations = transformaciones_parser(), local_dict = _local_dict)          
     except Exception as e:
         raise ValueError(f"No se pudo convertir la expresión: {e}")
     if expr.free_symbols and expr.free_symbols != {x}:
         raise ValueError("La funcion solo puede contener la variable 'x'. ")
     return expr
 
+@lru_cache(maxsize=256)
+def _convertir_o_error(texto_funcion):
+    try:
+        return convertir_expresion(texto_funcion), None
+    except ValueError as e:
+        return None, e
+
+def convertir_expresion_cacheada(texto_funcion):
+    # Igual que convertir_expresion, pero recuerda cada texto ya parseado (también los
+    # inválidos): al escribir y borrar, los prefijos repetidos no se vuelven a parsear
+    expr, error = _convertir_o_error(texto_funcion)
+    if error is not None:
+        raise ValueError(*error.args)
+    return expr
+
+# --------------------------------------------------------------
+# ------------- Motor de muestreo vectorizado ------------------
+# --------------------------------------------------------------
+def malla(a, b, n):
+    return np.linspace(a, b, n)
+
+def compilar_funcion(expresion_simbolica, backend=None):
+    # backend None = el elegido en kernels (--kernel / ANALISIS_KERNEL)
+    return _compilar_funcion(expresion_simbolica, backend or kernels.BACKEND)
+
+@lru_cache(maxsize=128)
+def _compilar_funcion(expresion_simbolica, backend):
+    # Se compila una sola vez (sp.cse + núcleo de kernels.py); la función devuelta
+    # evalúa mallas completas y deja NaN en los puntos fuera del dominio en lugar
+    # de lanzar excepciones.
+    fn, usado = compilar_kernel(expresion_simbolica, x, backend)
+
+    def evaluar(valores_x):
+        xs = np.asarray(valores_x, dtype=float)
+        with np.errstate(all='ignore'):
+            try:
+                ys = np.asarray(fn(xs))
+            except Exception:
+                return np.full(xs.shape, np.nan)
+        if np.iscomplexobj(ys):
+            ys = np.where(np.abs(ys.imag) < 1e-12, ys.real, np.nan)
+        # las expresiones constantes devuelven un escalar
+        ys = np.array(np.broadcast_to(ys, xs.shape), dtype=float)
+        ys[~np.isfinite(ys)] = np.nan
+        return ys
+
+    evaluar.backend = usado
+    return evaluar
+
+def muestrear(expresion_simbolica, a=-10, b=10, n=201):
+    valores_x = malla(a, b, n)
+    return valores_x, compilar_funcion(expresion_simbolica)(valores_x)
+
+# --------------------------------------------------------------
+# ------------- Muestreo adaptativo para graficar --------------
+# --------------------------------------------------------------
+PRESUPUESTO_PUNTOS = 1500  # máximo de puntos por curva
+_PUNTOS_INICIALES = 65
+_TOLERANCIA_GRAFICA = 0.002  # error tolerado, relativo a la altura visible de la curva
+
+_TESELAS_POR_VISTA = 4  # una vista cubre a lo sumo ~4 teselas de su nivel de zoom
+MAX_TESELAS = 256  # teselas guardadas por función
+
+def teselas(a, b):
+    # Teselas de lado potencia de 2 que cubren [a, b]; el lado depende solo del zoom,
+    # así al volver a una región (o desplazarse poco) se reutilizan las ya calculadas.
+    lado = 2.0 ** math.ceil(math.log2((b - a) / _TESELAS_POR_VISTA))
+    return lado, range(math.floor(a / lado), math.ceil(b / lado))
+
+def puntos_singulares(dominio, a, b):
+    # Puntos de [a, b] donde el dominio se corta (polos, huecos, bordes)
+    return sorted(bordes_dominio(dominio, a, b))
+
+def bordes_dominio(dominio, a, b):
+    # {valor float: borde exacto de SymPy} de los puntos de [a, b] donde el dominio se corta
+    try:
+        tramos = dominio.args if isinstance(dominio, sp.Union) else (dominio,)
+        if all(isinstance(tramo, sp.Interval) for tramo in tramos):
+            # caso común (y el de cientos de tramos): bordes directos, sin .boundary
+            bordes = {float(p): p for tramo in tramos for p in tramo.boundary if p.is_finite}
+            return {v: p for v, p in bordes.items() if a <= v <= b}
+        bordes = _bordes_por_partes(dominio, a, b)
+        if bordes is not None:
+            return bordes
+        frontera = sp.Intersection(dominio.boundary, sp.Interval(a, b))
+        if frontera.is_FiniteSet:
+            return {float(p): p for p in frontera}
+    except Exception:
+        pass
+    return {}
+
+def _bordes_por_partes(conjunto, a, b):
+    # Bordes de uniones y complementos sin pasar por .boundary, que no resuelve
+    # los ImageSet (los polos de tan quedan como Complement(Reals, ImageSet)).
+    # None si alguna parte no tiene una forma conocida.
+    if isinstance(conjunto, sp.Interval):
+        return {float(p): p for p in conjunto.boundary if p.is_finite and a <= float(p) <= b}
+    if isinstance(conjunto, sp.Union):
+        partes = [_bordes_por_partes(parte, a, b) for parte in conjunto.args]
+        return None if None in partes else {v: p for parte in partes for v, p in parte.items()}
+    if isinstance(conjunto, sp.Complement):
+        base, quitados = (_bordes_por_partes(conjunto.args[0], a, b), _puntos_en(conjunto.args[1], a, b))
+        return None if base is None or quitados is None else {**base, **quitados}
+    return None
+
+def _puntos_en(conjunto, a, b):
+    # Puntos de un conjunto discreto en [a, b]: FiniteSet o {c*n + d : n entero}
+    if isinstance(conjunto, sp.FiniteSet):
+        return {float(p): p for p in conjunto if p.is_real and a <= float(p) <= b}
+    if isinstance(conjunto, sp.Union):
+        partes = [_puntos_en(parte, a, b) for parte in conjunto.args]
+        return None if None in partes else {v: p for parte in partes for v, p in parte.items()}
+    if isinstance(conjunto, sp.ImageSet) and conjunto.base_sets == (sp.S.Integers,):
+        n, = conjunto.lamda.variables
+        cuerpo = conjunto.lamda.expr
+        c, d = cuerpo.diff(n), cuerpo.subs(n, 0)
+        if cuerpo.is_polynomial(n) and not c.has(n) and c != 0:
+            extremos = sorted(((a - float(d)) / float(c), (b - float(d)) / float(c)))
+            puntos = (cuerpo.subs(n, k) for k in range(math.ceil(extremos[0]), math.floor(extremos[1]) + 1))
+            return {float(p): p for p in puntos}
+    return None
+
+def _escala_visible(valores_y):
+    # Altura "visible" de la curva: rango entre percentiles, para que los polos no la dominen
+    finitos = valores_y[np.isfinite(valores_y)]
+    if finitos.size == 0:
+        return 0.0, 1.0
+    bajo, alto = np.percentile(finitos, [5, 95])
+    return (bajo + alto) / 2, max(alto - bajo, 1e-9)
+
+def muestreo_adaptativo(fn, a, b, singularidades=(), presupuesto=PRESUPUESTO_PUNTOS):
+    # Parte de una malla gruesa y agrega puntos medios solo donde la curva se aparta
+    # de la recta entre vecinos (pendiente o curvatura alta) o cruza el borde del dominio.
+    # Devuelve (xs, ys) con NaN en los cortes para que la línea no una los polos.
+    xs, ys = muestreo_conjunto([fn], a, b, [singularidades], presupuesto)
+    return xs, ys[0]
+
+def muestreo_conjunto(fns, a, b, singularidades=None, presupuesto=PRESUPUESTO_PUNTOS):
+    # Igual que muestreo_adaptativo, pero para varias curvas sobre una sola malla: se
+    # refina donde alguna lo necesite y cada ronda evalúa todas en los mismos puntos.
+    # singularidades: una lista por curva. Devuelve (xs, ys) con ys de forma (curvas, puntos).
+    singularidades = singularidades or [()] * len(fns)
+
+    def evaluar(puntos):
+        return np.vstack([fn(puntos) for fn in fns])
+
+    xs = malla(a, b, _PUNTOS_INICIALES)
+    ys = evaluar(xs)
+    escalas = np.array([_escala_visible(fila) for fila in ys])
+    centro, escala = escalas[:, :1], escalas[:, 1:]
+    tolerancia = _TOLERANCIA_GRAFICA * escala
+    ancho_minimo = (b - a) * 2.0 ** -16
+    while xs.size < presupuesto:
+        medios = (xs[:-1] + xs[1:]) / 2
+        y_medios = evaluar(medios)
+        finitos = np.isfinite(ys[:, :-1]) & np.isfinite(ys[:, 1:])
+        with np.errstate(invalid='ignore'):
+            error = np.abs(y_medios - (ys[:, :-1] + ys[:, 1:]) / 2)
+        error = np.where(finitos, np.where(np.isfinite(error), error, np.inf), 0.0)
+        # borde del dominio: un extremo finito y el otro no
+        error[np.isfinite(ys[:, :-1]) != np.isfinite(ys[:, 1:])] = np.inf
+        # tramos con ambos extremos muy fuera de la zona visible (cerca de polos): no se refinan
+        with np.errstate(invalid='ignore'):
+            fuera = np.abs(ys - centro) > 5 * escala
+        error[fuera[:, :-1] & fuera[:, 1:]] = 0.0
+        # cada curva con su propia tolerancia; manda la que más se aparta
+        error = (error / tolerancia).max(axis=0)
+        error[np.diff(xs) <= ancho_minimo] = 0.0
+        refinar = np.flatnonzero(error > 1)
+        if refinar.size == 0:
+            break
+        disponible = presupuesto - xs.size
+        if refinar.size > disponible:
+            refinar = refinar[np.argsort(error[refinar])[::-1][:disponible]]
+        xs = np.insert(xs, refinar + 1, medios[refinar])
+        ys = np.insert(ys, refinar + 1, y_medios[:, refinar], axis=1)
+
+    # cortes de cada curva: saltos donde el punto medio no queda entre los extremos
+    # (polos que el refinamiento no alcanzó a aislar) y las singularidades dadas
+    cortes = []
+    for curva, fila in enumerate(ys):
+        saltos = np.flatnonzero(np.abs(np.diff(fila)) > escala[curva, 0])
+        if saltos.size:
+            y_medios = fns[curva]((xs[saltos] + xs[saltos + 1]) / 2)
+            bajo = np.fmin(fila[saltos], fila[saltos + 1])
+            alto = np.fmax(fila[saltos], fila[saltos + 1])
+            polos = saltos[~((y_medios >= bajo) & (y_medios <= alto))]
+            cortes += [((xs[p] + xs[p + 1]) / 2, curva) for p in polos]
+        cortes += [(s, curva) for s in singularidades[curva] if a < s < b]
+    if cortes:
+        cortes.sort()
+        x_cortes = np.array([c for c, _ in cortes])
+        # las demás curvas se evalúan en el punto del corte; la que se corta lleva NaN
+        y_cortes = evaluar(x_cortes) if len(fns) > 1 else np.empty((1, x_cortes.size))
+        y_cortes[[curva for _, curva in cortes], np.arange(x_cortes.size)] = np.nan
+        posiciones = np.searchsorted(xs, x_cortes)
+        xs = np.insert(xs, posiciones, x_cortes)
+        ys = np.insert(ys, posiciones, y_cortes, axis=1)
+    # un solo NaN por tramo fuera del dominio basta para cortar la línea
+    repetidos = (np.isnan(ys[:, 1:]) & np.isnan(ys[:, :-1])).all(axis=0)
+    conservar = np.concatenate(([True], ~repetidos))
+    return xs[conservar], ys[:, conservar]
+
+# --------------------------------------------------------------
+# ------------- Etapas simbólicas con tiempo límite ------------
+# --------------------------------------------------------------
+# Con límite, cada etapa corre en un proceso de forkserver, que re-importa el script
+# principal. Un script que llama a este módulo fuera de `if __name__ == "__main__":`
+# se re-ejecutaría en cada proceso: en ese caso las etapas corren en línea (sin límite).
+LIMITE_SIMBOLICO = 5.0  # segundos por etapa simbólica; None o 0 lo desactiva
+
+_contexto_procesos = None
+_hilo = threading.local()  # token de cancelación del análisis en curso en este hilo
+
+class AnalisisCancelado(Exception):
+    pass
+
+def fijar_cancelacion(evento):
+    # Asocia un threading.Event al hilo actual; al activarse, la etapa simbólica
+    # en curso se interrumpe (se mata su proceso) y se lanza AnalisisCancelado.
+    _hilo.cancelado = evento
+
+def contexto_procesos():
+    # forkserver evita hacer fork de un proceso con hilos (Tk, ejecutores) y, con
+    # la precarga, cada trabajador arranca con sympy ya importado
+    global _contexto_procesos
+    if _contexto_procesos is None:
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            # El servidor importa la precarga antes de aplicar sys.path (y calla el
+            # ImportError): sin la carpeta del módulo en PYTHONPATH, fuera de ella
+            # cada proceso volvería a importar sympy
+            carpeta = os.path.dirname(os.path.abspath(__file__))
+            rutas = [r for r in os.environ.get("PYTHONPATH", "").split(os.pathsep) if r]
+            if carpeta not in rutas:
+                os.environ["PYTHONPATH"] = os.pathsep.join([carpeta] + rutas)
+            _contexto_procesos = multiprocessing.get_context('forkserver')
+            _contexto_procesos.set_forkserver_preload([__name__])
+        else:
+            _contexto_procesos = multiprocessing.get_context()
+    return _contexto_procesos
+
+class _ProcesoSimbolico:
+    # Proceso persistente que atiende etapas simbólicas una tras otra: crear uno por
+    # etapa cuesta más que muchas de ellas. Si una etapa se pasa del límite o se
+    # cancela, se mata el proceso y la siguiente usa otro.
+    def __init__(self):
+        ctx = contexto_procesos()
+        self.conexion, extremo = ctx.Pipe()
+        self.proceso = ctx.Process(target=_trabajador_simbolico, args=(extremo,), daemon=True)
+        self.proceso.start()
+        extremo.close()
+
+    def matar(self):
+        if self.proceso.is_alive():
+            self.proceso.kill()
+        self.proceso.join()
+        self.conexion.close()
+
+_procesos_libres = []  # _ProcesoSimbolico sin etapa en curso
+_lock_procesos = threading.Lock()
+
+def _tomar_proceso():
+    with _lock_procesos:
+        while _procesos_libres:
+            proceso = _procesos_libres.pop()
+            if proceso.proceso.is_alive():
+                return proceso
+            proceso.matar()
+    return _ProcesoSimbolico()
+
+def _devolver_proceso(proceso):
+    with _lock_procesos:
+        _procesos_libres.append(proceso)
+
+def _trabajador_simbolico(conexion):
+    # Las subetapas medidas en el proceso hijo viajan con la respuesta
+    while True:
+        try:
+            funcion, args = conexion.recv()
+        except EOFError:
+            return
+        traza = Traza()
+        try:
+            with trazando(traza):
+                valor = funcion(*args)
+            datos = pickle.dumps((True, valor, traza.eventos))
+        except Exception as e:
+            datos = pickle.dumps((False, f"{type(e).__name__}: {e}", traza.eventos))
+        conexion.send_bytes(datos)
+
+def _main_sin_guarda():
+    # True si se llama desde el cuerpo de __main__ fuera de `if __name__ == "__main__":`
+    # (cada proceso nuevo volvería a ejecutarlo y fallaría al arrancar el suyo)
+    principal = sys.modules.get("__main__")
+    ruta = getattr(principal, "__file__", None)
+    if ruta is None:
+        return False  # intérprete interactivo o -c: no se re-importa
+    marco = sys._getframe(1)
+    while marco is not None and not (marco.f_globals is vars(principal) and marco.f_code.co_name == "<module>"):
+        marco = marco.f_back
+    if marco is None:
+        return False  # llamada desde un hilo o una función ya fuera del cuerpo del script
+    return not any(inicio <= marco.f_lineno <= fin for inicio, fin in _lineas_con_guarda(ruta))
+
+@lru_cache(maxsize=8)
+def _lineas_con_guarda(ruta):
+    # Líneas (inicio, fin) de los bloques `if __name__ == "__main__":` del script
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            arbol = ast.parse(archivo.read())
+    except (OSError, SyntaxError, ValueError):
+        return ()
+    bloques = []
+    for nodo in arbol.body:
+        prueba = getattr(nodo, "test", None)
+        if isinstance(nodo, ast.If) and isinstance(prueba, ast.Compare) and \
+                {getattr(prueba.left, "id", None), getattr(prueba.comparators[0], "value", None)} == {"__name__", "__main__"}:
+            bloques.append((nodo.lineno, nodo.end_lineno))
+    return tuple(bloques)
+
+def ejecutar_con_limite(funcion, *args, limite=None, etapa=None):
+    # Ejecuta funcion(*args) en un proceso aparte que se mata si supera el límite.
+    # Lanza TimeoutError al agotarse el tiempo. Si se da un nombre de etapa, se
+    # registra en la traza activa con su desenlace como ruta.
+    with medir(etapa or funcion.__name__) as medicion:
+        try:
+            valor = _ejecutar_con_limite(funcion, args, limite)
+        except TimeoutError:
+            medicion.ruta = "tiempo agotado"
+            raise
+        except AnalisisCancelado:
+            medicion.ruta = "cancelado"
+            raise
+        except Exception:
+            medicion.ruta = "error"
+            raise
+        medicion.ruta = "ok"
+        return valor
+
+def _ejecutar_con_limite(funcion, args, limite):
+    if limite is None:
+        limite = LIMITE_SIMBOLICO
+    cancelado = getattr(_hilo, 'cancelado', None)
+    if cancelado is not None and cancelado.is_set():
+        raise AnalisisCancelado()
+    # sin límite, dentro de un proceso daemon que no puede crear hijos o desde un
+    # script sin guarda de __main__: en línea
+    if not limite or multiprocessing.current_process().daemon or _main_sin_guarda():
+        return funcion(*args)
+    traza = traza_actual()
+    inicio = time.perf_counter()
+    proceso = _tomar_proceso()
+    fin = time.monotonic() + limite
+    datos = None
+    try:
+        proceso.conexion.send((funcion, args))
+        while datos is None:
+            restante = fin - time.monotonic()
+            if restante <= 0:
+                raise TimeoutError(f"La etapa simbólica superó el límite de {limite} s")
+            if proceso.conexion.poll(min(restante, 0.05)):
+                datos = proceso.conexion.recv_bytes()
+            elif cancelado is not None and cancelado.is_set():
+                raise AnalisisCancelado()
+            elif not proceso.proceso.is_alive():
+                break  # murió sin responder: no se espera hasta el límite
+    except (EOFError, ConnectionError):
+        pass  # murió mientras respondía
+    finally:
+        if datos is None:
+            proceso.matar()
+        else:
+            _devolver_proceso(proceso)
+    if datos is None:
+        raise RuntimeError(f"El proceso simbólico terminó inesperadamente (código {proceso.proceso.exitcode})")
+    ok, valor, eventos = pickle.loads(datos)
+    if traza is not None:
+        traza.incorporar(eventos, inicio - traza.inicio)
+    if not ok:
+        raise RuntimeError(valor)
+    return valor
+
 # --------------------------------------------------------------
 # ------------- Calcular recorrido -----------------------------
 # --------------------------------------------------------------
-def calcularRecorrido(expresion_simbolica, dominio=None):
+def calcularRecorrido(expresion_simbolica, dominio=None, limite=None):
+    return _calcularRecorrido(expresion_simbolica, dominio, limite)[0]
+
+def _calcularRecorrido(expresion_simbolica, dominio=None, limite=None, extremos=None):
+    # Devuelve (texto, exacto). extremos() da el resultado de calcularMonotonia; se
+    # llama solo si function_range no resuelve (ResultadoAnalisis pasa su etapa memoizada)
+    if extremos is None:
+        extremos = lambda: calcularMonotonia(expresion_simbolica, dominio, limite)
+    with medir("recorrido") as medicion:
+        texto, medicion.ruta = _recorridoPorCaminos(expresion_simbolica, dominio, limite, extremos)
+    return texto, medicion.ruta in ("simbólico", "extremos")
+
+def _recorridoPorCaminos(expresion_simbolica, dominio, limite, extremos):
+    # Devuelve (texto, camino usado)
     # Intentar primero function_range simbólico
+    nota = ""
+    try:
+        r = ejecutar_con_limite(sp.calculus.util.function_range, expresion_simbolica, x,
+                                dominio if dominio else sp.S.Reals, limite=limite,
+                                etapa="recorrido.function_range")
+        return f"Recorrido exacto: {sp.pretty(r)}", "simbólico"
+    except TimeoutError:
+        nota = " (tiempo simbólico agotado)"
+    except AnalisisCancelado:
+        raise
+    except Exception:
+        pass
+    # Por extremos: valores en los puntos críticos y límites en los bordes de cada tramo monótono
     try:
-        r = sp.calculus.util.function_range(expresion_simbolica, x, dominio if dominio else sp.S.Reals)
-        return f"Recorrido exacto: {sp.pretty(r)}"
+        monotonia = extremos()
+        if monotonia["certificado"]:
+            return monotonia["recorrido"].replace(":", nota + ":", 1), "extremos"
+    except AnalisisCancelado:
+        raise
     except Exception:
+        monotonia = None
+    # Envolvente rigurosa por aritmética de intervalos (sobre todos los reales), si dice
+    # algo; si no, la aproximación por ventana o por muestreo es más informativa
+    try:
+        with medir("recorrido.intervalos"):
+            envolvente = recorrido_intervalos(expresion_simbolica, x)
+        if envolvente is None or _envolventeInformativa(envolvente):
+            return _textoEnvolvente(envolvente, nota), "intervalos"
+    except IntervaloNoSoportado:
         pass
+    if monotonia is not None:
+        return monotonia["recorrido"].replace(":", nota + ":", 1), "numérico"
     # Aproximación numérica
     try:
-        fn = sp.lambdify(x, expresion_simbolica, 'math')
+        fn = compilar_funcion(expresion_simbolica)
     except Exception:
-        return "No se pudo determinar"
-    valores_y = []
-    for i in range(-200, 201):  # Extender a [-20, 20] para mejor aproximación
-        xv = i/10
+        return "No se pudo determinar", "numérico"
+    with medir("recorrido.numerico"):
+        valores_y = fn(malla(-20, 20, 401))  # Extender a [-20, 20] para mejor aproximación
+    valores_y = valores_y[np.abs(valores_y) < 1e6]  # los NaN también quedan fuera
+    if valores_y.size:
+        return f"Aproximado en [-20,20]{nota}: [{valores_y.min():.2f}, {valores_y.max():.2f}]", "numérico"
+    return "No se pudo determinar", "numérico"
+
+def _textoEnvolvente(envolvente, nota):
+    if envolvente is None:
+        return f"Recorrido por intervalos{nota}: vacío (f no toma valores reales)"
+    bajo, alcanzado_bajo, alcanzado_alto, alto = envolvente
+    izquierda = "(-∞" if math.isinf(bajo) else f"[{bajo:.4g}"
+    derecha = "∞)" if math.isinf(alto) else f"{alto:.4g}]"
+    texto = f"Recorrido por intervalos{nota}: {izquierda}, {derecha}"
+    # Si la cota no está pegada a un valor alcanzado, la envolvente puede ser holgada
+    if not (_cotaAjustada(bajo, alcanzado_bajo) and _cotaAjustada(alto, alcanzado_alto)):
+        texto += f" (envolvente; valores alcanzados en [{alcanzado_bajo:.4g}, {alcanzado_alto:.4g}])"
+    return texto
+
+def explicacion_recorrido(texto):
+    # Cómo se obtuvo el recorrido, según el camino que indica su texto (el mismo que
+    # se guarda en la caché, así que vale también para resultados leídos de disco)
+    ventana = re.match(r"Aproximado en \[(\S+),(\S+)\] por extremos", texto)
+    if texto.startswith("Recorrido exacto"):
+        return "Se calculó de forma simbólica (function_range de SymPy) sobre el dominio."
+    if texto.startswith("Recorrido por extremos"):
+        return ("Con el signo de f' se dividió el dominio en tramos monótonos y se unieron sus\n"
+                "imágenes (valores en los extremos y límites en los bordes). Vale para todo el dominio.")
+    if texto.startswith("Recorrido por intervalos"):
+        return ("Se acotó f con aritmética de intervalos sobre todos los reales: la cota es segura,\n"
+                "pero si se indica envolvente puede ser más amplia que el recorrido.")
+    if ventana:
+        return ("Con el signo de f' se dividió el dominio en tramos monótonos dentro de "
+                f"[{ventana.group(1)},{ventana.group(2)}];\nfuera de esa ventana no se pudo certificar. "
+                "Es una aproximación.")
+    if texto.startswith("Aproximado en [-20,20]"):
+        return ("Se evaluó la función en 401 puntos de [-20,20] y se tomaron los valores mínimo\n"
+                "y máximo. Es una aproximación.")
+    return "No se llegó a un resultado por ningún camino."
+
+def _envolventeInformativa(envolvente):
+    # Acotada o pegada a valores alcanzados: una (-∞, ∞) holgada (sin(x)/x) no informa
+    bajo, alcanzado_bajo, alcanzado_alto, alto = envolvente
+    return (math.isfinite(bajo) and math.isfinite(alto)) or \
+        (_cotaAjustada(bajo, alcanzado_bajo) and _cotaAjustada(alto, alcanzado_alto))
+
+def _cotaAjustada(cota, alcanzado):
+    if math.isinf(cota):
+        return abs(alcanzado) >= 1e6
+    return abs(cota - alcanzado) <= 1e-3 * max(1.0, abs(alcanzado))
+
+# --------------------------------------------------------------
+# ------------- Monotonía y extremos ---------------------------
+# --------------------------------------------------------------
+INTERVALO_MONOTONIA = (-10, 10)  # ventana de la búsqueda de puntos críticos y de inflexión
+_NIVELES_COLA = 8  # bisecciones de cada cola al certificar el signo de f' con intervalos
+_x_real = sp.Symbol('x', real=True)
+
+def calcularDerivadas(expresion_simbolica):
+    # f' y f'' una sola vez. Se deriva respecto de una x real: así |x| da sign(x)
+    # y no una expresión con las partes real e imaginaria de x
+    f = expresion_simbolica.xreplace({x: _x_real})
+    primera = sp.diff(f, _x_real)
+    segunda = sp.diff(primera, _x_real)
+    if f.is_rational_function(_x_real):
+        # sin cancelar, (x^2-1)/(x-1) da una f'' que solo es ruido de redondeo alrededor de 0
+        primera, segunda = sp.cancel(primera), sp.cancel(segunda)
+    return primera.xreplace({_x_real: x}), segunda.xreplace({_x_real: x})
+
+def calcularMonotonia(expresion_simbolica, dominio=None, limite=None):
+    return _calcularMonotonia(expresion_simbolica, dominio, limite)[0]
+
+def _calcularMonotonia(expresion_simbolica, dominio=None, limite=None):
+    # Devuelve (datos, certificado). datos (apto para JSON):
+    #   derivada, segunda: f'(x) y f''(x) en texto
+    #   tramos: [desde, hasta, signo de f'] (1 crece, -1 decrece, 0 constante)
+    #   extremos: [x, y, "máximo" | "mínimo"] locales; inflexion: [x, y]
+    #   recorrido: texto; certificado: True si el recorrido vale para todo el dominio
+    # Los puntos se buscan en INTERVALO_MONOTONIA; más allá solo se concluye si el
+    # signo de f' en la cola queda certificado con aritmética de intervalos.
+    if dominio is None:
+        dominio = determinarDominio(expresion_simbolica, limite)[0]
+    with medir("monotonia") as medicion:
+        datos = _monotoniaPorDerivadas(expresion_simbolica, dominio, limite)
+        medicion.ruta = "certificado" if datos["certificado"] else "ventana"
+    return datos, datos["certificado"]
+
+def _monotoniaPorDerivadas(expresion_simbolica, dominio, limite):
+    a, b = INTERVALO_MONOTONIA
+    fn = compilar_funcion(expresion_simbolica)
+    with medir("monotonia.derivadas"):
+        primera, segunda = calcularDerivadas(expresion_simbolica)
+        if _derivada_nula(primera):
+            # f constante en todo el dominio: sin ruido de redondeo que invente tramos
+            primera = segunda = sp.Integer(0)
+        fp, completo = _compilar_derivada(primera, fn)
+        fpp, _ = _compilar_derivada(segunda, fp)
+    incluidos = {}  # pertenece cuesta con dominios de cientos de tramos: una vez por punto
+
+    def incluido(p):
+        if p not in incluidos:
+            incluidos[p] = math.isfinite(p) and bool(pertenece(dominio, [p])[0]) and math.isfinite(fn(p))
+        return incluidos[p]
+
+    # Piezas [desde, hasta, signo] de la ventana: cada tramo del dominio se corta en los
+    # ceros de f' y donde f' cambia de signo sin anularse (|x| en 0)
+    piezas, inflexion = [], []
+    tramos, bordes = _tramos_ventana(dominio, fn, a, b)
+    with medir("monotonia.criticos"):
+        for u, v in tramos:
+            n = max(101, int(PUNTOS_RAICES * (v - u) / (b - a)) | 1)
+            criticos, tope = _cambios_de_signo(fp, u, v, n)
+            completo = completo and not tope
+            puntos = [u] + criticos + [v]
+            piezas += [[p, q, _signo(fp, p, q)] for p, q in zip(puntos, puntos[1:])]
+            # inflexión: ceros de f'' donde f'' cambia de signo
+            ceros, tope = _cambios_de_signo(fpp, u, v, n)
+            completo = completo and not tope
+            inflexion += [[c, float(fn(c))] for c in ceros if _acotada_en(fn, c)]
+    completo = completo and all(signo is not None for _, _, signo in piezas)
+    piezas = [pieza for pieza in piezas if pieza[2] is not None]
+
+    # Colas fuera de la ventana: 0 si no están en el dominio, None si no se certifican
+    with medir("monotonia.colas"):
+        colas = [_signo_cola(primera, dominio, a, -1), _signo_cola(primera, dominio, b, 1)]
+    if colas[0] not in (None, _FUERA_DOMINIO):
+        piezas.insert(0, [-math.inf, a, colas[0]])
+    if colas[1] not in (None, _FUERA_DOMINIO):
+        piezas.append([b, math.inf, colas[1]])
+
+    # Vecinas pegadas en un punto del dominio: mismo signo se unen; signo opuesto es un extremo
+    unidas, extremos = [], []
+    for desde, hasta, signo in piezas:
+        previa = unidas[-1] if unidas else None
+        if previa is not None and previa[1] == desde and incluido(desde):
+            if previa[2] == signo:
+                previa[1] = hasta
+                continue
+            if previa[2] * signo < 0:
+                extremos.append([desde, float(fn(desde)), "máximo" if previa[2] > 0 else "mínimo"])
+        unidas.append([desde, hasta, signo])
+    # un borde del dominio incluido también es extremo (sqrt(x) en 0)
+    for desde, hasta, signo in unidas:
+        for borde, crece_hacia_adentro in ((desde, signo > 0), (hasta, signo < 0)):
+            if signo and borde in bordes and incluido(borde):
+                extremos.append([borde, float(fn(borde)), "mínimo" if crece_hacia_adentro else "máximo"])
+    extremos.sort()
+
+    # Recorrido: unión de las imágenes de las piezas monótonas
+    # (límites simbólicos solo en bordes exactos: los de un dominio aproximado traen Float)
+    with medir("monotonia.recorrido"):
+        exactos = {v: p for v, p in bordes.items() if not p.has(sp.Float)}
+        exactos.update({a: sp.Integer(a), b: sp.Integer(b), -math.inf: -sp.oo, math.inf: sp.oo})
+        ventana = [[max(p, a), min(q, b), signo] for p, q, signo in unidas if max(p, a) < min(q, b)]
+        extremos_piezas = {(p, "+") for p, _, _ in unidas + ventana} | {(q, "-") for _, q, _ in unidas + ventana}
+        valores, simbolicos = _valores_laterales(expresion_simbolica, fn, sorted(extremos_piezas), incluido, exactos, limite)
+        imagenes = _imagenes(unidas, valores)
+    # lo > hi: la pieza no era monótona (un polo que ni el dominio ni la malla cortaron)
+    certificado = completo and simbolicos and None not in colas and \
+        not any(math.isnan(lo) or math.isnan(hi) or lo > hi for lo, _, hi, _ in imagenes)
+    if certificado:
+        texto = f"Recorrido por extremos: {_textoUnion(imagenes)}"
+    else:
+        texto = f"Aproximado en [{a},{b}] por extremos: {_textoUnion(_imagenes(ventana, valores))}"
+    return {"derivada": str(primera), "segunda": str(segunda),
+            "tramos": unidas, "extremos": extremos, "inflexion": inflexion,
+            "recorrido": texto, "certificado": certificado}
+
+def _imagenes(piezas, valores):
+    # Imagen (lo, lo alcanzado, hi, hi alcanzado) de cada pieza monótona a partir de
+    # los valores en sus extremos
+    imagenes = []
+    for p, q, signo in piezas:
+        (vp, cp), (vq, cq) = valores[(p, "+")], valores[(q, "-")]
+        if signo == 0:
+            imagenes.append((vp, True, vp, True) if cp else (vq, True, vq, True))
+        else:
+            imagenes.append((vp, cp, vq, cq) if signo > 0 else (vq, cq, vp, cp))
+    return imagenes
+
+def _compilar_derivada(derivada, fn):
+    # Devuelve (núcleo de la derivada, exacta). Si SymPy la dejó sin evaluar
+    # (Derivative, Subs) se usan diferencias centradas de fn
+    if not derivada.has(sp.Derivative, sp.Subs):
         try:
-            y_val = fn(xv)
-            if isinstance(y_val, (int, float)) and math.isfinite(y_val) and abs(y_val) < 1e6:
-                valores_y.append(float(y_val))
+            return compilar_funcion(derivada), True
         except Exception:
+            pass
+
+    def evaluar(valores_x):
+        xs = np.asarray(valores_x, dtype=float)
+        h = 1e-6 * np.maximum(1.0, np.abs(xs))
+        return (fn(xs + h) - fn(xs - h)) / (2 * h)
+
+    return evaluar, False
+
+def _frontera(condicion, lo, hi, iteraciones=60):
+    # Bisección del punto de [lo, hi] donde deja de valer condicion (que vale en lo)
+    for _ in range(iteraciones):
+        medio = 0.5 * (lo + hi)
+        if condicion(medio):
+            lo = medio
+        else:
+            hi = medio
+    return 0.5 * (lo + hi)
+
+def _tramos_ventana(dominio, fn, a, b):
+    # Tramos (u, v) de [a, b] dentro del dominio, separados en sus bordes, y los bordes
+    # {float: exacto}. Los cambios de finitud de f en la malla también cortan (dominios
+    # aproximados o sin bordes en forma cerrada).
+    bordes = bordes_dominio(dominio, a, b)
+    cortes = set(bordes)
+    xs = malla(a, b, PUNTOS_RAICES)
+    finitos = np.isfinite(fn(xs))
+    for i in np.flatnonzero(finitos[:-1] != finitos[1:]):
+        c = _frontera(lambda t, estado=finitos[i]: np.isfinite(fn(t)) == estado, xs[i], xs[i + 1])
+        c = float(round(c)) if abs(c - round(c)) < 1e-9 else c  # la bisección deja x^(2/3) en -4e-21 y no en 0
+        if all(abs(c - p) > 1e-9 * max(1.0, abs(c)) for p in cortes):
+            cortes.add(c)
+    puntos = np.array(sorted(cortes | {a, b}))
+    medios = 0.5 * (puntos[:-1] + puntos[1:])
+    dentro = pertenece(dominio, medios) & np.isfinite(fn(medios))
+    tramos = [(float(u), float(v)) for u, v, d in zip(puntos, puntos[1:], dentro) if d]
+    return tramos, bordes
+
+def _cambios_de_signo(fn, u, v, n):
+    # Puntos de (u, v) donde fn cambia de signo: sus ceros (buscar_raices) y los saltos sin
+    # cero en medio (polos, |x| en 0). Devuelve (puntos ordenados, True si se llegó al tope).
+    # Un cero sin cambio de signo (x^3 en 0) no corta: ahí f sigue siendo monótona.
+    # Solo puntos interiores: u y v pueden ser polos (bordes del dominio en float, del
+    # lado equivocado del polo) y el salto de signo ahí no es un cero.
+    xs = malla(u, v, n)[1:-1]
+    ys = fn(xs)
+    margen_u, margen_v = 1e-9 * max(1.0, abs(u)), 1e-9 * max(1.0, abs(v))
+    if not np.any(np.abs(ys[np.isfinite(ys)]) > 1e-12):
+        return [], False  # idénticamente cero (salvo redondeo)
+    raices = buscar_raices(fn, u, v, n)
+    puntos = []
+    for r in raices:
+        paso = 1e-7 * max(1.0, abs(r))
+        if u + margen_u < r < v - margen_v and fn(r - paso) * fn(r + paso) < 0:
+            puntos.append(r)
+    validos = np.flatnonzero(np.isfinite(ys) & (ys != 0))
+    signos = np.sign(ys[validos])
+    for k in np.flatnonzero(signos[:-1] != signos[1:]):
+        lo, hi = xs[validos[k]], xs[validos[k + 1]]
+        if not any(lo <= r <= hi for r in raices):
+            puntos.append(float(_frontera(lambda t, s=signos[k]: np.sign(fn(t)) == s, lo, hi)))
+    return sorted(puntos), len(raices) >= MAX_RAICES
+
+def _acotada_en(fn, c):
+    # f finita en c y sin el salto de un polo: |f(c)| no es órdenes de magnitud
+    # mayor que a 1e-6 de distancia (tan(x) en un polo da 3e15 contra 1e6)
+    y = float(fn(c))
+    if not math.isfinite(y):
+        return False
+    h = 1e-6 * max(1.0, abs(c))
+    vecinos = [abs(float(fn(c + d))) for d in (-h, h)]
+    return abs(y) <= 1e3 * max([1.0] + [w for w in vecinos if math.isfinite(w)])
+
+def _signo(fn, p, q):
+    # Signo de fn en (p, q) por mayoría en puntos interiores; None si no toma valores
+    muestras = fn(malla(p, q, 9)[1:-1])
+    signos = np.sign(muestras[np.isfinite(muestras)])
+    return int(np.sign(signos.sum())) if signos.size else None
+
+_FUERA_DOMINIO = "fuera"
+
+def _derivada_nula(primera):
+    # f' idénticamente 0: literal, o casi 0 en una malla y SymPy lo confirma
+    # (simplify solo se intenta en ese caso, que es raro)
+    if primera.is_zero:
+        return True
+    try:
+        ys = compilar_funcion(primera)(malla(*INTERVALO_MONOTONIA, 201))
+        ys = ys[np.isfinite(ys)]
+        return bool(ys.size) and bool(np.all(np.abs(ys) < 1e-9)) and sp.simplify(primera) == 0
+    except Exception:
+        return False
+
+def _signo_cola(primera, dominio, borde, lado):
+    # Signo de f' en toda la cola x > borde (lado 1) o x < borde (lado -1): 1, -1 o 0
+    # (constante) si se certifica con intervalos, _FUERA_DOMINIO si la cola está fuera
+    # del dominio, None si no se sabe
+    cola = sp.Interval.open(borde, sp.oo) if lado > 0 else sp.Interval.open(-sp.oo, borde)
+    try:
+        tramos = dominio.args if isinstance(dominio, sp.Union) else (dominio,)
+        if all(isinstance(tramo, sp.Interval) for tramo in tramos):
+            # tramo por tramo: con cientos de tramos (tan(x^2)) la intersección con la unión tarda segundos
+            vacia = all(sp.Intersection(tramo, cola) == sp.S.EmptySet for tramo in tramos)
+            contenida = any(cola.is_subset(tramo) for tramo in tramos)
+        else:
+            vacia = sp.Intersection(dominio, cola) == sp.S.EmptySet
+            contenida = cola.is_subset(dominio) is True
+        if vacia:
+            return _FUERA_DOMINIO
+        if not contenida:
+            return None
+        # x = lado/t lleva la cola a t en (0, 1/|borde|]: una caja finita que se puede subdividir
+        t = sp.Dummy('t', positive=True)
+        derivada = primera.subs(x, lado / t)
+        # factorizado, t^2*(t^2 - 1) no se sale de [-h^2, 0] como t^4 - t^2 en [0, h]
+        derivada = sp.factor(sp.cancel(derivada) if primera.is_rational_function(x) else derivada)
+        df = compilar_intervalos(derivada, t)
+    except Exception:
+        return None
+    signos = set()
+    cajas = [(0.0, 1.0 / abs(borde), 0)]
+    while cajas:
+        lo, hi, nivel = cajas.pop()
+        signo = _signo_intervalo(df(Intervalo(lo, hi)))
+        if signo is None and lo == 0:
+            # en t = 0 queda inf*0 (x*exp(-x)); desde 1e-300 basta: más allá de 1e300
+            # no hay x representables
+            signo = _signo_intervalo(df(Intervalo(1e-300, hi)))
+        if signo is not None:
+            signos.add(signo)
+        elif nivel < _NIVELES_COLA:
+            medio = 0.5 * (lo + hi)
+            cajas += [(lo, medio, nivel + 1), (medio, hi, nivel + 1)]
+        else:
+            return None
+    return signos.pop() if len(signos) == 1 else None
+
+def _signo_intervalo(valor):
+    if valor is not None and valor.lo == valor.hi == 0:
+        return 0
+    if valor is not None and valor.lo >= 0:
+        return 1
+    if valor is not None and valor.hi <= 0:
+        return -1
+    return None
+
+def _limites_laterales(expresion_simbolica, puntos):
+    # Límite de f en cada (punto, lado); NaN si no existe o no es real (AccumBounds, zoo)
+    valores = []
+    for punto, lado in puntos:
+        try:
+            valores.append(float(sp.limit(expresion_simbolica, x, punto, lado)))
+        except Exception:
+            valores.append(float('nan'))
+    return valores
+
+def _valores_laterales(expresion_simbolica, fn, puntos, incluido, exactos, limite):
+    # {(p, lado): (valor, alcanzado)}: f(p) si p está en el dominio; si no, el límite lateral
+    # (simbólico en los bordes exactos, numérico en los demás). Devuelve (valores, simbólicos).
+    valores, pendientes = {}, []
+    for p, lado in puntos:
+        if incluido(p):
+            valores[(p, lado)] = (float(fn(p)), True)
+        elif p in exactos:
+            pendientes.append((p, lado))
+        else:
+            valores[(p, lado)] = (_limite_numerico(fn, p, lado), False)
+    simbolicos = len(valores) == sum(alcanzado for _, alcanzado in valores.values())
+    if pendientes:
+        try:
+            limites = ejecutar_con_limite(_limites_laterales, expresion_simbolica,
+                                          [(exactos[p], lado) for p, lado in pendientes],
+                                          limite=limite, etapa="monotonia.limites")
+        except (TimeoutError, RuntimeError):
+            limites = [_limite_numerico(fn, p, lado) for p, lado in pendientes]
+            simbolicos = False
+        valores.update((pendiente, (valor, False)) for pendiente, valor in zip(pendientes, limites))
+    return valores, simbolicos
+
+def _limite_numerico(fn, p, lado):
+    # f muy cerca de p por el lado pedido; |f| enorme se toma como infinito
+    if math.isinf(p):
+        cerca = math.copysign(1e12, p)
+    else:
+        cerca = p + (1 if lado == "+" else -1) * 1e-9 * max(1.0, abs(p))
+    valor = float(fn(cerca))
+    return valor if math.isnan(valor) or abs(valor) < 1e8 else math.copysign(math.inf, valor)
+
+def _textoUnion(imagenes):
+    # Une intervalos (lo, lo incluido, hi, hi incluido) y los escribe como conjunto
+    igual = lambda p, q: p == q or math.isfinite(p) and math.isfinite(q) and abs(p - q) <= 1e-9 * max(1.0, abs(p), abs(q))
+    unidas = []
+    ordenadas = ((lo, clo, hi, chi) if lo <= hi else (hi, chi, lo, clo) for lo, clo, hi, chi in imagenes
+                 if not (math.isnan(lo) or math.isnan(hi)))
+    for lo, clo, hi, chi in sorted(ordenadas):
+        actual = unidas[-1] if unidas else None
+        if actual is not None and (lo < actual[2] and not igual(lo, actual[2])
+                                   or igual(lo, actual[2]) and (clo or actual[3])):
+            if igual(lo, actual[0]):
+                actual[1] = actual[1] or clo
+            if igual(hi, actual[2]):
+                actual[3] = actual[3] or chi
+            elif hi > actual[2]:
+                actual[2:] = [hi, chi]
+        else:
+            unidas.append([lo, clo, hi, chi])
+    if not unidas:
+        return "vacío"
+    return " ∪ ".join(_textoIntervalo(*tramo) for tramo in unidas)
+
+def _textoIntervalo(lo, clo, hi, chi):
+    if lo == hi:
+        return f"{{{lo + 0.0:.4g}}}"
+    izquierda = "(-∞" if math.isinf(lo) else ("[" if clo else "(") + f"{lo + 0.0:.4g}"
+    derecha = "∞)" if math.isinf(hi) else f"{hi + 0.0:.4g}" + ("]" if chi else ")")
+    return f"{izquierda}, {derecha}"
+
+def texto_monotonia(datos, max_puntos=5):
+    # Texto para la interfaz: tramos de crecimiento, extremos locales e inflexiones
+    a, b = INTERVALO_MONOTONIA
+    nombres = {1: "Creciente", -1: "Decreciente", 0: "Constante"}
+    lineas = [f"f'(x) = {datos['derivada']}"]
+    lineas += [f"• {nombres[signo]} en {_textoIntervalo(desde, False, hasta, False)}"
+               for desde, hasta, signo in datos["tramos"][:2 * max_puntos]]
+    if len(datos["tramos"]) > 2 * max_puntos:
+        lineas.append(f"  y {len(datos['tramos']) - 2 * max_puntos} tramos más")
+    if not datos["certificado"]:
+        lineas.append(f"  (buscado en [{a},{b}]; fuera de la ventana no se pudo certificar)")
+    for titulo, puntos in (("Extremos locales", datos["extremos"]), ("Puntos de inflexión", datos["inflexion"])):
+        if not puntos:
+            lineas.append(f"{titulo}: no hay en [{a},{b}]")
             continue
-    if valores_y:
-        return f"Aproximado en [-20,20]: [{min(valores_y):.2f}, {max(valores_y):.2f}]"
-    return "No se pudo determinar"
+        lineas.append(f"{titulo}:")
+        lineas += [f"• {(punto[2].capitalize() + ' en ') if len(punto) > 2 else ''}({punto[0]:.3f}, {punto[1]:.3f})"
+                   for punto in puntos[:max_puntos]]
+        if len(puntos) > max_puntos:
+            lineas.append(f"  y {len(puntos) - max_puntos} más")
+    return "\n".join(lineas)
 
 # --------------------------------------------------------------
 # ------------- Buscar intersecciones numéricamente -----------
 # --------------------------------------------------------------
-def _biseccion(fn, a, b, tol=1e-6, maxiter=50):
-    fa, fb = fn(a), fn(b)
-    if not (math.isfinite(fa) and math.isfinite(fb)) or fa * fb > 0:
-        raise ValueError("Bisección no aplicable")
+INTERVALO_RAICES = (-10, 10)  # ventana de búsqueda numérica de raíces
+MAX_RAICES = 100  # tope de raíces devueltas
+PUNTOS_RAICES = 2001  # malla inicial del barrido (paso 0.01 en [-10,10])
+_SUBDIVISIONES = 32  # puntos del refinamiento local de cada celda sospechosa
+_RAZON_AUREA = (5 ** 0.5 - 1) / 2
+
+def _brent(fn, a, b, fa, fb, xtol=1e-12, maxiter=100):
+    # Método de Brent (bisección + secante + interpolación cuadrática inversa)
+    # sobre un intervalo con cambio de signo. fn evalúa escalares.
+    c, fc = b, fb
+    d = e = b - a
     for _ in range(maxiter):
-        m = (a + b) / 2.0
-        fm = fn(m)
-        if not math.isfinite(fm):
-            break
-        if abs(fm) < tol or (b - a) / 2 < tol:
-            return m
-        if fa * fm <= 0:
-            b, fb = m, fm
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2 * np.finfo(float).eps * abs(b) + 0.5 * xtol
+        xm = 0.5 * (c - b)
+        if abs(xm) <= tol or fb == 0:
+            return b, fb
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2 * xm * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * xm * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = xm
         else:
-            a, fa = m, fm
-    return (a + b) / 2.0
-    
-def buscar_intersecciones_numericas(expresion_simbolica, rango=(-10, 10), step=0.1):
+            d = e = xm
+        a, fa = b, fb
+        b += d if abs(d) > tol else math.copysign(tol, xm)
+        fb = float(fn(b))
+        if not math.isfinite(fb):
+            raise ValueError("Brent no aplicable: valor no finito en el intervalo")
+    return b, fb
+
+def _minimos_abs(fn, a, b, iteraciones=60):
+    # Sección áurea simultánea sobre |f| en cada intervalo [a[i], b[i]]
+    c = b - _RAZON_AUREA * (b - a)
+    d = a + _RAZON_AUREA * (b - a)
+    fc, fd = np.abs(fn(c)), np.abs(fn(d))
+    for _ in range(iteraciones):
+        izquierda = ~(fc >= fd)  # los NaN empujan hacia el lado finito
+        a, b = np.where(izquierda, a, c), np.where(izquierda, d, b)
+        viejo = np.where(izquierda, c, d)
+        f_viejo = np.where(izquierda, fc, fd)
+        nuevo = np.where(izquierda, b - _RAZON_AUREA * (b - a), a + _RAZON_AUREA * (b - a))
+        f_nuevo = np.abs(fn(nuevo))
+        c, fc = np.where(izquierda, nuevo, viejo), np.where(izquierda, f_nuevo, f_viejo)
+        d, fd = np.where(izquierda, viejo, nuevo), np.where(izquierda, f_viejo, f_nuevo)
+    return np.where(fc < fd, c, d), np.fmin(fc, fd)
+
+def buscar_raices(fn, a0, b0, puntos=PUNTOS_RAICES, max_raices=MAX_RAICES):
+    # Raíces de una función vectorizada en [a0, b0]:
+    # 1) barrido vectorizado de la malla; 2) refinamiento local de las celdas con
+    # cambio de signo y de los mínimos locales de |f| (raíces dobles o muy juntas);
+    # 3) Brent en cada cambio de signo y sección áurea donde |f| toca cero sin cruzarlo.
+    xs = malla(a0, b0, puntos)
+    ys = fn(xs)
+    abs_y = np.abs(ys)
+    # puntos de la malla que ya son raíces; una racha de ceros (floor(x) en [0,1))
+    # cuenta una sola vez, por su primer punto
+    ceros = ys == 0
+    raices = [xs[ceros & ~np.concatenate(([False], ceros[:-1]))]]
+
+    cambios = np.flatnonzero(ys[:-1] * ys[1:] < 0)
+    # mínimos locales de |f| que no están junto a un cambio de signo
+    interiores = np.arange(1, puntos - 1)
+    minimos = interiores[(abs_y[1:-1] < abs_y[:-2]) & (abs_y[1:-1] <= abs_y[2:]) & (ys[1:-1] != 0)]
+    cerca_cambio = np.zeros(puntos, dtype=bool)
+    cerca_cambio[cambios] = cerca_cambio[cambios + 1] = True
+    minimos = minimos[~cerca_cambio[minimos]]
+
+    izquierdas = np.concatenate((xs[cambios], xs[minimos - 1]))
+    derechas = np.concatenate((xs[cambios + 1], xs[minimos + 1]))
+    if izquierdas.size:
+        # refinamiento local: una submalla por celda, todas en una sola evaluación
+        t = np.linspace(0.0, 1.0, _SUBDIVISIONES + 1)
+        sub_x = izquierdas[:, None] + (derechas - izquierdas)[:, None] * t
+        sub_y = fn(sub_x)
+        raices.append(sub_x[sub_y == 0])
+        filas, columnas = np.nonzero(sub_y[:, :-1] * sub_y[:, 1:] < 0)
+        fn_escalar = lambda v: float(fn(v))
+        for fila, columna in zip(filas, columnas):
+            a, b = sub_x[fila, columna], sub_x[fila, columna + 1]
+            fa, fb = sub_y[fila, columna], sub_y[fila, columna + 1]
+            try:
+                r, fr = _brent(fn_escalar, a, b, fa, fb)
+            except ValueError:
+                continue
+            # descartar polos: allí |f| crece en lugar de anularse
+            if abs(fr) <= 1e-6 * max(1.0, min(abs(fa), abs(fb))):
+                raices.append([r])
+        # mínimos sin cruce: buscar dónde |f| toca cero (raíces de multiplicidad par)
+        tocan = np.ones(izquierdas.size, dtype=bool)
+        tocan[filas] = False
+        tocan[:cambios.size] = False
+        if tocan.any():
+            sub_abs = np.abs(sub_y[tocan])
+            k = np.clip(np.nanargmin(np.where(np.isnan(sub_abs), np.inf, sub_abs), axis=1), 1, _SUBDIVISIONES - 1)
+            filas_min = np.arange(k.size)
+            candidatos, valores = _minimos_abs(fn, sub_x[tocan][filas_min, k - 1], sub_x[tocan][filas_min, k + 1])
+            escala = np.fmax(1.0, np.fmax(abs_y[minimos - 1], abs_y[minimos + 1])[tocan[cambios.size:]])
+            raices.append(candidatos[valores <= 1e-12 * escala])
+
+    # eliminar duplicados cercanos (ordenadas, en una pasada)
+    raices = np.sort(np.concatenate([np.asarray(r, dtype=float) for r in raices]))
+    if raices.size:
+        raices = raices[np.concatenate(([True], np.diff(raices) > 1e-6))]
+    return [float(r) for r in raices[:max_raices]]
+
+def buscar_intersecciones_numericas(expresion_simbolica, rango=None, max_raices=None, puntos=PUNTOS_RAICES):
     try:
-        fn = sp.lambdify(x, expresion_simbolica, 'math')
+        fn = compilar_funcion(expresion_simbolica)
     except Exception:
         return []
-    posibles = []
-    a0, b0 = rango
-    i = a0
-    while i < b0:
-        a, b = i, i + step
-        try:
-            fa, fb = fn(a), fn(b)
-            if not (math.isfinite(fa) and math.isfinite(fb)):
-                i += step
-                continue
-            if fa * fb < 0:
-                try:
-                    raiz = _biseccion(fn, a, b)
-                    posibles.append(raiz)
-                except Exception:
-                    posibles.append((a + b) / 2.0)
-        except Exception:
-            pass
-        i += step
-    # eliminar duplicados cercanos
-    finales = []
-    for r in posibles:
-        if not any(abs(r - s) < 1e-3 for s in finales):
-            finales.append(r)
-    return finales[:10]
+    a0, b0 = rango if rango else INTERVALO_RAICES
+    with medir("intersecciones.numerico"):
+        return buscar_raices(fn, a0, b0, puntos, max_raices if max_raices else MAX_RAICES)
 
 # --------------------------------------------------------------
 # ------------- Calcular las intersecciones -------------------
 # --------------------------------------------------------------
-def calcularIntersecciones(expresion_simbolica):
+def calcularIntersecciones(expresion_simbolica, limite=None):
+    xi, y0, _ = _calcularIntersecciones(expresion_simbolica, limite)
+    return xi, y0
+
+def _calcularIntersecciones(expresion_simbolica, limite=None):
+    # Devuelve (xi, y0, exacto); exacto es False si se usó la búsqueda numérica
+    with medir("intersecciones") as medicion:
+        xi, y0, exacto = _interseccionesPorCaminos(expresion_simbolica, limite)
+        medicion.ruta = "simbólico" if exacto else "numérico"
+    return xi, y0, exacto
+
+def _interseccionesPorCaminos(expresion_simbolica, limite):
     # intersección con eje Y
     try:
         y0_sym = expresion_simbolica.subs(x, 0)
@@ -120,8 +1072,10 @@ def calcularIntersecciones(expresion_simbolica):
 
     # intersección con eje X: preferir solveset en los reales
     xi = []
+    exacto = True
     try:
-        solset = sp.solveset(sp.Eq(expresion_simbolica, 0), x, domain=sp.S.Reals)
+        solset = ejecutar_con_limite(sp.solveset, sp.Eq(expresion_simbolica, 0), x, sp.S.Reals, limite=limite,
+                                     etapa="intersecciones.solveset")
         # Si es un conjunto finito, convertir a float
         if getattr(solset, 'is_FiniteSet', False):
             for s in solset:
@@ -132,21 +1086,82 @@ def calcularIntersecciones(expresion_simbolica):
         else:
             # fallback numérico
             xi = buscar_intersecciones_numericas(expresion_simbolica)
+            exacto = False
+    except AnalisisCancelado:
+        raise
     except Exception:
+        # también cuando se agota el tiempo simbólico
         xi = buscar_intersecciones_numericas(expresion_simbolica)
+        exacto = False
 
-    return [round(r, 5) for r in xi], y0
+    return [round(r, 5) for r in xi], y0, exacto
 
 # --------------------------------------------------------------
 # ------------- Determinar dominio -----------------------------
 # --------------------------------------------------------------
-def determinarDominio(expresion_simbolica):
+def determinarDominio(expresion_simbolica, limite=None):
+    dominio, pasos, _ = _determinarDominio(expresion_simbolica, limite)
+    return dominio, pasos
+
+def _determinarDominio(expresion_simbolica, limite=None):
+    # Devuelve (dominio, pasos, exacto)
+    with medir("dominio") as medicion:
+        try:
+            dominio, pasos = ejecutar_con_limite(_determinarDominioSimbolico, expresion_simbolica, limite=limite,
+                                                 etapa="dominio.simbolico")
+            medicion.ruta = "simbólico"
+            return dominio, pasos, True
+        except TimeoutError:
+            motivo = "El cálculo simbólico superó el tiempo límite."
+        except AnalisisCancelado:
+            raise
+        except Exception:
+            # también si el proceso simbólico murió: mismo respaldo que recorrido e intersecciones
+            motivo = "El cálculo simbólico no pudo completarse."
+        try:
+            with medir("dominio.intervalos"):
+                dominio, pasos = _dominioIntervalos(expresion_simbolica, motivo)
+            medicion.ruta = "intervalos"
+        except IntervaloNoSoportado:
+            medicion.ruta = "numérico"
+            with medir("dominio.muestreado"):
+                dominio, pasos = _dominioMuestreado(expresion_simbolica, motivo)
+        return dominio, pasos, False
+
+def _dominioIntervalos(expresion_simbolica, motivo, rango=(-20, 20)):
+    # Tramos verificados con aritmética de intervalos; fuera de la ventana solo
+    # se acepta una cola si f está definida en toda ella.
+    dominio, observaciones = dominio_intervalos(expresion_simbolica, x, *rango)
+    pasos = [motivo,
+             f"Dominio por aritmética de intervalos en [{rango[0]},{rango[1]}]: cada tramo "
+             f"se verificó definido en toda su extensión."] + observaciones
+    return dominio, "\n".join(f"{i+1}) {p}" for i, p in enumerate(pasos))
+
+def _dominioMuestreado(expresion_simbolica, motivo, rango=(-20, 20), n=4001):
+    # Aproximación numérica: tramos de la malla donde la función es finita.
+    # Si un tramo llega al borde de la ventana se supone que continúa.
+    valores_x = malla(rango[0], rango[1], n)
+    finitos = np.isfinite(compilar_funcion(expresion_simbolica)(valores_x))
+    bordes = np.flatnonzero(np.diff(np.concatenate(([0], finitos.astype(np.int8), [0]))))
+    tramos = []
+    for inicio, fin in zip(bordes[::2], bordes[1::2] - 1):
+        a = -sp.oo if inicio == 0 else sp.Float(round(valores_x[inicio], 2))
+        b = sp.oo if fin == n - 1 else sp.Float(round(valores_x[fin], 2))
+        tramos.append(sp.Interval(a, b))
+    dominio = sp.Union(*tramos) if tramos else sp.S.EmptySet
+    pasos = (f"1) {motivo}\n"
+             f"2) Dominio aproximado: puntos de [{rango[0]},{rango[1]}] donde f(x) toma valores reales.")
+    return dominio, pasos
+
+def _determinarDominioSimbolico(expresion_simbolica):
     pasos = []
     dominio = sp.S.Reals
 
     # 1) discontinuidades / singularidades
+    sing = None
     try:
-        sing = sp.calculus.util.singularities(expresion_simbolica, x)
+        with medir("dominio.singularidades"):
+            sing = sp.calculus.util.singularities(expresion_simbolica, x)
         if sing:
             pasos.append(f"Excluir {sing} por ser puntos de discontinuidad.")
             dominio = sp.Complement(dominio, sing)
@@ -157,7 +1172,8 @@ def determinarDominio(expresion_simbolica):
     den = sp.denom(expresion_simbolica)
     if den != 1:
         try:
-            ceros = sp.solveset(sp.Eq(den, 0), x, domain=sp.S.Reals)
+            with medir("dominio.denominador"):
+                ceros = sp.solveset(sp.Eq(den, 0), x, domain=sp.S.Reals)
             pasos.append(f"Excluir {ceros} porque anulan el denominador {den}.")
             dominio = sp.Complement(dominio, ceros)
         except Exception:
@@ -169,7 +1185,8 @@ def determinarDominio(expresion_simbolica):
         if exp.is_Rational and exp.q % 2 == 0:
             pasos.append(f"Se exige {base} ≥ 0 por exponente {exp}.")
             try:
-                sol = sp.solve_univariate_inequality(base >= 0, x)
+                with medir("dominio.desigualdades"):
+                    sol = sp.solve_univariate_inequality(base >= 0, x, relational=False)
                 dominio = sp.Intersection(dominio, sol)
             except Exception:
                 pass
@@ -179,15 +1196,37 @@ def determinarDominio(expresion_simbolica):
             arg = s.args[0]
             pasos.append(f"Se pide {arg} > 0 por log({arg}).")
             try:
-                sol = sp.solve_univariate_inequality(arg > 0, x)
+                with medir("dominio.desigualdades"):
+                    sol = sp.solve_univariate_inequality(arg > 0, x, relational=False)
                 dominio = sp.Intersection(dominio, sol)
             except Exception:
                 pass
+        if isinstance(s, (sp.asin, sp.acos)):
+            arg = s.args[0]
+            pasos.append(f"Se pide -1 ≤ {arg} ≤ 1 por {s.func.__name__}({arg}).")
+            try:
+                with medir("dominio.desigualdades"):
+                    sol = sp.Intersection(sp.solve_univariate_inequality(arg >= -1, x, relational=False),
+                                          sp.solve_univariate_inequality(arg <= 1, x, relational=False))
+                dominio = sp.Intersection(dominio, sol)
+            except Exception:
+                pass
+        if isinstance(s, sp.tan) and (sing is None or sing.has(sp.ConditionSet)):
+            # singularities no resolvió los polos de la tangente (p. ej. tan(x^2))
+            arg = s.args[0]
+            try:
+                with medir("dominio.denominador"):
+                    polos = sp.solveset(sp.cos(arg), x, domain=sp.S.Reals)
+                pasos.append(f"Excluir {polos} porque anulan cos({arg}) en tan({arg}).")
+                dominio = sp.Complement(dominio, polos)
+            except Exception:
+                pasos.append(f"No se pudieron resolver los polos de tan({arg}) exactamente.")
         if s.func == sp.sqrt:
             arg = s.args[0]
             pasos.append(f"Se pide {arg} ≥ 0 por sqrt({arg}).")
             try:
-                sol = sp.solve_univariate_inequality(arg >= 0, x)
+                with medir("dominio.desigualdades"):
+                    sol = sp.solve_univariate_inequality(arg >= 0, x, relational=False)
                 dominio = sp.Intersection(dominio, sol)
             except Exception:
                 pass
@@ -200,18 +1239,588 @@ def determinarDominio(expresion_simbolica):
 # ------------- Evaluación paso a paso -------------------------
 # --------------------------------------------------------------
 def evaluar_en_punto(expresion_simbolica, valor):
+    valor = sp.sympify(valor)
+    # en línea y sin límite, como siempre; la simplificación queda guardada para ese valor
+    simplificado, = _simplificar_en(expresion_simbolica, [valor], limite=0)
+    return _pasos_en_punto(expresion_simbolica, valor, simplificado)
+
+def _pasos_en_punto(expresion_simbolica, valor, simplificado):
+    # Devuelve (f(valor) como float, texto del paso a paso); simplificado None = no se pudo a tiempo
     pasos = []
     pasos.append(f"1) Función: f(x) = {sp.pretty(expresion_simbolica)}")
-    pasos.append(f"2) Sustituimos x = {valor}: {sp.pretty(expresion_simbolica.subs(x, valor))}")
+    sustituida = expresion_simbolica.subs(x, valor)
+    pasos.append(f"2) Sustituimos x = {valor}: {sp.pretty(sustituida)}")
     try:
-        resultado_simpl = sp.simplify(expresion_simbolica.subs(x, valor))
-        resultado_num = float(sp.N(resultado_simpl))
-        pasos.append(f"3) Simplificando: {sp.pretty(resultado_simpl)}")
+        if simplificado is None:
+            pasos.append("3) Simplificando: no terminó a tiempo, se evalúa sin simplificar")
+            simplificado = sustituida
+        else:
+            pasos.append(f"3) Simplificando: {sp.pretty(simplificado)}")
+        resultado_num = float(sp.N(simplificado))
         pasos.append(f"4) Evaluación numérica: f({valor}) ≈ {resultado_num}")
     except Exception as e:
         pasos.append(f"No se pudo evaluar numéricamente: {e}")
         resultado_num = float('nan')
     return resultado_num, "\n".join(pasos)
 
+# --------------------------------------------------------------
+# ------------- Evaluación por lotes ---------------------------
+# --------------------------------------------------------------
+MAX_VALORES_EVALUAR = 10000  # valores por pedido, contando los de los rangos
+MAX_PASOS_EVALUAR = 20  # valores con paso a paso simbólico por pedido
+MAX_REINTENTOS_EXACTOS = 50  # NaN numéricos dentro del dominio que se recalculan con SymPy
+MAX_SIMPLIFICADOS = 1024
+
+_simplificados = OrderedDict()  # (expresión, valor) -> f(valor) simplificada
+_lock_simplificados = threading.Lock()
+
+def leer_valores(texto):
+    # Valores separados por ";" o espacios; rangos "desde:hasta:paso" (paso 1 si se omite).
+    # La coma es decimal, como en la función. Devuelve números de SymPy, exactos si el
+    # texto lo es ("0,1" -> 1/10, "pi/4"), para que el paso a paso no arrastre redondeos.
+    valores = []
+    for parte in re.split(r"[;\s]+", texto.strip()):
+        if not parte:
+            continue
+        numeros = [_leer_numero(extremo) for extremo in parte.split(":")]
+        if len(numeros) == 1:
+            nuevos = numeros
+        elif len(numeros) in (2, 3):
+            desde, hasta = numeros[0], numeros[1]
+            paso = numeros[2] if len(numeros) == 3 else sp.Integer(1)
+            if not paso > 0:
+                raise ValueError(f"El paso del rango {parte} debe ser positivo.")
+            cantidad = math.floor(float((hasta - desde) / paso) + 1e-9) + 1
+            if cantidad <= 0:
+                raise ValueError(f"El rango {parte} está vacío (desde es mayor que hasta).")
+            if len(valores) + cantidad > MAX_VALORES_EVALUAR:
+                raise ValueError(f"Se pueden evaluar hasta {MAX_VALORES_EVALUAR} valores a la vez.")
+            nuevos = [desde + k * paso for k in range(cantidad)]
+        else:
+            raise ValueError(f"Rango inválido: {parte} (se espera desde:hasta:paso).")
+        valores.extend(nuevos)
+        if len(valores) > MAX_VALORES_EVALUAR:
+            raise ValueError(f"Se pueden evaluar hasta {MAX_VALORES_EVALUAR} valores a la vez.")
+    if not valores:
+        raise ValueError("No hay valores para evaluar.")
+    return valores
+
+def _leer_numero(texto):
+    try:
+        valor = sp.Rational(texto.replace(',', '.'))
+    except (TypeError, ValueError, ZeroDivisionError):
+        try:
+            valor = convertir_expresion_cacheada(texto)
+        except ValueError:
+            valor = None
+    if valor is None or valor.free_symbols or not valor.is_real:
+        raise ValueError(f"'{texto}' no es un número real.")
+    # 10^400 es exacto pero no entra en un float: se vería como inf
+    if not math.isfinite(float(valor)):
+        raise ValueError(f"'{texto}' es demasiado grande para evaluar.")
+    return valor
+
+def pertenece(conjunto, valores_x):
+    # Máscara de los valores que están en el conjunto (el dominio calculado), sin
+    # recorrerlos uno a uno con SymPy en los casos que produce _determinarDominio
+    xs = np.asarray(valores_x, dtype=float)
+    if conjunto == sp.S.Reals:
+        return np.ones(xs.shape, dtype=bool)
+    if conjunto == sp.S.EmptySet:
+        return np.zeros(xs.shape, dtype=bool)
+    if isinstance(conjunto, sp.Interval):
+        desde, hasta = float(conjunto.start), float(conjunto.end)
+        mascara = (xs > desde) if conjunto.left_open else (xs >= desde)
+        return mascara & ((xs < hasta) if conjunto.right_open else (xs <= hasta))
+    if isinstance(conjunto, sp.Union):
+        return np.logical_or.reduce([pertenece(parte, xs) for parte in conjunto.args])
+    if isinstance(conjunto, sp.Intersection):
+        return np.logical_and.reduce([pertenece(parte, xs) for parte in conjunto.args])
+    if isinstance(conjunto, sp.Complement):
+        return pertenece(conjunto.args[0], xs) & ~pertenece(conjunto.args[1], xs)
+    if isinstance(conjunto, sp.FiniteSet):
+        puntos = [float(p) for p in conjunto if p.is_real]
+        return np.isclose(xs[..., None], puntos, rtol=1e-12, atol=1e-12).any(axis=-1) if puntos else np.zeros(xs.shape, dtype=bool)
+    if isinstance(conjunto, sp.ImageSet) and conjunto.base_sets == (sp.S.Integers,):
+        # {a*n + b : n entero}, como los polos de tan
+        n, = conjunto.lamda.variables
+        cuerpo = conjunto.lamda.expr
+        a, b = cuerpo.diff(n), cuerpo.subs(n, 0)
+        if cuerpo.is_polynomial(n) and not a.has(n) and a != 0:
+            k = (xs - float(b)) / float(a)
+            return np.abs(k - np.round(k)) < 1e-9 * np.maximum(1, np.abs(k))
+    # Conjunto sin forma cerrada (ConditionSet, ...): se pregunta valor por valor y,
+    # si SymPy no sabe, se da por adentro y decide la evaluación numérica
+    mascara = np.ones(xs.shape, dtype=bool)
+    for i, valor in enumerate(xs.flat):
+        try:
+            mascara.flat[i] = conjunto.contains(sp.Float(valor)) != sp.false
+        except Exception:
+            pass
+    return mascara
+
+def forma_cerrada(conjunto):
+    # True si pertenece() resuelve el conjunto con máscaras de numpy, sin recurrir
+    # a SymPy valor por valor
+    if conjunto in (sp.S.Reals, sp.S.EmptySet) or isinstance(conjunto, (sp.Interval, sp.FiniteSet)):
+        return True
+    if isinstance(conjunto, (sp.Union, sp.Intersection, sp.Complement)):
+        return all(forma_cerrada(parte) for parte in conjunto.args)
+    if isinstance(conjunto, sp.ImageSet) and conjunto.base_sets == (sp.S.Integers,):
+        n, = conjunto.lamda.variables
+        cuerpo = conjunto.lamda.expr
+        a = cuerpo.diff(n)
+        return bool(cuerpo.is_polynomial(n) and not a.has(n) and a != 0)
+    return False
+
+def _simplificar_valores(expresion_simbolica, valores):
+    return [sp.simplify(expresion_simbolica.subs(x, valor)) for valor in valores]
+
+def _simplificar_en(expresion_simbolica, valores, limite=None):
+    # f(valor) simplificada para cada valor; None si no terminó a tiempo. Los que falten
+    # se simplifican juntos en un solo proceso con límite y quedan guardados por valor.
+    with _lock_simplificados:
+        hechos = {v: _simplificados[(expresion_simbolica, v)] for v in valores if (expresion_simbolica, v) in _simplificados}
+    faltan = [v for v in dict.fromkeys(valores) if v not in hechos]
+    if faltan:
+        try:
+            nuevos = ejecutar_con_limite(_simplificar_valores, expresion_simbolica, faltan,
+                                         limite=limite, etapa="evaluacion.simplificar")
+        except (TimeoutError, RuntimeError):
+            nuevos = [None] * len(faltan)
+        with _lock_simplificados:
+            for valor, simplificado in zip(faltan, nuevos):
+                hechos[valor] = simplificado
+                if simplificado is not None:  # lo que no terminó se reintenta la próxima vez
+                    _simplificados[(expresion_simbolica, valor)] = simplificado
+            while len(_simplificados) > MAX_SIMPLIFICADOS:
+                _simplificados.popitem(last=False)
+    return [hechos[v] for v in valores]
+
+def evaluar_lote(expresion_simbolica, valores, dominio=None, con_pasos=False, fn=None):
+    # Evalúa f en todos los valores de una pasada con el núcleo compilado.
+    # Devuelve (xs, ys, dentro, pasos): dentro marca los valores del dominio (todos si no
+    # se da); pasos es None, o el texto paso a paso de los primeros MAX_PASOS_EVALUAR.
+    fn = fn or compilar_funcion(expresion_simbolica)
+    xs = np.array([float(v) for v in valores], dtype=float)
+    with medir("evaluacion.lote"):
+        ys = fn(xs)
+        dentro = np.ones(xs.shape, dtype=bool) if dominio is None else pertenece(dominio, xs)
+    ys[~dentro] = np.nan
+    # NaN dentro del dominio: desborde o cancelación en float64; se reintenta con SymPy
+    with medir("evaluacion.exacta"):
+        for i in np.flatnonzero(dentro & np.isnan(ys))[:MAX_REINTENTOS_EXACTOS]:
+            try:
+                ys[i] = float(sp.N(expresion_simbolica.subs(x, valores[i])))
+            except (TypeError, ValueError):
+                pass
+    pasos = None
+    if con_pasos:
+        primeros = list(valores[:MAX_PASOS_EVALUAR])
+        simplificados = _simplificar_en(expresion_simbolica, primeros)
+        pasos = [_pasos_en_punto(expresion_simbolica, v, s)[1]
+                 + ("" if adentro else f"\nx = {v} no está en el dominio: f({v}) no existe")
+                 for v, s, adentro in zip(primeros, simplificados, dentro)]
+    return xs, ys, dentro, pasos
+
+def tabla_evaluacion(xs, ys, dentro, pasos=None, max_filas=1000):
+    # Tabla de texto (columnas alineadas) para la interfaz
+    lineas = [f"{'x':>14}  {'f(x)':>16}  estado", "-" * 48]
+    for valor_x, valor_y, adentro in list(zip(xs, ys, dentro))[:max_filas]:
+        if not adentro:
+            lineas.append(f"{valor_x:>14.6g}  {'—':>16}  fuera del dominio")
+        elif np.isnan(valor_y):
+            lineas.append(f"{valor_x:>14.6g}  {'—':>16}  sin valor real")
+        else:
+            lineas.append(f"{valor_x:>14.6g}  {valor_y:>16.10g}")
+    if len(xs) > max_filas:
+        lineas.append(f"... y {len(xs) - max_filas} valores más")
+    fuera = int(np.count_nonzero(~np.asarray(dentro)))
+    lineas.append(f"\n{len(xs)} valores, {fuera} fuera del dominio")
+    for i, texto in enumerate(pasos or []):
+        lineas.append(f"\nPaso a paso para x = {xs[i]:.6g}:\n{texto}")
+    return "\n".join(lineas)
+
+# --------------------------------------------------------------
+# ------------- Resultado de análisis memoizado ----------------
+# --------------------------------------------------------------
+_NUMERO_FLOAT = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+
+def _conjunto_desde_srepr(texto):
+    # El texto viene de la caché en disco: se reconstruye nodo a nodo desde su
+    # árbol de Python, sin eval (sympify además tarda segundos en textos largos).
+    return _nodo_srepr(ast.parse(texto, mode="eval").body)
+
+def _nodo_srepr(nodo):
+    # Solo clases y constantes de SymPy aplicadas a enteros, tuplas y otros nodos;
+    # texto únicamente como nombre de Symbol / Dummy o número de Float
+    if isinstance(nodo, ast.Constant) and type(nodo.value) in (int, bool):
+        return nodo.value
+    if isinstance(nodo, ast.UnaryOp) and isinstance(nodo.op, ast.USub):  # -1, -oo
+        return -_nodo_srepr(nodo.operand)
+    if isinstance(nodo, ast.Tuple):
+        return tuple(_nodo_srepr(n) for n in nodo.elts)
+    if isinstance(nodo, ast.Name):
+        valor = getattr(sp, nodo.id, None)
+        if isinstance(valor, sp.Basic):  # pi, oo, true, Integers, EmptySet...
+            return valor
+    if isinstance(nodo, ast.Call) and isinstance(nodo.func, ast.Name):
+        clase = getattr(sp, nodo.func.id, None)
+        if isinstance(clase, type) and issubclass(clase, sp.Basic):
+            args = list(nodo.args)
+            nombre = []
+            if clase in (sp.Symbol, sp.Dummy, sp.Float) and args and isinstance(args[0], ast.Constant) \
+                    and isinstance(args[0].value, str):
+                if clase is sp.Float and not _NUMERO_FLOAT.fullmatch(args[0].value):
+                    raise ValueError(f"Float inválido en la caché: {args[0].value!r}")
+                nombre = [args.pop(0).value]
+            if not nodo.keywords or clase in (sp.Symbol, sp.Dummy, sp.Float):
+                argumentos = nombre + [_nodo_srepr(n) for n in args]
+                opciones = {k.arg: _nodo_srepr(k.value) for k in nodo.keywords}
+                if any(not isinstance(v, (int, bool)) for v in opciones.values()):
+                    raise ValueError("Opción no literal en la caché")
+                # Union sin evaluar: sus tramos ya vienen simplificados y
+                # re-simplificar cientos de ellos tarda minutos
+                if clase is sp.Union:
+                    opciones["evaluate"] = False
+                return clase(*argumentos, **opciones)
+    raise ValueError(f"Nodo no permitido en la caché: {ast.dump(nodo)[:80]}")
+
+class etapa_memoizada:
+    # Como functools.cached_property, con un lock por instancia y atributo: el de
+    # cached_property (Python < 3.12) es uno por clase y serializaría las etapas de
+    # funciones distintas que se analizan a la vez (Comparacion)
+    def __init__(self, funcion):
+        self.funcion = funcion
+        self.nombre = funcion.__name__
+
+    def __set_name__(self, clase, nombre):
+        self.nombre = nombre
+
+    def __get__(self, instancia, clase=None):
+        if instancia is None:
+            return self
+        datos = instancia.__dict__
+        with datos.setdefault("_lock_" + self.nombre, threading.RLock()):
+            if self.nombre not in datos:
+                datos[self.nombre] = self.funcion(instancia)
+        return datos[self.nombre]
+
+class ResultadoAnalisis:
+    # Reúne todo lo que se calcula para una expresión. Cada etapa se calcula la
+    # primera vez que alguien la pide y queda guardada para los demás consumidores.
+    def __init__(self, expresion_simbolica, limite=None, traza=None, persistente=True):
+        self.expresion = expresion_simbolica
+        self.clave = sp.srepr(expresion_simbolica)
+        self.limite = limite
+        self.persistente = persistente  # usar la caché en disco (cache_disco)
+        self.traza = traza if traza is not None else Traza()  # tiempos y caminos de cada etapa
+        self.aproximado = set()  # etapas resueltas con el camino numérico
+        self._muestras = {}
+        self._teselas = OrderedDict()  # LRU de muestras y raíces por tesela (pan/zoom)
+        self._lock_muestras = threading.RLock()  # las piden el análisis y el hilo de la gráfica
+
+    _atributos_etapa = {"dominio": "_dominio", "recorrido": "recorrido",
+                        "intersecciones": "_intersecciones", "monotonia": "monotonia"}
+
+    def calculado(self, etapa):
+        # True si la etapa ya se calculó (consultarla no bloquea)
+        if etapa == "muestra":
+            return bool(self._muestras)
+        return self._atributos_etapa[etapa] in self.__dict__
+
+    @etapa_memoizada
+    def funcion_numerica(self):
+        with trazando(self.traza), medir("compilacion") as medicion:
+            fn = compilar_funcion(self.expresion)
+            medicion.ruta = fn.backend
+            return fn
+
+    def _limite_efectivo(self):
+        # Segundos que tuvo cada etapa simbólica; None = sin límite
+        limite = LIMITE_SIMBOLICO if self.limite is None else self.limite
+        return limite or None
+
+    def _etapa_persistente(self, etapa, calcular, a_json, de_json):
+        # Etapa respaldada por la caché en disco: se busca antes de calcular y se
+        # guarda después. calcular() devuelve (valor, exacto).
+        cache = cache_compartida(VERSION_ANALISIS) if self.persistente else None
+        limite = self._limite_efectivo()
+        if cache is not None:
+            with trazando(self.traza), medir(etapa + ".cache") as medicion:
+                guardado = cache.leer(self.clave, etapa, limite)
+                medicion.ruta = "acierto" if guardado else "fallo"
+            if guardado is not None:
+                try:
+                    valor, exacto = de_json(guardado[0]), guardado[1]
+                    if not exacto:
+                        self.aproximado.add(etapa)
+                    return valor
+                except Exception:
+                    pass  # fila ilegible: se recalcula y se reemplaza
+        with trazando(self.traza):
+            valor, exacto = calcular()
+        if not exacto:
+            self.aproximado.add(etapa)
+        if cache is not None:
+            cache.guardar(self.clave, etapa, a_json(valor), exacto, limite)
+        return valor
+
+    @etapa_memoizada
+    def _dominio(self):
+        def calcular():
+            dominio, pasos, exacto = _determinarDominio(self.expresion, self.limite)
+            return (dominio, pasos), exacto
+        return self._etapa_persistente(
+            "dominio", calcular,
+            lambda valor: {"dominio": sp.srepr(valor[0]), "pasos": valor[1]},
+            lambda datos: (_conjunto_desde_srepr(datos["dominio"]), datos["pasos"]))
+
+    @property
+    def dominio(self):
+        return self._dominio[0]
+
+    @property
+    def pasos_dominio(self):
+        return self._dominio[1]
+
+    @etapa_memoizada
+    def recorrido(self):
+        # Si function_range no resuelve, se usa la etapa de monotonía (la misma que se muestra)
+        return self._etapa_persistente(
+            "recorrido", lambda: _calcularRecorrido(self.expresion, limite=self.limite,
+                                                    extremos=lambda: self.monotonia),
+            lambda texto: texto, lambda texto: texto)
+
+    @etapa_memoizada
+    def monotonia(self):
+        # f', f'', tramos de crecimiento, extremos, inflexiones y recorrido por extremos
+        # (ver _calcularMonotonia); necesita el dominio
+        dominio = self.dominio
+        return self._etapa_persistente(
+            "monotonia", lambda: _calcularMonotonia(self.expresion, dominio, self.limite),
+            lambda datos: datos, lambda datos: datos)
+
+    @etapa_memoizada
+    def _intersecciones(self):
+        def calcular():
+            xi, y0, exacto = _calcularIntersecciones(self.expresion, self.limite)
+            return (xi, y0), exacto
+        return self._etapa_persistente(
+            "intersecciones", calcular,
+            lambda valor: {"xi": valor[0], "y0": valor[1]},
+            lambda datos: (datos["xi"], float(datos["y0"])))
+
+    @property
+    def xi(self):
+        return self._intersecciones[0]
+
+    @property
+    def y0(self):
+        return self._intersecciones[1]
+
+    def evaluar(self, valores, con_pasos=False):
+        # Tabla de f en muchos valores con el núcleo ya compilado y el dominio de este
+        # análisis (lo calcula si todavía no está)
+        dominio = self.dominio
+        fn = self.funcion_numerica
+        with trazando(self.traza):
+            return evaluar_lote(self.expresion, valores, dominio, con_pasos, fn)
+
+    def muestrear(self, a=-10, b=10):
+        # Muestra adaptativa para graficar. Si el dominio ya se conoce se usan sus
+        # puntos singulares como cortes; si no, solo la detección numérica de saltos.
+        con_dominio = self.calculado("dominio")
+        clave = (a, b, con_dominio)
+        with self._lock_muestras:
+            if clave not in self._muestras:
+                singularidades = puntos_singulares(self.dominio, a, b) if con_dominio else ()
+                fn = self.funcion_numerica
+                with trazando(self.traza), medir("muestra"):
+                    self._muestras[clave] = muestreo_adaptativo(fn, a, b, singularidades)
+            return self._muestras[clave]
+
+    @property
+    def muestra(self):
+        return self.muestrear(-10, 10)
+
+    def _tesela(self, tipo, lado, k):
+        with self._lock_muestras:
+            con_dominio = self.calculado("dominio")
+            clave = (tipo, lado, k, con_dominio)
+            if clave in self._teselas:
+                self._teselas.move_to_end(clave)
+                return self._teselas[clave]
+            a, b = k * lado, (k + 1) * lado
+            fn = self.funcion_numerica
+            with trazando(self.traza), medir("tesela." + tipo):
+                if tipo == "muestra":
+                    singularidades = puntos_singulares(self.dominio, a, b) if con_dominio else ()
+                    valor = muestreo_adaptativo(fn, a, b, singularidades, PRESUPUESTO_PUNTOS // _TESELAS_POR_VISTA)
+                else:
+                    valor = buscar_raices(fn, a, b, puntos=501)
+            self._teselas[clave] = valor
+            while len(self._teselas) > MAX_TESELAS:
+                self._teselas.popitem(last=False)
+            return valor
+
+    def muestrear_vista(self, a, b):
+        # Muestra de la región visible armada con teselas (cacheadas) de su nivel de zoom
+        lado, indices = teselas(a, b)
+        partes = [self._tesela("muestra", lado, k) for k in indices]
+        # teselas vecinas comparten el extremo: se omite el primer punto de cada una
+        xs = np.concatenate([partes[0][0]] + [p[0][1:] for p in partes[1:]])
+        ys = np.concatenate([partes[0][1]] + [p[1][1:] for p in partes[1:]])
+        return xs, ys
+
+    def raices_vista(self, a, b):
+        # Raíces visibles: las exactas si el análisis simbólico las dio, si no por teselas
+        if self.calculado("intersecciones") and "intersecciones" not in self.aproximado:
+            return [r for r in self.xi if a <= r <= b]
+        lado, indices = teselas(a, b)
+        raices = sorted(r for k in indices for r in self._tesela("raices", lado, k) if a <= r <= b)
+        return [r for i, r in enumerate(raices) if i == 0 or r - raices[i - 1] > 1e-6]
+
+class CacheAnalisis:
+    # LRU acotado de ResultadoAnalisis, indexado por la forma canónica (srepr)
+    def __init__(self, capacidad=64):
+        self.capacidad = capacidad
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, expresion_simbolica):
+        clave = sp.srepr(expresion_simbolica)
+        with self._lock:
+            resultado = self._datos.get(clave)
+            if resultado is not None:
+                self.aciertos += 1
+                self._datos.move_to_end(clave)
+                return resultado
+            self.fallos += 1
+            resultado = ResultadoAnalisis(expresion_simbolica)
+            self._datos[clave] = resultado
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+            return resultado
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def info(self):
+        with self._lock:
+            return {"aciertos": self.aciertos, "fallos": self.fallos,
+                    "tamano": len(self._datos), "capacidad": self.capacidad}
+
+cache_analisis = CacheAnalisis()
+
+def analizar(expresion_simbolica):
+    return cache_analisis.obtener(expresion_simbolica)
+
+# --------------------------------------------------------------
+# ------------- Varias funciones a la vez ----------------------
+# --------------------------------------------------------------
+MAX_FUNCIONES = 6
+MAX_VISTAS_COMPARACION = 32  # muestras y cruces guardados por comparación (pan/zoom)
+
+class Comparacion:
+    # Varias funciones graficadas y analizadas juntas. Cada una conserva su
+    # ResultadoAnalisis (de la caché, compartido con el modo de una función); la
+    # comparación agrega la malla común y los cruces f(x) = g(x) de cada par.
+    def __init__(self, expresiones):
+        self.resultados = [analizar(expresion) for expresion in expresiones]
+        self.traza = Traza()
+        self._vistas = OrderedDict()  # (tipo, a, b, dominios listos) -> muestra o cruces
+        self._lock = threading.Lock()
+
+    @property
+    def expresiones(self):
+        return [resultado.expresion for resultado in self.resultados]
+
+    def _clave(self, tipo, a, b):
+        # la muestra se rehace cuando llega algún dominio (cortes en sus singularidades)
+        con_dominio = tuple(resultado.calculado("dominio") for resultado in self.resultados)
+        return (tipo, a, b, con_dominio if tipo == "muestra" else ())
+
+    def calculado(self, tipo, a=-10, b=10):
+        # True si la muestra o los cruces de [a, b] ya están (consultarlo no calcula nada)
+        return self._clave(tipo, a, b) in self._vistas
+
+    def _vista(self, tipo, a, b, calcular):
+        clave = self._clave(tipo, a, b)
+        con_dominio = clave[3]
+        with self._lock:
+            if clave in self._vistas:
+                self._vistas.move_to_end(clave)
+                return self._vistas[clave]
+        valor = calcular(con_dominio)
+        with self._lock:
+            self._vistas[clave] = valor
+            while len(self._vistas) > MAX_VISTAS_COMPARACION:
+                self._vistas.popitem(last=False)
+        return valor
+
+    def muestrear(self, a=-10, b=10):
+        # (xs, ys) con ys de forma (funciones, puntos): todas sobre la misma malla
+        def calcular(con_dominio):
+            fns = [resultado.funcion_numerica for resultado in self.resultados]
+            singularidades = [puntos_singulares(resultado.dominio, a, b) if listo else ()
+                              for resultado, listo in zip(self.resultados, con_dominio)]
+            with trazando(self.traza), medir("muestra"):
+                return muestreo_conjunto(fns, a, b, singularidades)
+        return self._vista("muestra", a, b, calcular)
+
+    @property
+    def muestra(self):
+        return self.muestrear(-10, 10)
+
+    def cruces(self, a=-10, b=10):
+        # [(i, j, [(x, y), ...])] para cada par i < j: raíces de f_i - f_j con el
+        # buscador vectorizado (los NaN de fuera del dominio de cualquiera no cruzan)
+        def calcular(con_dominio):
+            fns = [resultado.funcion_numerica for resultado in self.resultados]
+            pares = []
+            with trazando(self.traza), medir("cruces"):
+                for i in range(len(fns)):
+                    for j in range(i + 1, len(fns)):
+                        diferencia = lambda v, f=fns[i], g=fns[j]: f(v) - g(v)
+                        xs = buscar_raices(diferencia, a, b)
+                        pares.append((i, j, [(r, float(fns[i](r))) for r in xs]))
+            return pares
+        return self._vista("cruces", a, b, calcular)
+
+    def calcular(self, avisar=None, cancelar=None):
+        # Análisis simbólico de todas las funciones a la vez, un hilo por función: las
+        # etapas con límite corren en procesos aparte, así que avanzan en paralelo.
+        # avisar(indice, etapa) se llama desde el hilo de cada función al terminar una etapa.
+        def analizarUna(indice, resultado):
+            fijar_cancelacion(cancelar)
+            try:
+                for etapa, atributo in (("dominio", "dominio"), ("recorrido", "recorrido"),
+                                        ("intersecciones", "xi")):
+                    if cancelar is not None and cancelar.is_set():
+                        raise AnalisisCancelado()
+                    getattr(resultado, atributo)
+                    if avisar is not None:
+                        avisar(indice, etapa)
+            finally:
+                fijar_cancelacion(None)
 
+        with ThreadPoolExecutor(max_workers=len(self.resultados)) as ejecutor:
+            tareas = [ejecutor.submit(analizarUna, i, r) for i, r in enumerate(self.resultados)]
+            for tarea in tareas:
+                tarea.result()  # propaga el primer error (o AnalisisCancelado)
 
+def perfilarAnalisis(expresion_simbolica, orden="cumulative", lineas=30):
+    # Análisis completo bajo cProfile, fuera de la caché y con las etapas simbólicas
+    # en línea (sin proceso aparte, sin límite) para que el perfil las vea.
+    # Devuelve (resultado, informe de texto).
+    resultado = ResultadoAnalisis(expresion_simbolica, limite=0, persistente=False)
+    def completo():
+        resultado.dominio, resultado.recorrido, resultado.xi, resultado.muestra
+        return resultado
+    return perfilar(completo, orden=orden, lineas=lineas)
@@ -0,0 +1,303 @@
+import argparse
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import sympy as sp
+import analisis
+import kernels
+from analisis import (calcularIntersecciones, calcularMonotonia, calcularRecorrido, convertir_expresion,
+                      determinarDominio, evaluar_en_punto, x)
+from intervalos import dominio_intervalos
+
+# Benchmark y corpus de regresion de las funciones de analisis (sin interfaz grafica).
+# Uso: python benchmark.py -o reporte.json [--comparar base.json]
+
+# --------------------------------------------------------------
+# ------------- Corpus con respuestas conocidas ----------------
+# --------------------------------------------------------------
+# Cada caso: (categoria, funcion, esperado). Claves de esperado (None = no se verifica):
+#   dominio: conjunto de SymPy en texto     recorrido: conjunto exacto en texto (como lo da function_range)
+#   xi: raices reales (en [-10,10] si son infinitas)     y0: f(0) (nan si no existe)
+#   evaluar: (x, f(x))     dominio_intervalos: dominio certificado por intervalos (bordes exactos incluidos)
+#   inflexion: abscisas de los puntos de inflexion en INTERVALO_MONOTONIA (los polos no cuentan)
+#   tramos: [desde, hasta, signo de f'] de la monotonia
+CORPUS = [
+    ("polinomios", "x^2-4", {"dominio": "Reals", "recorrido": "Interval(-4, oo)", "xi": [-2, 2], "y0": -4, "evaluar": (3, 5)}),
+    ("polinomios", "x^3-x", {"dominio": "Reals", "recorrido": "Interval(-oo, oo)", "xi": [-1, 0, 1], "y0": 0, "evaluar": (2, 6)}),
+    ("polinomios", "2x+1", {"dominio": "Reals", "recorrido": "Interval(-oo, oo)", "xi": [-0.5], "y0": 1, "evaluar": (1, 3)}),
+    ("polinomios", "x^4-2x^2+1", {"dominio": "Reals", "recorrido": "Interval(0, oo)", "xi": [-1, 1], "y0": 1, "evaluar": (2, 9)}),
+    ("constantes", "5", {"dominio": "Reals", "recorrido": "FiniteSet(5)", "xi": [], "y0": 5,
+                          "tramos": [[-math.inf, math.inf, 0]]}),
+    ("constantes", "sqrt(x^2)*0+2", {"dominio": "Reals", "xi": [], "y0": 2, "tramos": [[-math.inf, math.inf, 0]]}),
+    ("racionales", "1/x", {"dominio": "Union(Interval.open(-oo, 0), Interval.open(0, oo))",
+                           "recorrido": "Union(Interval.open(-oo, 0), Interval.open(0, oo))", "xi": [], "y0": math.nan, "evaluar": (2, 0.5)}),
+    ("racionales", "(x^2-1)/(x-2)", {"dominio": "Union(Interval.open(-oo, 2), Interval.open(2, oo))", "xi": [-1, 1], "y0": 0.5, "evaluar": (3, 8)}),
+    ("racionales", "1/(x^2+1)", {"dominio": "Reals", "recorrido": "Interval.Lopen(0, 1)", "xi": [], "y0": 1, "evaluar": (1, 0.5)}),
+    ("radicales", "sqrt(x-1)", {"dominio": "Interval(1, oo)", "recorrido": "Interval(0, oo)", "xi": [1], "y0": math.nan, "evaluar": (5, 2)}),
+    ("radicales", "sqrt(4-x^2)", {"dominio": "Interval(-2, 2)", "recorrido": "Interval(0, 2)", "xi": [-2, 2], "y0": 2, "evaluar": (0, 2)}),
+    ("logaritmos", "log(x)", {"dominio": "Interval.open(0, oo)", "recorrido": "Interval(-oo, oo)", "xi": [1], "y0": math.nan, "evaluar": (1, 0)}),
+    ("logaritmos", "log(x^2-1)", {"dominio": "Union(Interval.open(-oo, -1), Interval.open(1, oo))", "recorrido": "Interval(-oo, oo)",
+                                  "xi": [-math.sqrt(2), math.sqrt(2)], "y0": math.nan}),
+    ("trigonometricas", "sin(x)", {"dominio": "Reals", "recorrido": "Interval(-1, 1)", "xi": [k * math.pi for k in range(-3, 4)],
+                                   "y0": 0, "evaluar": (math.pi / 2, 1)}),
+    ("trigonometricas", "cos(x)+2", {"dominio": "Reals", "recorrido": "Interval(1, 3)", "xi": [], "y0": 3}),
+    ("trigonometricas", "tan(x)", {"recorrido": "Interval(-oo, oo)", "xi": [k * math.pi for k in range(-3, 4)], "y0": 0,
+                                   "inflexion": [k * math.pi for k in range(-3, 4)]}),
+    ("trigonometricas", "asin(x)", {"dominio": "Interval(-1, 1)", "recorrido": "Interval(-pi/2, pi/2)", "xi": [0], "y0": 0}),
+    ("trigonometricas", "acos(x)", {"dominio": "Interval(-1, 1)", "recorrido": "Interval(0, pi)", "xi": [1], "y0": math.pi / 2}),
+    ("trigonometricas", "acos(x/2)", {"dominio": "Interval(-2, 2)", "dominio_intervalos": "Interval(-2, 2)",
+                                      "recorrido": "Interval(0, pi)", "xi": [2], "y0": math.pi / 2}),
+    ("valor_absoluto", "|x|-1", {"dominio": "Reals", "recorrido": "Interval(-1, oo)", "xi": [-1, 1], "y0": -1, "evaluar": (-3, 2)}),
+    ("valor_absoluto", "|x-2|", {"dominio": "Reals", "recorrido": "Interval(0, oo)", "xi": [2], "y0": 2}),
+    ("patologicas", "sin(x)*exp(x) - x^3", {"dominio": "Reals", "xi": [-0.68313, 0, 1.81126, 6.66925, 9.35382], "y0": 0}),
+    ("patologicas", "sin(1/x)", {"dominio": "Union(Interval.open(-oo, 0), Interval.open(0, oo))", "recorrido": "Interval(-1, 1)", "y0": math.nan}),
+    ("patologicas", "exp(-x^2)*cos(20x)", {"dominio": "Reals", "y0": 1, "evaluar": (0, 1)}),
+]
+
+ETAPAS = ("conversion", "dominio", "dominio_intervalos", "monotonia", "recorrido", "intersecciones", "evaluacion", "malla_densa")
+PUNTOS_MALLA_DENSA = 200000  # como un zoom o un barrido de raices fino
+
+# --------------------------------------------------------------
+# ------------- Verificacion de resultados ---------------------
+# --------------------------------------------------------------
+def _mismo_conjunto(obtenido, esperado):
+    if obtenido == esperado:
+        return True
+    try:
+        return (sp.Complement(obtenido, esperado) == sp.S.EmptySet
+                and sp.Complement(esperado, obtenido) == sp.S.EmptySet)
+    except Exception:
+        return False
+
+def _mismo_numero(obtenido, esperado, tol=1e-4):
+    if math.isnan(esperado):
+        return math.isnan(obtenido)
+    return abs(obtenido - esperado) <= tol * max(1.0, abs(esperado))
+
+def _mismo_recorrido(texto, esperado):
+    # Exacto, o envolvente por intervalos ajustada / recorrido por extremos con los mismos
+    # extremos (sin distinguir abierto / cerrado) cuando el recorrido esperado es un intervalo
+    if texto == f"Recorrido exacto: {sp.pretty(esperado)}":
+        return True
+    extremos = re.match(r"Recorrido por (?:intervalos|extremos)[^:]*: [\[(](\S+), (\S+?)[\])]$", texto)
+    if not extremos or not isinstance(esperado, sp.Interval):
+        return False
+    numero = lambda v: float(v.replace("∞", "inf"))
+    return all(math.isinf(o) and o == float(e) or _mismo_numero(o, float(e), 1e-3)
+               for o, e in zip(map(numero, extremos.groups()), (esperado.inf, esperado.sup)))
+
+def verificar(salidas, esperado):
+    # Devuelve {criterio: True/False} solo para los criterios que el caso define
+    precision = {}
+    if esperado.get("dominio") is not None:
+        precision["dominio"] = _mismo_conjunto(salidas["dominio"], sp.sympify(esperado["dominio"]))
+    if esperado.get("dominio_intervalos") is not None:
+        precision["dominio_intervalos"] = _mismo_conjunto(salidas["dominio_intervalos"],
+                                                          sp.sympify(esperado["dominio_intervalos"]))
+    if esperado.get("recorrido") is not None:
+        precision["recorrido"] = _mismo_recorrido(salidas["recorrido"], sp.sympify(esperado["recorrido"]))
+    if esperado.get("xi") is not None:
+        obtenidas, esperadas = sorted(salidas["xi"]), sorted(esperado["xi"])
+        precision["xi"] = len(obtenidas) == len(esperadas) and all(map(_mismo_numero, obtenidas, esperadas))
+    if esperado.get("y0") is not None:
+        precision["y0"] = _mismo_numero(salidas["y0"], esperado["y0"])
+    if esperado.get("inflexion") is not None:
+        puntos = sorted(salidas["monotonia"]["inflexion"])
+        esperadas = sorted(esperado["inflexion"])
+        precision["inflexion"] = len(puntos) == len(esperadas) and all(
+            _mismo_numero(px, e) and math.isfinite(py) for (px, py), e in zip(puntos, esperadas))
+    if esperado.get("tramos") is not None:
+        tramos = salidas["monotonia"]["tramos"]
+        precision["tramos"] = len(tramos) == len(esperado["tramos"]) and all(
+            signo == s and all(math.isinf(o) and o == e or _mismo_numero(o, e) for o, e in ((desde, d), (hasta, h)))
+            for (desde, hasta, signo), (d, h, s) in zip(tramos, esperado["tramos"]))
+    if esperado.get("evaluar") is not None:
+        precision["evaluar"] = _mismo_numero(salidas["evaluacion"], esperado["evaluar"][1])
+    return precision
+
+# --------------------------------------------------------------
+# ------------- Medicion ---------------------------------------
+# --------------------------------------------------------------
+def _etapas_caso(texto, esperado, limite):
+    # Lista de (etapa, funcion sin argumentos, clave de salida); la conversion va primero
+    expresion = convertir_expresion(texto)
+    valor = esperado.get("evaluar", (1, None))[0]
+    malla_densa = analisis.malla(-10, 10, PUNTOS_MALLA_DENSA)
+    etapas = [
+        ("conversion", lambda: convertir_expresion(texto), None),
+        ("dominio", lambda: determinarDominio(expresion, limite)[0], "dominio"),
+        ("monotonia", lambda: calcularMonotonia(expresion, limite=limite), "monotonia"),
+        ("recorrido", lambda: calcularRecorrido(expresion, limite=limite), "recorrido"),
+        ("intersecciones", lambda: calcularIntersecciones(expresion, limite), "xi_y0"),
+        ("evaluacion", lambda: evaluar_en_punto(expresion, valor)[0], "evaluacion"),
+        ("malla_densa", lambda: analisis.compilar_funcion(expresion)(malla_densa), None),
+    ]
+    # El dominio por intervalos solo se mide en los casos que lo verifican
+    if esperado.get("dominio_intervalos") is not None:
+        etapas.insert(2, ("dominio_intervalos", lambda: dominio_intervalos(expresion, x)[0], "dominio_intervalos"))
+    return etapas
+
+def medirCaso(categoria, texto, esperado, repeticiones, limite):
+    caso = {"categoria": categoria, "funcion": texto, "etapas": {}, "precision": {}, "error": None}
+    try:
+        etapas = _etapas_caso(texto, esperado, limite)
+    except Exception as e:
+        caso["error"] = f"{type(e).__name__}: {e}"
+        return caso
+    salidas = {}
+    for etapa, funcion, clave in etapas:
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            salida = funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        # memoria pico en una pasada aparte: tracemalloc distorsiona los tiempos
+        # (no incluye los procesos de las etapas simbolicas con tiempo limite)
+        tracemalloc.start()
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if clave == "xi_y0":
+            salidas["xi"], salidas["y0"] = salida
+        elif clave is not None:
+            salidas[clave] = salida
+        caso["etapas"][etapa] = {"p50_ms": round(float(np.percentile(tiempos, 50)), 3),
+                                 "p95_ms": round(float(np.percentile(tiempos, 95)), 3),
+                                 "memoria_pico_kb": round(pico / 1024, 1)}
+    caso["precision"] = verificar(salidas, esperado)
+    return caso
+
+def ejecutar(repeticiones=3, limite=None, categorias=None):
+    casos = []
+    for categoria, texto, esperado in CORPUS:
+        if categorias and categoria not in categorias:
+            continue
+        caso = medirCaso(categoria, texto, esperado, repeticiones, limite)
+        casos.append(caso)
+        print(f"{categoria:16s} {texto:24s} "
+              + " ".join(f"{etapa}={datos['p50_ms']:.1f}ms" for etapa, datos in caso["etapas"].items())
+              + ("" if all(caso["precision"].values()) else f"  FALLA {sorted(k for k, v in caso['precision'].items() if not v)}"),
+              file=sys.stderr)
+    resumen = {}
+    for etapa in ETAPAS:
+        p50 = [c["etapas"][etapa]["p50_ms"] for c in casos if etapa in c["etapas"]]
+        if p50:
+            resumen[etapa] = {"p50_ms": round(float(np.percentile(p50, 50)), 3),
+                              "p95_ms": round(float(np.percentile(p50, 95)), 3)}
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sympy": sp.__version__,
+        "numpy": np.__version__,
+        "configuracion": {"repeticiones": repeticiones,
+                          "limite_simbolico": analisis.LIMITE_SIMBOLICO if limite is None else limite,
+                          "kernel": kernels.BACKEND},
+        "etapas": resumen,
+        "fallos_precision": sum(1 for c in casos for ok in c["precision"].values() if not ok),
+        "errores": sum(1 for c in casos if c["error"]),
+        "casos": casos,
+    }
+
+# --------------------------------------------------------------
+# ------------- Arranque en frio -------------------------------
+# --------------------------------------------------------------
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+MODULOS_GUI = ("tkinter", "customtkinter", "matplotlib")
+_CODIGO_IMPORT = ("import json, sys, time; t = time.perf_counter(); import {modulo}; "
+                  "print(json.dumps([(time.perf_counter() - t) * 1000, "
+                  "[m for m in {gui!r} if m in sys.modules]]))")
+
+def medirArranque(repeticiones=3):
+    # Cada medicion en un proceso nuevo. import_*_ms: importar el modulo; gui_en_analisis:
+    # modulos de interfaz que arrastra importar analisis (debe quedar vacio).
+    # Con pantalla, ventana_ms / listo_ms salen de main.py --medir-arranque.
+    tiempos = {}
+    gui = []
+    for modulo in ("analisis", "lote", "ui"):
+        for _ in range(repeticiones):
+            salida = subprocess.run([sys.executable, "-c", _CODIGO_IMPORT.format(modulo=modulo, gui=MODULOS_GUI)],
+                                    cwd=CARPETA, capture_output=True, text=True, check=True).stdout
+            ms, cargados = json.loads(salida)
+            tiempos.setdefault(f"import_{modulo}_ms", []).append(ms)
+            if modulo == "analisis":
+                gui = cargados
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        for _ in range(repeticiones):
+            salida = subprocess.run([sys.executable, os.path.join(CARPETA, "main.py"), "--medir-arranque"],
+                                    cwd=CARPETA, capture_output=True, text=True, timeout=120)
+            if salida.returncode != 0 or not salida.stdout.strip():
+                break
+            for clave, ms in json.loads(salida.stdout.strip().splitlines()[-1]).items():
+                tiempos.setdefault(clave, []).append(ms)
+    arranque = {clave: round(float(np.percentile(valores, 50)), 1) for clave, valores in tiempos.items()}
+    arranque["gui_en_analisis"] = gui
+    return arranque
+
+# --------------------------------------------------------------
+# ------------- Comparacion con un reporte base ----------------
+# --------------------------------------------------------------
+def comparar(reporte, base, tolerancia=1.5, minimo_ms=5.0):
+    # Regresiones: una etapa que se vuelve mas lenta que tolerancia * base (y al menos
+    # minimo_ms mas lenta) o un criterio de precision que antes se cumplia y ahora no
+    regresiones = []
+    anteriores = {c["funcion"]: c for c in base["casos"]}
+    for caso in reporte["casos"]:
+        anterior = anteriores.get(caso["funcion"])
+        if anterior is None:
+            continue
+        for etapa, datos in caso["etapas"].items():
+            previo = anterior["etapas"].get(etapa)
+            if previo and datos["p50_ms"] > tolerancia * previo["p50_ms"] and datos["p50_ms"] - previo["p50_ms"] > minimo_ms:
+                regresiones.append(f"{caso['funcion']}: {etapa} {previo['p50_ms']:.1f}ms -> {datos['p50_ms']:.1f}ms")
+        for criterio, ok in caso["precision"].items():
+            if not ok and anterior["precision"].get(criterio):
+                regresiones.append(f"{caso['funcion']}: {criterio} dejo de ser correcto")
+    arranque, previo = reporte.get("arranque", {}), base.get("arranque", {})
+    for clave, ms in arranque.items():
+        if clave.endswith("_ms") and clave in previo and ms > tolerancia * previo[clave] and ms - previo[clave] > minimo_ms:
+            regresiones.append(f"arranque: {clave} {previo[clave]:.1f}ms -> {ms:.1f}ms")
+    if arranque.get("gui_en_analisis"):
+        regresiones.append(f"arranque: importar analisis carga {', '.join(arranque['gui_en_analisis'])}")
+    return regresiones
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark y corpus de regresion del analisis de funciones.")
+    parser.add_argument("-r", "--repeticiones", type=int, default=3, help="repeticiones por etapa")
+    parser.add_argument("-l", "--limite-simbolico", type=float, help="segundos por etapa simbolica (0 = sin limite)")
+    parser.add_argument("-c", "--categoria", action="append", help="medir solo esta categoria (se puede repetir)")
+    parser.add_argument("-o", "--salida", help="archivo JSON del reporte (por defecto stdout)")
+    parser.add_argument("--comparar", help="reporte base; sale con codigo 1 si hay regresiones")
+    parser.add_argument("--kernel", choices=kernels.BACKENDS, default=kernels.BACKEND,
+                        help="backend para evaluar f(x) sobre mallas")
+    parser.add_argument("--sin-arranque", action="store_true", help="no medir el arranque en frio")
+    parser.add_argument("--tolerancia", type=float, default=1.5, help="factor de lentitud aceptado frente a la base")
+    args = parser.parse_args(argv)
+    kernels.fijar_backend(args.kernel)
+
+    reporte = ejecutar(max(1, args.repeticiones), args.limite_simbolico, args.categoria)
+    if not args.sin_arranque:
+        reporte["arranque"] = medirArranque(max(1, args.repeticiones))
+        print("arranque " + " ".join(f"{clave}={valor}" for clave, valor in reporte["arranque"].items()), file=sys.stderr)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            reporte["regresiones"] = comparar(reporte, json.load(archivo), args.tolerancia)
+        for linea in reporte["regresiones"]:
+            print(f"REGRESION {linea}", file=sys.stderr)
+    texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto + "\n")
+    else:
+        print(texto)
+    return 1 if reporte.get("regresiones") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
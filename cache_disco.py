@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Caché persistente de resultados del análisis (SQLite en modo WAL), compartida
+# entre sesiones de la interfaz y procesos de lote.py. Cada fila es una etapa
+# (dominio, recorrido, intersecciones) de una expresión, indexada por su forma
+# canónica (srepr) y por la versión del análisis que la produjo.
+# Uso: python cache_disco.py info | python cache_disco.py invalidar [--obsoletas | --funcion F]
+
+TAMANO_MAXIMO = 64 * 1024 * 1024  # bytes de valores guardados antes de desalojar
+RUTA_POR_DEFECTO = os.path.join(os.path.expanduser("~"), ".cache", "funciones", "analisis.sqlite3")
+VARIABLE_ENTORNO = "ANALISIS_CACHE"  # "0" la desactiva; otra cosa es la ruta del archivo
+
+_ESQUEMA = (
+    """CREATE TABLE IF NOT EXISTS etapas (
+        clave TEXT NOT NULL,
+        version TEXT NOT NULL,
+        etapa TEXT NOT NULL,
+        valor TEXT NOT NULL,
+        exacto INTEGER NOT NULL,
+        limite REAL,
+        tamano INTEGER NOT NULL,
+        usado REAL NOT NULL,
+        PRIMARY KEY (clave, version, etapa))""",
+    "CREATE INDEX IF NOT EXISTS etapas_usado ON etapas (usado)",
+)
+
+class CacheDisco:
+    def __init__(self, ruta=RUTA_POR_DEFECTO, version="", tamano_maximo=TAMANO_MAXIMO):
+        self.ruta = ruta
+        self.version = version
+        self.tamano_maximo = tamano_maximo
+        self.aciertos = 0
+        self.fallos = 0
+        self._local = threading.local()
+
+    def _conexion(self):
+        # Una conexión por hilo y por proceso: sqlite3 no se comparte entre ellos.
+        # WAL deja leer mientras otro proceso escribe; busy_timeout espera los bloqueos.
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None or self._local.pid != os.getpid():
+            carpeta = os.path.dirname(self.ruta)
+            if carpeta:
+                os.makedirs(carpeta, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, timeout=10, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            for sentencia in _ESQUEMA:
+                conexion.execute(sentencia)
+            self._local.conexion, self._local.pid = conexion, os.getpid()
+        return conexion
+
+    def leer(self, clave, etapa, limite=None):
+        # Devuelve (valor, exacto) o None. Un resultado aproximado solo sirve si se
+        # obtuvo con un límite simbólico igual o mayor (limite None = sin límite).
+        try:
+            conexion = self._conexion()
+            fila = conexion.execute(
+                "SELECT valor, exacto, limite FROM etapas WHERE clave = ? AND version = ? AND etapa = ?",
+                (clave, self.version, etapa)).fetchone()
+            if fila is None or not (fila[1] or fila[2] is None or (limite is not None and limite <= fila[2])):
+                self.fallos += 1
+                return None
+            conexion.execute("UPDATE etapas SET usado = ? WHERE clave = ? AND version = ? AND etapa = ?",
+                             (time.time(), clave, self.version, etapa))
+            self.aciertos += 1
+            return json.loads(fila[0]), bool(fila[1])
+        except (sqlite3.Error, ValueError):
+            # una caché rota o bloqueada no debe impedir el análisis
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, etapa, valor, exacto, limite=None):
+        try:
+            texto = json.dumps(valor, ensure_ascii=False)
+            conexion = self._conexion()
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                conexion.execute("INSERT OR REPLACE INTO etapas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                 (clave, self.version, etapa, texto, int(exacto), limite,
+                                  len(texto.encode("utf-8")), time.time()))
+                self._desalojar(conexion)
+                conexion.execute("COMMIT")
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+        except (sqlite3.Error, TypeError, ValueError):
+            pass
+
+    def _desalojar(self, conexion):
+        # Por tamaño: se borran las filas menos usadas hasta quedar en el 90% del máximo
+        total = conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM etapas").fetchone()[0]
+        if total <= self.tamano_maximo:
+            return
+        sobrante = total - int(0.9 * self.tamano_maximo)
+        borrar = []
+        for rowid, tamano in conexion.execute("SELECT rowid, tamano FROM etapas ORDER BY usado"):
+            if sobrante <= 0:
+                break
+            borrar.append((rowid,))
+            sobrante -= tamano
+        conexion.executemany("DELETE FROM etapas WHERE rowid = ?", borrar)
+
+    def invalidar(self, clave=None, solo_obsoletas=False):
+        # Sin argumentos borra todo; con clave, solo esa expresión; con solo_obsoletas,
+        # lo guardado por otras versiones del análisis. Devuelve las filas borradas.
+        conexion = self._conexion()
+        if solo_obsoletas:
+            cursor = conexion.execute("DELETE FROM etapas WHERE version <> ?", (self.version,))
+        elif clave is not None:
+            cursor = conexion.execute("DELETE FROM etapas WHERE clave = ?", (clave,))
+        else:
+            cursor = conexion.execute("DELETE FROM etapas")
+        borradas = cursor.rowcount
+        conexion.execute("VACUUM")
+        return borradas
+
+    def info(self):
+        conexion = self._conexion()
+        filas, tamano = conexion.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM etapas").fetchone()
+        versiones = dict(conexion.execute("SELECT version, COUNT(*) FROM etapas GROUP BY version"))
+        return {"ruta": self.ruta, "version": self.version, "filas": filas, "tamano": tamano,
+                "tamano_maximo": self.tamano_maximo, "versiones": versiones,
+                "aciertos": self.aciertos, "fallos": self.fallos}
+
+# --------------------------------------------------------------
+# ------------- Instancia compartida ---------------------------
+# --------------------------------------------------------------
+_compartida = {}
+_lock = threading.Lock()
+
+def cache_compartida(version):
+    # Se crea al primer uso (importar no toca el disco); None si está desactivada
+    ruta = os.environ.get(VARIABLE_ENTORNO, RUTA_POR_DEFECTO)
+    if ruta == "0":
+        return None
+    with _lock:
+        clave = (ruta, version)
+        if clave not in _compartida:
+            _compartida[clave] = CacheDisco(ruta, version)
+        return _compartida[clave]
+
+# --------------------------------------------------------------
+# ------------- Línea de comandos ------------------------------
+# --------------------------------------------------------------
+def main(argv=None):
+    import analisis
+    parser = argparse.ArgumentParser(description="Caché persistente del análisis de funciones.")
+    parser.add_argument("accion", choices=("info", "invalidar"))
+    parser.add_argument("--obsoletas", action="store_true", help="borrar solo lo de otras versiones del análisis")
+    parser.add_argument("--funcion", help="borrar solo esta funcion (texto como en la interfaz)")
+    args = parser.parse_args(argv)
+
+    cache = cache_compartida(analisis.VERSION_ANALISIS)
+    if cache is None:
+        sys.exit(f"La caché está desactivada ({VARIABLE_ENTORNO}=0)")
+    if args.accion == "info":
+        print(json.dumps(cache.info(), ensure_ascii=False, indent=2))
+        return
+    clave = None
+    if args.funcion:
+        import sympy as sp
+        clave = sp.srepr(analisis.convertir_expresion(args.funcion))
+    print(f"{cache.invalidar(clave, args.obsoletas)} filas borradas de {cache.ruta}")
+
+if __name__ == "__main__":
+    main()
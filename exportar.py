@@ -0,0 +1,226 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import analisis
+import grafica
+from analisis import Comparacion, compilar_funcion, contexto_procesos
+from lote import PoolLote, analizarTextoResultado, leerFunciones, registroAnalisis
+
+# Exportacion sin interfaz grafica (no importa tkinter): muestras de alta resolucion
+# en CSV / Parquet / JSON escritas por bloques, graficas SVG / PNG con Agg y el
+# resultado del analisis en JSON. Por lotes, en paralelo con los procesos de lote.py.
+# Uso: python exportar.py funciones.txt -d salida -f csv,png,analisis > registros.jsonl
+
+FORMATOS_MUESTRA = ("csv", "parquet", "json")
+FORMATOS_GRAFICA = ("svg", "png")
+FORMATOS = FORMATOS_MUESTRA + FORMATOS_GRAFICA + ("analisis",)
+PUNTOS_EXPORTAR = 100000  # puntos por muestra exportada
+BLOQUE = 65536  # puntos en memoria a la vez al escribir una muestra
+
+# --------------------------------------------------------------
+# ------------- Muestra por bloques ----------------------------
+# --------------------------------------------------------------
+def bloquesMuestra(expresion_simbolica, a=-10, b=10, n=PUNTOS_EXPORTAR, dominio=None, bloque=BLOQUE):
+    # Genera (xs, ys) de la malla uniforme de n puntos en [a, b], un bloque a la vez:
+    # la muestra completa nunca esta en memoria. Con dominio, NaN fuera de el; si el
+    # dominio no tiene forma cerrada (ConditionSet), decide la evaluacion numerica.
+    fn = compilar_funcion(expresion_simbolica)
+    numerico = dominio is not None and not analisis.forma_cerrada(dominio)
+    paso = (b - a) / (n - 1) if n > 1 else 0.0
+    for inicio in range(0, n, bloque):
+        k = np.arange(inicio, min(n, inicio + bloque))
+        xs = a + k * paso
+        if k[-1] == n - 1:
+            xs[-1] = b # como linspace: el extremo exacto
+        ys = fn(xs)
+        if numerico:
+            ys[~np.isfinite(ys)] = np.nan
+        elif dominio is not None:
+            ys[~analisis.pertenece(dominio, xs)] = np.nan
+        yield xs, ys
+
+def exportarMuestra(expresion_simbolica, ruta, a=-10, b=10, n=PUNTOS_EXPORTAR, formato=None, dominio=None, bloque=BLOQUE):
+    # Escribe la muestra en ruta (formato por la extension si no se da) y devuelve los puntos escritos.
+    # Se escribe en un temporal que reemplaza al archivo al terminar: nunca queda uno a medias.
+    formato = formato or os.path.splitext(ruta)[1].lstrip(".").lower()
+    escritores = {"csv": _escribirCsv, "json": _escribirJson, "parquet": _escribirParquet}
+    if formato not in escritores:
+        raise ValueError(f"Formato de muestra desconocido: {formato} (opciones: {', '.join(FORMATOS_MUESTRA)})")
+    temporal = ruta + ".tmp"
+    try:
+        total = escritores[formato](temporal, expresion_simbolica, bloquesMuestra(expresion_simbolica, a, b, n, dominio, bloque),
+                                    {"a": a, "b": b, "n": n})
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+    return total
+
+def _escribirCsv(ruta, expresion_simbolica, bloques, datos):
+    total = 0
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write("x,y\n")
+        for xs, ys in bloques:
+            # repr da el float mas corto que se relee igual; NaN (fuera del dominio) queda vacio
+            archivo.write("".join(f"{x!r},{y!r}\n" if y == y else f"{x!r},\n"
+                                  for x, y in zip(xs.tolist(), ys.tolist())))
+            total += xs.size
+    return total
+
+def _escribirJson(ruta, expresion_simbolica, bloques, datos):
+    # Un documento JSON escrito por partes: {"funcion", "a", "b", "n", "puntos": [[x, y], ...]}
+    total = 0
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        encabezado = json.dumps({"funcion": str(expresion_simbolica), **datos}, ensure_ascii=False)
+        archivo.write(encabezado[:-1] + ', "puntos": [')
+        for xs, ys in bloques:
+            # repr da el float mas corto que se relee igual; JSON no admite NaN: null
+            pares = ",".join(f"[{x!r},{y!r}]" if math.isfinite(y) else f"[{x!r},null]"
+                             for x, y in zip(xs.tolist(), ys.tolist()))
+            archivo.write(("," if total else "") + pares)
+            total += xs.size
+        archivo.write("]}\n")
+    return total
+
+def _escribirParquet(ruta, expresion_simbolica, bloques, datos):
+    # Un grupo de filas por bloque; pyarrow es opcional y solo se importa aqui
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Exportar a Parquet requiere pyarrow (pip install pyarrow)") from e
+    esquema = pa.schema([("x", pa.float64()), ("y", pa.float64())],
+                        metadata={"funcion": str(expresion_simbolica), **{k: str(v) for k, v in datos.items()}})
+    total = 0
+    with pq.ParquetWriter(ruta, esquema) as escritor:
+        for xs, ys in bloques:
+            escritor.write_table(pa.table({"x": xs, "y": ys}, schema=esquema))
+            total += xs.size
+    return total
+
+# --------------------------------------------------------------
+# ------------- Graficas con Agg (sin pantalla) ----------------
+# --------------------------------------------------------------
+class _CanvasExportacion(FigureCanvasAgg):
+    # grafica.py pinta como en la interfaz, pero sin blit (nada animado) y sin
+    # dibujar en cada cambio: el unico dibujo completo es el de savefig
+    supports_blit = False
+
+    def draw(self):
+        pass
+
+class Lienzo:
+    # Lo que grafica.py usa de la App (fig, ax, canvas), sobre Agg
+    def __init__(self, ancho=8, alto=6, dpi=100):
+        self.fig = Figure(figsize=(ancho, alto), dpi=dpi)
+        self.ax = self.fig.add_subplot()
+        self.canvas = _CanvasExportacion(self.fig)
+        grafica.inicializarGrafica(self)
+
+def exportarGrafica(resultado, ruta, a=-10, b=10, formato=None, dpi=150):
+    # resultado: ResultadoAnalisis o Comparacion. Misma grafica que la interfaz, en [a, b].
+    formato = formato or os.path.splitext(ruta)[1].lstrip(".").lower()
+    if formato not in FORMATOS_GRAFICA:
+        raise ValueError(f"Formato de grafica desconocido: {formato} (opciones: {', '.join(FORMATOS_GRAFICA)})")
+    lienzo = Lienzo()
+    comparacion = isinstance(resultado, Comparacion)
+    if (a, b) == (-10, 10):
+        (grafica.graficarComparacion if comparacion else grafica.graficarFuncion)(lienzo, resultado)
+    else:
+        lienzo.ax.set_xlim(a, b)
+        (grafica.graficarVistaComparacion if comparacion else grafica.graficarVista)(lienzo, resultado)
+        lineas = [lienzo.linea_funcion, *lienzo.lineas_comparacion]
+        limites = [l for l in (grafica.limitesVisibles(*linea.get_data()) for linea in lineas) if l is not None]
+        if limites:
+            lienzo.ax.set_ylim(min(l[0] for l in limites), max(l[1] for l in limites))
+    temporal = f"{ruta}.tmp.{formato}"
+    try:
+        lienzo.fig.savefig(temporal, format=formato, dpi=dpi)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+def exportarAnalisis(resultado, ruta):
+    # Dominio, recorrido e intersecciones en JSON (los mismos campos que lote.py)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(registroAnalisis(resultado), archivo, ensure_ascii=False, indent=2)
+        archivo.write("\n")
+    os.replace(temporal, ruta)
+
+# --------------------------------------------------------------
+# ------------- Por lotes --------------------------------------
+# --------------------------------------------------------------
+def nombreArchivo(texto_funcion):
+    # Base de nombre estable y valida en cualquier sistema: texto saneado + huella
+    legible = re.sub(r"[^0-9A-Za-z._-]+", "_", texto_funcion).strip("._")[:40] or "f"
+    return f"{legible}_{hashlib.sha1(texto_funcion.encode('utf-8')).hexdigest()[:8]}"
+
+def exportarTexto(texto_funcion, limite, carpeta, formatos, a=-10, b=10, puntos=PUNTOS_EXPORTAR, dpi=150):
+    # Tarea de PoolLote: analiza como lote.py y escribe un archivo por formato.
+    # El registro agrega "archivos" con las rutas escritas.
+    registro, resultado = analizarTextoResultado(texto_funcion, limite)
+    registro["archivos"] = []
+    if resultado is None:
+        return registro
+    base = os.path.join(carpeta, nombreArchivo(texto_funcion))
+    try:
+        for formato in formatos:
+            if formato in FORMATOS_MUESTRA:
+                ruta = f"{base}.{formato}"
+                exportarMuestra(resultado.expresion, ruta, a, b, puntos, formato, resultado.dominio)
+            elif formato in FORMATOS_GRAFICA:
+                ruta = f"{base}.{formato}"
+                exportarGrafica(resultado, ruta, a, b, formato, dpi)
+            else:
+                ruta = f"{base}.analisis.json"
+                exportarAnalisis(resultado, ruta)
+            registro["archivos"].append(ruta)
+    except Exception as e:
+        registro["error"] = f"{type(e).__name__}: {e}"
+    return registro
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta muestras, graficas y analisis de funciones f(x) (registros JSON lines).")
+    parser.add_argument("archivos", nargs="*", default=["-"], help="archivos con una funcion por linea ('-' = stdin)")
+    parser.add_argument("-d", "--carpeta", default=".", help="carpeta de salida")
+    parser.add_argument("-f", "--formatos", default="csv,png,analisis",
+                        help=f"lista separada por comas de: {', '.join(FORMATOS)}")
+    parser.add_argument("-a", "--desde", type=float, default=-10.0, help="inicio del intervalo en x")
+    parser.add_argument("-b", "--hasta", type=float, default=10.0, help="fin del intervalo en x")
+    parser.add_argument("-n", "--puntos", type=int, default=PUNTOS_EXPORTAR, help="puntos de cada muestra")
+    parser.add_argument("--dpi", type=int, default=150, help="resolucion de las graficas PNG")
+    parser.add_argument("-p", "--procesos", type=int, default=contexto_procesos().cpu_count(), help="procesos en paralelo")
+    parser.add_argument("-t", "--tiempo-maximo", type=float, default=60.0, help="segundos maximos por funcion")
+    parser.add_argument("-l", "--limite-simbolico", type=float, default=analisis.LIMITE_SIMBOLICO,
+                        help="segundos por etapa simbolica antes de usar el camino numerico")
+    args = parser.parse_args(argv)
+    formatos = [f.strip().lower() for f in args.formatos.split(",") if f.strip()]
+    desconocidos = sorted(set(formatos) - set(FORMATOS))
+    if desconocidos:
+        parser.error(f"formatos desconocidos: {', '.join(desconocidos)}")
+    if not args.desde < args.hasta or args.puntos < 2:
+        parser.error("se necesita desde < hasta y al menos 2 puntos")
+    os.makedirs(args.carpeta, exist_ok=True)
+
+    pool = PoolLote(max(1, args.procesos), args.tiempo_maximo, args.limite_simbolico, exportarTexto,
+                    (args.carpeta, formatos, args.desde, args.hasta, args.puntos, args.dpi))
+    errores = 0
+    try:
+        for registro in pool.procesar(leerFunciones(args.archivos)):
+            errores += registro["error"] is not None
+            print(json.dumps(registro, ensure_ascii=False), flush=True)
+    finally:
+        pool.cerrar()
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
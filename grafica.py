@@ -1,41 +1,213 @@
-from analisis import calcularFuncion, calcularIntersecciones
-import sympy as sp
+import numpy as np
+
 
 # --------------------------------------------------------------
-# ------------- Grafica la funcion en pantalla -----------------
+# ------------- Artistas persistentes de la grafica ------------
 # --------------------------------------------------------------
-def graficarFuncion(self, funcion_numerica, expresion_simbolica):
-    # Calcular valores
-    valores_y = calcularFuncion(funcion_numerica)
-    valores_x = [i/20 for i in range(-100, 101)] # Rango de x de -10 a 10 con paso 0.05
-    
-    # Limpiar y graficar
-    self.ax.clear()
+def inicializarGrafica(self):
+    # Titulo, grilla, ejes y leyenda se dibujan una sola vez y quedan en el fondo
+    # guardado; la curva y los puntos son artistas animados que solo cambian sus datos.
+    animado = self.canvas.supports_blit
     self.ax.set_title("Gráfica de f(x)")
     self.ax.set_xlabel("x")
     self.ax.set_ylabel("y")
     self.ax.grid(True)
+    self.ax.axhline(0, color='black', linewidth=0.8)
+    self.ax.axvline(0, color='black', linewidth=0.8)
+    self.linea_funcion, = self.ax.plot([], [], label="f(x)", linewidth=2, animated=animado)
+    self.punto_y = self.ax.scatter([], [], color="red", s=80, label="Intersección eje Y", zorder=5, animated=animado)
+    self.puntos_x = self.ax.scatter([], [], color="green", s=80, label="Intersección eje X", zorder=5, animated=animado)
+    self.puntos_extremos = self.ax.scatter([], [], color="orange", marker="^", s=70, label="Extremo local", zorder=5, animated=animado)
+    self.puntos_inflexion = self.ax.scatter([], [], color="teal", marker="s", s=40, label="Punto de inflexión", zorder=5, animated=animado)
+    self.puntos_cruce = self.ax.scatter([], [], color="purple", marker="D", s=60, label="Cruce entre funciones", zorder=6, animated=animado)
+    self.lineas_comparacion = [] # curvas 2, 3, ... en el modo de varias funciones
+    self.leyenda = None
+    _armarLeyenda(self, [self.linea_funcion, self.punto_y, self.puntos_x, self.puntos_extremos, self.puntos_inflexion])
+    self.vista = None # intervalo x que muestra la curva dibujada
+    self.canvas.mpl_connect("draw_event", lambda evento: _guardarFondo(self))
 
-    # Usar la expresion simbolica directamente para intersecciones
-    try:
-        xi, y0 = calcularIntersecciones(expresion_simbolica)
-    except:
-        xi, y0 = [], float('NaN')
-    
-    # Graficar la función
-    self.ax.plot(valores_x, valores_y, label="f(x)", linewidth=2)
-    
+def _armarLeyenda(self, artistas):
+    # La leyenda cambia con el modo (una funcion o varias): se rehace con sus artistas
+    if self.leyenda is not None:
+        self.leyenda.remove()
+    self.leyenda = self.ax.legend(handles=artistas, loc="upper right")
+    self.leyenda.set_animated(self.canvas.supports_blit)
+    self._artistas_animados = [self.linea_funcion, *self.lineas_comparacion, self.punto_y, self.puntos_x,
+                               self.puntos_extremos, self.puntos_inflexion, self.puntos_cruce, self.leyenda]
+    self._fondo = None
+
+def _prepararCurvas(self, etiquetas):
+    # Una linea por funcion; linea_funcion es siempre la primera
+    while len(self.lineas_comparacion) < len(etiquetas) - 1:
+        color = f"C{len(self.lineas_comparacion) + 1}" # fijo: el ciclo de colores no avanza al recrear
+        linea, = self.ax.plot([], [], linewidth=2, color=color, animated=self.canvas.supports_blit)
+        self.lineas_comparacion.append(linea)
+    while len(self.lineas_comparacion) > len(etiquetas) - 1:
+        self.lineas_comparacion.pop().remove()
+    lineas = [self.linea_funcion, *self.lineas_comparacion]
+    if [linea.get_label() for linea in lineas] != etiquetas or len(self._artistas_animados) != len(lineas) + 6:
+        for linea, etiqueta in zip(lineas, etiquetas):
+            linea.set_label(etiqueta)
+        if len(lineas) == 1:
+            _armarLeyenda(self, [self.linea_funcion, self.punto_y, self.puntos_x, self.puntos_extremos, self.puntos_inflexion])
+        else:
+            _armarLeyenda(self, lineas + [self.puntos_cruce])
+    return lineas
+
+def _guardarFondo(self):
+    # Despues de cada dibujo completo: guardar el fondo estatico y pintar encima lo animado
+    if not self.canvas.supports_blit:
+        return
+    self._fondo = self.canvas.copy_from_bbox(self.fig.bbox)
+    for artista in self._artistas_animados:
+        self.ax.draw_artist(artista)
+
+def _redibujar(self, limites):
+    # Si los ejes no cambian basta con restaurar el fondo y repintar los artistas animados
+    if self._fondo is None or limites != (self.ax.get_xlim(), self.ax.get_ylim()):
+        self.ax.set_xlim(*limites[0])
+        self.ax.set_ylim(*limites[1])
+        self.canvas.draw()
+        return
+    self.canvas.restore_region(self._fondo)
+    for artista in self._artistas_animados:
+        self.ax.draw_artist(artista)
+    self.canvas.blit(self.fig.bbox)
+    self.canvas.flush_events()
+
+# --------------------------------------------------------------
+# ------------- Grafica la funcion en pantalla -----------------
+# --------------------------------------------------------------
+def datosFuncion(resultado, vista=None):
+    # Lo costoso de graficar (muestreo, cortes en las singularidades, raices visibles,
+    # limites del eje y) sin tocar la figura: la interfaz lo llama fuera del loop de Tk.
+    # vista None es la ventana inicial; (a, b) es el intervalo visible tras un pan/zoom.
+    # Las intersecciones se marcan solo si el analisis ya las calculo; no se vuelven a resolver
+    intersecciones = resultado.calculado("intersecciones")
+    datos = {"vista": vista, "y0": resultado.y0 if intersecciones else float('NaN'),
+             "monotonia": resultado.monotonia if resultado.calculado("monotonia") else None}
+    if vista is None:
+        # Valores ya muestreados en el resultado del analisis (NaN fuera del dominio)
+        datos["x"], datos["y"] = resultado.muestra
+        datos["xi"] = resultado.xi if intersecciones else []
+        datos["limites_y"] = limitesVisibles(datos["x"], datos["y"])
+    else:
+        # remuestrear solo el intervalo visible (por teselas cacheadas)
+        datos["x"], datos["y"] = resultado.muestrear_vista(*vista)
+        datos["xi"] = resultado.raices_vista(*vista)
+    return datos
+
+def graficarFuncion(self, resultado, datos=None):
+    if not hasattr(self, "linea_funcion"):
+        inicializarGrafica(self)
+    datos = datos or datosFuncion(resultado)
+
+    valores_x, valores_y = datos["x"], datos["y"]
+    _prepararCurvas(self, ["f(x)"]) # sale del modo de varias funciones si hacia falta
+    self.puntos_cruce.set_offsets(np.empty((0, 2)))
+    self.linea_funcion.set_data(valores_x, valores_y)
+    _marcarIntersecciones(self, datos["xi"], datos["y0"])
+
+    # Actualizar canvas: dibujo completo solo si cambian los limites
+    limites_x = (float(valores_x[0]), float(valores_x[-1]))
+    _marcarExtremos(self, datos["monotonia"], *limites_x)
+    limites_y = datos["limites_y"] or self.ax.get_ylim()
+    _redibujar(self, (limites_x, tuple(float(v) for v in limites_y)))
+    self.vista = limites_x
+
+def graficarVista(self, resultado, datos=None):
+    # Tras un pan/zoom: la muestra y las intersecciones del intervalo visible, sin tocar los limites
+    datos = datos or datosFuncion(resultado, tuple(self.ax.get_xlim()))
+    a, b = datos["vista"]
+    self.linea_funcion.set_data(datos["x"], datos["y"])
+    _marcarIntersecciones(self, datos["xi"], datos["y0"])
+    _marcarExtremos(self, datos["monotonia"], a, b)
+    _redibujar(self, (self.ax.get_xlim(), self.ax.get_ylim()))
+    self.vista = (a, b)
+
+# --------------------------------------------------------------
+# ------------- Varias funciones sobre la misma malla ----------
+# --------------------------------------------------------------
+def datosComparacion(comparacion, vista=None):
+    # Como datosFuncion: todas las curvas salen de una sola muestra (misma malla) y se
+    # buscan los cruces entre pares; vista None es la ventana inicial
+    if vista is None:
+        valores_x, valores_y = comparacion.muestra
+        limites = [l for l in (limitesVisibles(valores_x, fila) for fila in valores_y) if l is not None]
+        return {"vista": vista, "x": valores_x, "y": valores_y, "cruces": comparacion.cruces(),
+                "limites_y": (min(l[0] for l in limites), max(l[1] for l in limites)) if limites else None}
+    valores_x, valores_y = comparacion.muestrear(*vista)
+    return {"vista": vista, "x": valores_x, "y": valores_y, "cruces": comparacion.cruces(*vista)}
+
+def graficarComparacion(self, comparacion, datos=None):
+    if not hasattr(self, "linea_funcion"):
+        inicializarGrafica(self)
+    datos = datos or datosComparacion(comparacion)
+
+    valores_x = datos["x"]
+    _dibujarComparacion(self, comparacion, valores_x, datos["y"], datos["cruces"])
+    limites_x = (float(valores_x[0]), float(valores_x[-1]))
+    limites_y = datos["limites_y"] or self.ax.get_ylim()
+    _redibujar(self, (limites_x, tuple(float(v) for v in limites_y)))
+    self.vista = limites_x
+
+def graficarVistaComparacion(self, comparacion, datos=None):
+    # Tras un pan/zoom: malla comun del intervalo visible y los cruces que quedan a la vista
+    datos = datos or datosComparacion(comparacion, tuple(self.ax.get_xlim()))
+    _dibujarComparacion(self, comparacion, datos["x"], datos["y"], datos["cruces"])
+    _redibujar(self, (self.ax.get_xlim(), self.ax.get_ylim()))
+    self.vista = datos["vista"]
+
+def _dibujarComparacion(self, comparacion, valores_x, valores_y, cruces):
+    etiquetas = [f"f{i + 1}(x) = {expresion}" for i, expresion in enumerate(comparacion.expresiones)]
+    for linea, fila in zip(_prepararCurvas(self, etiquetas), valores_y):
+        linea.set_data(valores_x, fila)
+    # los cortes con los ejes de cada funcion quedan en el texto del analisis
+    self.punto_y.set_offsets(np.empty((0, 2)))
+    self.puntos_x.set_offsets(np.empty((0, 2)))
+    _marcarExtremos(self, None, 0, 0)
+    puntos = [[x, y] for _, _, lista in cruces for x, y in lista]
+    self.puntos_cruce.set_offsets(puntos if puntos else np.empty((0, 2)))
+
+def _marcarIntersecciones(self, xi, y0):
     # Marcar intersecciones si existen
+    textos = self.leyenda.get_texts()
     if not (str(y0) == 'nan' or y0 == float('inf') or y0 == float('-inf')):
-        self.ax.scatter(0, y0, color="red", s=80, label=f"Intersección eje Y (0, {y0:.2f})", zorder=5)
+        self.punto_y.set_offsets([[0, y0]])
+        textos[1].set_text(f"Intersección eje Y (0, {y0:.2f})")
+    else:
+        self.punto_y.set_offsets(np.empty((0, 2)))
+        textos[1].set_text("Intersección eje Y")
     
-    for i, xi_val in enumerate(xi):
-        if i < 5:  # Limitar a 5 intersecciones para no saturar
-            self.ax.scatter(float(xi_val), 0, color="green", s=80, label=f"Intersección eje X ({float(xi_val):.2f}, 0)", zorder=5)
-    
-    self.ax.axhline(0, color='black', linewidth=0.8)
-    self.ax.axvline(0, color='black', linewidth=0.8)
-    self.ax.legend()
-    # Actualizar canvas
+    xi = [float(xi_val) for xi_val in xi[:5]] # Limitar a 5 intersecciones para no saturar
+    self.puntos_x.set_offsets([[xi_val, 0] for xi_val in xi] if xi else np.empty((0, 2)))
+    textos[2].set_text("Intersección eje X " + ", ".join(f"({xi_val:.2f}, 0)" for xi_val in xi) if xi else "Intersección eje X")
+
+def _marcarExtremos(self, monotonia, a, b):
+    # Extremos locales e inflexiones del analisis de monotonia que caen en [a, b]
+    # (se buscan en la ventana del analisis: fuera de ella no hay marcas)
+    for puntos, artista in ((monotonia["extremos"] if monotonia else [], self.puntos_extremos),
+                            (monotonia["inflexion"] if monotonia else [], self.puntos_inflexion)):
+        visibles = [[p[0], p[1]] for p in puntos if a <= p[0] <= b]
+        artista.set_offsets(visibles if visibles else np.empty((0, 2)))
 
-    self.canvas.draw()
+# --------------------------------------------------------------
+# ------------- Limites del eje y ------------------------------
+# --------------------------------------------------------------
+def limitesVisibles(valores_x, valores_y):
+    # Los puntos pegados a un corte (polo) no cuentan: si no, aplastan el resto de la curva
+    finitos = np.isfinite(valores_y)
+    if not finitos.any():
+        return None
+    lejos = finitos.copy()
+    cortes = valores_x[~finitos]
+    if cortes.size:
+        posicion = np.clip(np.searchsorted(cortes, valores_x), 1, cortes.size) - 1
+        distancia = np.minimum(np.abs(valores_x - cortes[posicion]),
+                               np.abs(valores_x - cortes[np.minimum(posicion + 1, cortes.size - 1)]))
+        lejos &= distancia > 0.02 * (valores_x[-1] - valores_x[0])
+        if not lejos.any():
+            lejos = finitos
+    bajo, alto = valores_y[lejos].min(), valores_y[lejos].max()
+    margen = 0.1 * (alto - bajo) if alto > bajo else 1.0
+    return bajo - margen, alto + margen
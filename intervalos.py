@@ -0,0 +1,533 @@
+import heapq
+import math
+import sympy as sp
+
+# Aritmética de intervalos sobre el árbol de una expresión de sympy.
+# Cada subexpresión se compila a una función caja -> Intervalo (o None si la
+# función no está definida en ningún punto de la caja). Los extremos se
+# redondean hacia afuera, así que el intervalo devuelto siempre contiene los
+# valores reales de f sobre la parte de la caja donde está definida.
+
+INF = math.inf
+
+class IntervaloNoSoportado(ValueError):
+    pass
+
+class Intervalo:
+    __slots__ = ("lo", "hi", "parcial")
+
+    def __init__(self, lo, hi, parcial=False):
+        self.lo = -INF if lo != lo else lo  # un NaN en un extremo se vuelve infinito
+        self.hi = INF if hi != hi else hi
+        self.parcial = parcial  # True si f no está definida en una parte de la caja
+
+    def __repr__(self):
+        return f"Intervalo({self.lo}, {self.hi}{', parcial' if self.parcial else ''})"
+
+# --------------------------------------------------------------
+# ------------- Redondeo dirigido ------------------------------
+# --------------------------------------------------------------
+_PARTICION = 134217729.0  # 2**27 + 1 (partición de Veltkamp)
+_GRANDE = 1e150  # por encima, la partición puede desbordar: se ensancha sin más
+
+def _abajo(v):
+    return math.nextafter(v, -INF)
+
+def _arriba(v):
+    return math.nextafter(v, INF)
+
+def _partir(a):
+    c = _PARTICION * a
+    alto = c - (c - a)
+    return alto, a - alto
+
+def _ajustar(valor, error, hacia):
+    # valor + error es el resultado exacto; se corre un ulp solo si hace falta
+    if hacia < 0:
+        return _abajo(valor) if error < 0 else valor
+    return _arriba(valor) if error > 0 else valor
+
+def _sumar(a, b, hacia):
+    s = a + b
+    if not math.isfinite(s):
+        return s
+    bb = s - a
+    return _ajustar(s, (a - (s - bb)) + (b - bb), hacia)  # TwoSum de Knuth
+
+def _error_producto(a, b, p):
+    # Dekker: a*b == p + error exactamente; None si la partición podría desbordar
+    if abs(a) > _GRANDE or abs(b) > _GRANDE or abs(p) < 1e-290:
+        return None
+    a1, a2 = _partir(a)
+    b1, b2 = _partir(b)
+    return a2 * b2 - (((p - a1 * b1) - a2 * b1) - a1 * b2)
+
+def _multiplicar(a, b, hacia):
+    if a == 0 or b == 0:
+        return 0.0  # también 0 * inf: el extremo infinito no es un valor alcanzado
+    p = a * b
+    if not math.isfinite(p):
+        return p
+    error = _error_producto(a, b, p)
+    if error is None:
+        return _abajo(p) if hacia < 0 else _arriba(p)
+    return _ajustar(p, error, hacia)
+
+def _ensanchado(lo, hi, parcial):
+    # Para funciones de biblioteca (no redondeadas correctamente): un ulp de margen
+    return Intervalo(_abajo(lo), _arriba(hi), parcial)
+
+def _seguro(funcion, v, desborde):
+    try:
+        return funcion(v)
+    except OverflowError:
+        return desborde
+
+# --------------------------------------------------------------
+# ------------- Operaciones elementales ------------------------
+# --------------------------------------------------------------
+def _suma(a, b):
+    return Intervalo(_sumar(a.lo, b.lo, -1), _sumar(a.hi, b.hi, 1), a.parcial or b.parcial)
+
+def _producto(a, b):
+    bajos = [_multiplicar(u, v, -1) for u in (a.lo, a.hi) for v in (b.lo, b.hi)]
+    altos = [_multiplicar(u, v, 1) for u in (a.lo, a.hi) for v in (b.lo, b.hi)]
+    return Intervalo(min(bajos), max(altos), a.parcial or b.parcial)
+
+def _potencia_entera(a, n):
+    # n >= 0; potencia exacta de la caja (sin el efecto de dependencia de x*x)
+    if n == 0:
+        return Intervalo(1.0, 1.0, a.parcial)
+    if n % 2 or a.lo >= 0:
+        return Intervalo(_potencia_con_signo(a.lo, n, -1), _potencia_con_signo(a.hi, n, 1), a.parcial)
+    if a.hi <= 0:
+        return Intervalo(_potencia_con_signo(-a.hi, n, -1), _potencia_con_signo(-a.lo, n, 1), a.parcial)
+    return Intervalo(0.0, max(_potencia_con_signo(-a.lo, n, 1), _potencia_con_signo(a.hi, n, 1)), a.parcial)
+
+def _potencia_con_signo(v, n, hacia):
+    # v**n redondeado hacia 'hacia'; para v < 0 y n impar se redondea |v|**n al revés
+    if v < 0:
+        return -_potencia_con_signo(-v, n, -hacia) if n % 2 else _potencia_con_signo(-v, n, hacia)
+    r = 1.0
+    for _ in range(n):
+        r = _multiplicar(r, v, hacia)
+    return r
+
+def _reciproco(a):
+    if a.lo == 0 and a.hi == 0:
+        return None
+    if a.lo > 0 or a.hi < 0:
+        return Intervalo(_dividir_uno(a.hi, -1), _dividir_uno(a.lo, 1), a.parcial)
+    if a.lo == 0:
+        return Intervalo(_dividir_uno(a.hi, -1), INF, True)
+    if a.hi == 0:
+        return Intervalo(-INF, _dividir_uno(a.lo, 1), True)
+    return Intervalo(-INF, INF, True)  # el cero queda adentro: polo
+
+def _dividir_uno(v, hacia):
+    if math.isinf(v):
+        return 0.0
+    q = 1.0 / v
+    if math.isfinite(q) and q * v == 1.0 and _error_producto(q, v, q * v) == 0:
+        return q  # exacto
+    return _abajo(q) if hacia < 0 else _arriba(q)
+
+def _raiz(a, q):
+    # Raíz real q-ésima; con q par solo para valores >= 0
+    if q % 2 == 0:
+        if a.hi < 0:
+            return None
+        parcial = a.parcial or a.lo < 0
+        lo = max(a.lo, 0.0)
+        if q == 2:
+            return Intervalo(_raiz_cuadrada(lo, -1), _raiz_cuadrada(a.hi, 1), parcial)
+        return Intervalo(max(0.0, _abajo(lo ** (1 / q))), _arriba(a.hi ** (1 / q)), parcial)
+    impar = lambda v: math.copysign(abs(v) ** (1 / q), v)
+    return _ensanchado(impar(a.lo), impar(a.hi), a.parcial)
+
+def _raiz_cuadrada(v, hacia):
+    r = math.sqrt(v)  # redondeada correctamente por IEEE
+    if not math.isfinite(r) or _multiplicar(r, r, -1) == v == _multiplicar(r, r, 1):
+        return r
+    return max(0.0, _abajo(r)) if hacia < 0 else _arriba(r)
+
+def _exp(a):
+    exp = lambda v: _seguro(math.exp, v, INF)
+    return Intervalo(max(0.0, _abajo(exp(a.lo))) if a.lo != 0 else 1.0,
+                     _arriba(exp(a.hi)) if a.hi != 0 else 1.0, a.parcial)
+
+def _log(a):
+    if a.hi <= 0:
+        return None
+    parcial = a.parcial or a.lo <= 0
+    lo = -INF if a.lo <= 0 else (0.0 if a.lo == 1 else _abajo(math.log(a.lo)))
+    hi = 0.0 if a.hi == 1 else _arriba(math.log(a.hi))
+    return Intervalo(lo, hi, parcial)
+
+def _contiene(lo, hi, base, periodo):
+    # ¿Hay algún base + k*periodo en [lo, hi]? Con margen: ante la duda, sí
+    margen = 1e-12 * (1 + max(abs(lo), abs(hi)))
+    k = math.ceil((lo - margen - base) / periodo)
+    return base + k * periodo <= hi + margen
+
+def _periodica(a, funcion, maximo, minimo):
+    # sin / cos: extremos en los bordes o en los máximos/mínimos que caen adentro
+    if not (math.isfinite(a.lo) and math.isfinite(a.hi)) or a.hi - a.lo >= 2 * math.pi:
+        return Intervalo(-1.0, 1.0, a.parcial)
+    valores = [funcion(a.lo), funcion(a.hi)]
+    if _contiene(a.lo, a.hi, maximo, 2 * math.pi):
+        valores.append(1.0)
+    if _contiene(a.lo, a.hi, minimo, 2 * math.pi):
+        valores.append(-1.0)
+    return Intervalo(max(-1.0, _abajo(min(valores))), min(1.0, _arriba(max(valores))), a.parcial)
+
+def _seno(a):
+    return _periodica(a, math.sin, math.pi / 2, -math.pi / 2)
+
+def _coseno(a):
+    return _periodica(a, math.cos, 0.0, math.pi)
+
+def _tangente(a):
+    # Polos en pi/2 + k*pi
+    if not (math.isfinite(a.lo) and math.isfinite(a.hi)) or a.hi - a.lo >= math.pi \
+            or _contiene(a.lo, a.hi, math.pi / 2, math.pi):
+        if a.lo == a.hi:
+            return None
+        return Intervalo(-INF, INF, True)
+    return _ensanchado(math.tan(a.lo), math.tan(a.hi), a.parcial)
+
+def _restringido(a, bajo, alto):
+    # Intersección con [bajo, alto], que es donde está definida la función
+    if a.hi < bajo or a.lo > alto:
+        return None
+    return Intervalo(max(a.lo, bajo), min(a.hi, alto), a.parcial or a.lo < bajo or a.hi > alto)
+
+def _arcoseno(a):
+    a = _restringido(a, -1.0, 1.0)
+    return a and _ensanchado(math.asin(a.lo), math.asin(a.hi), a.parcial)
+
+def _arcocoseno(a):
+    a = _restringido(a, -1.0, 1.0)
+    return a and _ensanchado(math.acos(a.hi), math.acos(a.lo), a.parcial)
+
+def _creciente(funcion):
+    # Función creciente en toda la recta (con desborde a +-inf)
+    def aplicar(a):
+        lo = _seguro(funcion, a.lo, -INF)
+        hi = _seguro(funcion, a.hi, INF)
+        return _ensanchado(lo, hi, a.parcial)
+    return aplicar
+
+def _coseno_hiperbolico(a):
+    cosh = lambda v: _seguro(math.cosh, v, INF)
+    if a.lo >= 0:
+        return _ensanchado(cosh(a.lo), cosh(a.hi), a.parcial)
+    if a.hi <= 0:
+        return _ensanchado(cosh(a.hi), cosh(a.lo), a.parcial)
+    return Intervalo(1.0, _arriba(max(cosh(a.lo), cosh(a.hi))), a.parcial)
+
+def _absoluto(a):
+    if a.lo >= 0:
+        return a
+    if a.hi <= 0:
+        return Intervalo(-a.hi, -a.lo, a.parcial)
+    return Intervalo(0.0, max(-a.lo, a.hi), a.parcial)
+
+def _signo(a):
+    # Escalones exactos (sin ensanchar): la derivada de |x| es sign(x)
+    signo = lambda v: float((v > 0) - (v < 0))
+    return Intervalo(signo(a.lo), signo(a.hi), a.parcial)
+
+_FUNCIONES = {
+    sp.exp: _exp, sp.log: _log, sp.sin: _seno, sp.cos: _coseno, sp.tan: _tangente,
+    sp.asin: _arcoseno, sp.acos: _arcocoseno, sp.atan: _creciente(math.atan),
+    sp.sinh: _creciente(math.sinh), sp.tanh: _creciente(math.tanh), sp.cosh: _coseno_hiperbolico,
+    sp.Abs: _absoluto, sp.sign: _signo,
+}
+
+# --------------------------------------------------------------
+# ------------- Compilación del árbol de sympy -----------------
+# --------------------------------------------------------------
+def compilar_intervalos(expresion, variable):
+    # Devuelve f(caja) -> Intervalo | None. Lanza IntervaloNoSoportado si la
+    # expresión usa algo que este evaluador no sabe acotar.
+    if expresion == variable:
+        return lambda caja: caja
+    if expresion.is_number:
+        constante = _constante(expresion)
+        return lambda caja: constante
+    if expresion.is_Add or expresion.is_Mul:
+        operacion = _suma if expresion.is_Add else _producto
+        partes = [compilar_intervalos(arg, variable) for arg in expresion.args]
+        def combinar(caja):
+            total = None
+            for parte in partes:
+                valor = parte(caja)
+                if valor is None:
+                    return None
+                total = valor if total is None else operacion(total, valor)
+            return total
+        return combinar
+    if expresion.is_Pow:
+        return _compilar_potencia(expresion, variable)
+    if expresion.func in _FUNCIONES and len(expresion.args) == 1:
+        funcion = _FUNCIONES[expresion.func]
+        argumento = compilar_intervalos(expresion.args[0], variable)
+        def aplicar(caja):
+            valor = argumento(caja)
+            return None if valor is None else funcion(valor)
+        return aplicar
+    raise IntervaloNoSoportado(f"No se puede acotar {expresion.func.__name__} con intervalos")
+
+def _constante(expresion):
+    valor = sp.N(expresion, 20)
+    if not valor.is_real or not valor.is_finite:
+        raise IntervaloNoSoportado(f"Constante no real: {expresion}")
+    # Racionales y decimales exactos en binario (1/2, 0.25, enteros < 2**53):
+    # intervalo puntual, para no abrir bordes como los de acos(x/2)
+    if expresion.is_Rational or expresion.is_Float:
+        v = float(expresion)
+        if math.isfinite(v) and sp.Rational(v) == sp.Rational(expresion):
+            return Intervalo(v, v)
+    v = float(valor)
+    return Intervalo(_abajo(v), _arriba(v))
+
+def _compilar_potencia(expresion, variable):
+    base, exponente = expresion.as_base_exp()
+    f_base = compilar_intervalos(base, variable)
+    if exponente.is_Integer:
+        n = int(exponente)
+        def potencia(caja):
+            valor = f_base(caja)
+            if valor is None:
+                return None
+            valor = _potencia_entera(valor, abs(n))
+            return _reciproco(valor) if n < 0 else valor
+        return potencia
+    if exponente.is_Rational:
+        p, q = int(exponente.p), int(exponente.q)
+        def potencia_racional(caja):
+            valor = f_base(caja)
+            valor = valor and _raiz(valor, q)
+            if valor is None:
+                return None
+            valor = _potencia_entera(valor, abs(p))
+            return _reciproco(valor) if p < 0 else valor
+        return potencia_racional
+    # Exponente real cualquiera: b**e = exp(e*log(b)), con b > 0
+    return compilar_intervalos(sp.exp(exponente * sp.log(base, evaluate=False)), variable)
+
+# --------------------------------------------------------------
+# ------------- Dominio certificado ----------------------------
+# --------------------------------------------------------------
+DEFINIDA, INDEFINIDA, DUDOSA = "definida", "indefinida", "dudosa"
+
+def _estado(valor):
+    if valor is None:
+        return INDEFINIDA
+    return DUDOSA if valor.parcial else DEFINIDA
+
+def _clasificar(f, a, b, ancho_min, max_cajas):
+    # Bisección: cada hoja queda definida en toda la caja, indefinida en toda la
+    # caja, o dudosa si llegó al ancho mínimo (o se acabó el presupuesto).
+    hojas = []
+    pila = [(a, b)]
+    evaluadas = 0
+    while pila:
+        lo, hi = pila.pop()
+        estado = _estado(f(Intervalo(lo, hi)))
+        evaluadas += 1
+        if estado == DUDOSA and hi - lo > ancho_min and evaluadas < max_cajas:
+            medio = 0.5 * (lo + hi)
+            pila += [(medio, hi), (lo, medio)]  # primero la mitad izquierda: hojas en orden
+            continue
+        hojas.append([lo, hi, estado, True, True])  # los extremos cerrados pertenecen a la caja
+    return hojas
+
+def _punto_redondo(lo, hi):
+    # El número con menos decimales dentro de [lo, hi]: candidato a borde del dominio
+    medio = 0.5 * (lo + hi)
+    for decimales in range(0, 13):
+        p = round(medio, decimales)
+        if lo <= p <= hi:
+            return p
+    return medio
+
+def _resolver_bordes(f, hojas, ancho_borde):
+    # Una caja dudosa angosta es un borde del dominio: se evalúa f en un punto
+    # "redondo" de la caja y cada mitad toma el estado de su vecina exterior.
+    piezas = []
+    for i, (lo, hi, estado, _, _) in enumerate(hojas):
+        if estado != DUDOSA or hi - lo > ancho_borde:
+            piezas.append(hojas[i])
+            continue
+        izquierda = hojas[i - 1][2] if i > 0 else INDEFINIDA
+        derecha = hojas[i + 1][2] if i + 1 < len(hojas) else INDEFINIDA
+        p = _punto_redondo(lo, hi)
+        en_p = _estado(f(Intervalo(p, p)))
+        en_p = DEFINIDA if en_p == DEFINIDA else INDEFINIDA
+        if izquierda == derecha == en_p == DEFINIDA:
+            # Definida a ambos lados y en p: si la caja no está acotada hay un polo
+            # irracional (tan, 1/(x^2-2)) que se excluye en el centro; si está
+            # acotada, lo dudoso es solo sobreestimación de los intervalos.
+            valor = f(Intervalo(lo, hi))
+            if math.isinf(valor.lo) or math.isinf(valor.hi):
+                p, en_p = 0.5 * (lo + hi), INDEFINIDA
+        piezas.append([lo, p, izquierda if izquierda != DUDOSA else INDEFINIDA, True, False])
+        piezas.append([p, p, en_p, True, True])
+        piezas.append([p, hi, derecha if derecha != DUDOSA else INDEFINIDA, False, True])
+    return piezas
+
+def _numero(v):
+    if math.isinf(v):
+        return sp.oo if v > 0 else -sp.oo
+    if v == int(v) and abs(v) < 2 ** 53:
+        return sp.Integer(int(v))
+    if len(repr(v).partition(".")[2]) <= 3:
+        return sp.Rational(repr(v))  # 0.5 -> 1/2
+    return sp.Float(v, 15)
+
+def dominio_intervalos(expresion, variable, a=-20, b=20, niveles=30, max_cajas=20000):
+    # Devuelve (dominio, observaciones). Los tramos del dominio están verificados
+    # con aritmética de intervalos; sus bordes, con precisión (b-a)*2**-niveles.
+    f = compilar_intervalos(expresion, variable)
+    ancho_min = (b - a) * 2.0 ** -niveles
+    hojas = _clasificar(f, a, b, ancho_min, max_cajas)
+    observaciones = []
+    # Colas fuera de la ventana: se evalúan como una sola caja cada una
+    cola_izq = _estado(f(Intervalo(-INF, a)))
+    cola_der = _estado(f(Intervalo(b, INF)))
+    hojas = [[-INF, a, cola_izq, False, True]] + hojas + [[b, INF, cola_der, True, False]]
+    for nombre, estado in (("x < " + str(a), cola_izq), ("x > " + str(b), cola_der)):
+        if estado == DEFINIDA:
+            observaciones.append(f"Para {nombre} la función está definida en todo el tramo.")
+        elif estado == INDEFINIDA:
+            observaciones.append(f"Para {nombre} la función no está definida.")
+        else:
+            observaciones.append(f"Para {nombre} no se pudo verificar; se excluye.")
+    piezas = _resolver_bordes(f, hojas, 4 * ancho_min)
+
+    sin_verificar = [(lo, hi) for lo, hi, estado, _, _ in piezas if estado == DUDOSA and math.isfinite(lo)
+                     and math.isfinite(hi)]
+    if sin_verificar:
+        observaciones.append("No se pudo certificar (se excluye): " +
+                             ", ".join(f"[{lo:.6g}, {hi:.6g}]" for lo, hi in sin_verificar[:5]) +
+                             (" ..." if len(sin_verificar) > 5 else ""))
+
+    # Unir piezas definidas contiguas; un punto compartido excluido corta el tramo
+    tramos = []
+    actual = None
+    for lo, hi, estado, incluye_lo, incluye_hi in piezas:
+        if estado != DEFINIDA:
+            if actual:
+                tramos.append(actual)
+            actual = None
+            continue
+        if actual and actual[1] == lo and (actual[3] or incluye_lo):
+            actual = [actual[0], hi, actual[2], incluye_hi]
+        else:
+            if actual:
+                tramos.append(actual)
+            actual = [lo, hi, incluye_lo, incluye_hi]
+    if actual:
+        tramos.append(actual)
+    conjuntos = [sp.Interval(_numero(lo), _numero(hi), not incluye_lo or math.isinf(lo),
+                             not incluye_hi or math.isinf(hi)) for lo, hi, incluye_lo, incluye_hi in tramos]
+    # Los tramos ya están ordenados y son disjuntos: sin evaluar, Union no los
+    # compara de a pares (con cientos de tramos, como tan(x^2), eso tarda minutos)
+    if not conjuntos:
+        return sp.S.EmptySet, observaciones
+    if len(conjuntos) == 1:
+        return (sp.S.Reals if conjuntos[0] == sp.Interval(-sp.oo, sp.oo) else conjuntos[0]), observaciones
+    return sp.Union(*conjuntos, evaluate=False), observaciones
+
+# --------------------------------------------------------------
+# ------------- Recorrido por ramificación y acotación ---------
+# --------------------------------------------------------------
+def _con_valor_medio(expresion, variable):
+    # f(X) ⊆ f(c) + f'(X)·(X - c): cerca de un extremo converge mucho más rápido
+    # que la extensión natural, que sobreestima por la dependencia (x^2 - 4x).
+    f = compilar_intervalos(expresion, variable)
+    try:
+        df = compilar_intervalos(sp.diff(expresion, variable), variable)
+    except IntervaloNoSoportado:
+        return f
+    def evaluar(caja):
+        valor = f(caja)
+        if valor is None or valor.parcial or caja.lo == caja.hi \
+                or not (math.isfinite(caja.lo) and math.isfinite(caja.hi)):
+            return valor
+        c = 0.5 * (caja.lo + caja.hi)
+        centro, derivada = f(Intervalo(c, c)), df(caja)
+        if centro is None or derivada is None or centro.parcial or derivada.parcial:
+            return valor
+        medio = _suma(centro, _producto(derivada, _suma(caja, Intervalo(-c, -c))))
+        return Intervalo(max(valor.lo, medio.lo), min(valor.hi, medio.hi))
+    return evaluar
+
+def _regiones(expresion, variable, a, b):
+    # La ventana [a, b] en x y las colas con x = 1/t, t en [0, 1/b] (y x = -1/t):
+    # así una cola infinita es una caja finita que también se puede subdividir.
+    t = sp.Dummy('t', positive=True)
+    regiones = [(_con_valor_medio(expresion, variable), a, b)]
+    for signo, borde in ((1, b), (-1, a)):
+        cola = expresion.subs(variable, signo / t)
+        if expresion.is_rational_function(variable):
+            cola = sp.cancel(cola)  # sin esto, x/(x^2+1) en la cola daría [0, inf]
+        regiones.append((_con_valor_medio(cola, t), 0.0, abs(1.0 / borde)))
+    return regiones
+
+def _extremo(regiones, signo, tolerancia, ancho_min, max_cajas):
+    # Mínimo de signo*f. Devuelve (cota certificada, mejor valor alcanzado)
+    def acotar(f, lo, hi):
+        valor = f(Intervalo(lo, hi))
+        if valor is None:
+            return None
+        return valor.lo if signo > 0 else -valor.hi
+
+    mejor = INF
+    def sondear(f, lo, hi):
+        # valor en el centro de la caja (si está definida ahí): cota superior del mínimo
+        nonlocal mejor
+        medio = 0.5 * (lo + hi)
+        valor = f(Intervalo(medio, medio))
+        if valor is not None and not valor.parcial:
+            mejor = min(mejor, valor.hi if signo > 0 else -valor.lo)
+
+    cajas = []
+    for k, (f, lo, hi) in enumerate(regiones):
+        cota = acotar(f, lo, hi)
+        if cota is not None:
+            heapq.heappush(cajas, (cota, hi - lo, len(cajas), k, lo, hi))
+            sondear(f, lo, hi)
+    if not cajas:
+        return None, None
+    contador = len(cajas)
+    while True:
+        cota, _, _, k, lo, hi = heapq.heappop(cajas)
+        if cota >= mejor - tolerancia * max(1.0, abs(mejor)) or hi - lo <= ancho_min or contador >= max_cajas:
+            return cota, mejor
+        f = regiones[k][0]
+        medio = 0.5 * (lo + hi)
+        for sub_lo, sub_hi in ((lo, medio), (medio, hi)):
+            sub_cota = acotar(f, sub_lo, sub_hi)
+            contador += 1
+            if sub_cota is not None:
+                # a igual cota, primero la caja más angosta: con cotas infinitas (polos)
+                # se baja hasta el ancho mínimo en vez de abrir todas las cajas a la vez
+                heapq.heappush(cajas, (max(cota, sub_cota), sub_hi - sub_lo, contador, k, sub_lo, sub_hi))
+                sondear(f, sub_lo, sub_hi)
+        if not cajas:
+            return cota, mejor
+
+def recorrido_intervalos(expresion, variable, a=-20, b=20, tolerancia=1e-6, niveles=40, max_cajas=20000):
+    # Envolvente rigurosa del recorrido sobre todos los reales:
+    # devuelve (inf_cota, inf_alcanzado, sup_alcanzado, sup_cota), o None si
+    # la función no está definida en ningún punto.
+    regiones = _regiones(expresion, variable, a, b)
+    ancho_min = (b - a) * 2.0 ** -niveles
+    bajo, alcanzado_bajo = _extremo(regiones, 1, tolerancia, ancho_min, max_cajas)
+    if bajo is None:
+        return None
+    alto, alcanzado_alto = _extremo(regiones, -1, tolerancia, ancho_min, max_cajas)
+    return bajo, alcanzado_bajo, -alcanzado_alto, -alto
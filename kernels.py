@@ -0,0 +1,175 @@
+import ctypes
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import sympy as sp
+
+# Núcleos de evaluación de f(x) sobre mallas. Todos parten de sp.cse para no
+# recalcular subexpresiones repetidas; cambia cómo se ejecuta cada paso:
+#   numpy   : lambdify con cse (un arreglo temporal por operación)
+#   numexpr : cada paso en una sola pasada por bloques (si numexpr está instalado)
+#   c       : un bucle en C compilado con el compilador local; el .so queda en disco
+#   auto    : el mejor disponible (numexpr, luego c, luego numpy)
+# Si un backend no puede con la expresión se cae a numpy sin avisar.
+
+BACKENDS = ("numpy", "numexpr", "c", "auto")
+VARIABLE_ENTORNO = "ANALISIS_KERNEL"  # backend por defecto; lo heredan los procesos de lote.py
+BACKEND = os.environ.get(VARIABLE_ENTORNO, "numpy")
+CARPETA_KERNELS = os.environ.get("ANALISIS_KERNELS",
+                                 os.path.join(os.path.expanduser("~"), ".cache", "funciones", "kernels"))
+MAX_KERNELS = 256  # núcleos cargados en memoria
+
+_kernels = OrderedDict()  # (srepr, backend) -> (funcion, backend usado)
+_lock = threading.Lock()
+
+def fijar_backend(nombre):
+    global BACKEND
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {nombre} (opciones: {', '.join(BACKENDS)})")
+    BACKEND = nombre
+    os.environ[VARIABLE_ENTORNO] = nombre  # los procesos que se creen después usan el mismo
+
+def disponibles():
+    lista = ["numpy"]
+    if _numexpr() is not None:
+        lista.append("numexpr")
+    if _compilador() is not None:
+        lista.append("c")
+    return lista
+
+# --------------------------------------------------------------
+# ------------- Caché de núcleos -------------------------------
+# --------------------------------------------------------------
+def compilar_kernel(expresion, variable, backend=None):
+    # Devuelve (f, backend usado); f recibe un arreglo float64 y devuelve otro
+    # (complejo o escalar con numpy, igual que lambdify)
+    backend = backend or BACKEND
+    clave = (sp.srepr(expresion), backend)
+    with _lock:
+        if clave in _kernels:
+            _kernels.move_to_end(clave)
+            return _kernels[clave]
+    resultado = _construir(expresion, variable, backend)
+    with _lock:
+        _kernels[clave] = resultado
+        while len(_kernels) > MAX_KERNELS:
+            _kernels.popitem(last=False)
+    return resultado
+
+def _construir(expresion, variable, backend):
+    orden = {"auto": ("numexpr", "c"), "numexpr": ("numexpr",), "c": ("c",)}.get(backend, ())
+    # con números complejos (I) solo numpy reproduce la semántica de lambdify
+    if not expresion.has(sp.I) and expresion.has(variable):
+        pasos = _pasos_cse(expresion)
+        for opcion in orden:
+            try:
+                f = _kernel_numexpr(pasos, variable) if opcion == "numexpr" else _kernel_c(pasos, variable)
+                if f is not None:
+                    return f, opcion
+            except Exception:
+                continue
+    return sp.lambdify(variable, expresion, 'numpy', cse=True), "numpy"
+
+def _pasos_cse(expresion):
+    # Constantes (pi, E) como flotantes: numexpr no las conoce y en C da igual
+    expresion = expresion.xreplace({c: sp.Float(c, 17) for c in expresion.atoms(sp.NumberSymbol)})
+    reemplazos, (reducida,) = sp.cse(expresion, symbols=sp.numbered_symbols('t'))
+    return reemplazos, reducida
+
+# --------------------------------------------------------------
+# ------------- numexpr ----------------------------------------
+# --------------------------------------------------------------
+def _numexpr():
+    try:
+        import numexpr
+        return numexpr
+    except ImportError:
+        return None
+
+def _kernel_numexpr(pasos, variable):
+    numexpr = _numexpr()
+    if numexpr is None:
+        return None
+    from sympy.printing.lambdarepr import NumExprPrinter
+    impresora = NumExprPrinter()
+    reemplazos, reducida = pasos
+    programa = [(str(s), impresora._print(e)) for s, e in reemplazos] + [(None, impresora._print(reducida))]
+    nombre = str(variable)
+
+    def evaluar(valores_x):
+        locales = {nombre: valores_x}
+        for simbolo, texto in programa:
+            valor = numexpr.evaluate(texto, local_dict=locales)
+            if simbolo is None:
+                return valor
+            locales[simbolo] = valor
+
+    evaluar(np.linspace(-1.0, 1.0, 4))  # valida el programa ahora y no al graficar
+    return evaluar
+
+# --------------------------------------------------------------
+# ------------- C con el compilador local ----------------------
+# --------------------------------------------------------------
+def _impresora_c():
+    # La impresora de C de SymPy se importa solo si se usa el backend c
+    from sympy.printing.c import C99CodePrinter
+
+    class _ImpresoraC(C99CodePrinter):
+        # cbrt(x) es la raíz real de x < 0, pero lambdify/NumPy dan NaN para x**(1/3):
+        # se usa pow para que todos los backends coincidan
+        def _print_Pow(self, expr):
+            if expr.exp == sp.Rational(1, 3):
+                return f"pow({self._print(expr.base)}, 1.0/3.0)"
+            return super()._print_Pow(expr)
+
+    return _ImpresoraC({"strict": True})
+
+def _compilador():
+    return os.environ.get("CC") or shutil.which("cc") or shutil.which("gcc") or shutil.which("clang")
+
+def _codigo_c(pasos, variable):
+    impresora = _impresora_c()
+    reemplazos, reducida = pasos
+    lineas = ["#include <math.h>",
+              "void kernel(const double *entrada, double *salida, long n) {",
+              "    for (long i = 0; i < n; i++) {",
+              f"        const double {variable} = entrada[i];"]
+    lineas += [f"        const double {s} = {impresora.doprint(e)};" for s, e in reemplazos]
+    lineas += [f"        salida[i] = {impresora.doprint(reducida)};", "    }", "}", ""]
+    return "\n".join(lineas)
+
+def _kernel_c(pasos, variable):
+    compilador = _compilador()
+    if compilador is None:
+        return None
+    codigo = _codigo_c(pasos, variable)
+    # El .so se identifica por su código: otro proceso o sesión lo reutiliza sin compilar
+    huella = hashlib.sha1((compilador + "\n" + codigo).encode("utf-8")).hexdigest()[:20]
+    biblioteca = os.path.join(CARPETA_KERNELS, f"k_{huella}.so")
+    if not os.path.exists(biblioteca):
+        os.makedirs(CARPETA_KERNELS, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=CARPETA_KERNELS) as temporal:
+            fuente = os.path.join(temporal, "kernel.c")
+            salida = os.path.join(temporal, "kernel.so")
+            with open(fuente, "w") as archivo:
+                archivo.write(codigo)
+            subprocess.run([compilador, "-O2", "-shared", "-fPIC", "-o", salida, fuente, "-lm"],
+                           check=True, capture_output=True, timeout=60)
+            os.replace(salida, biblioteca)  # atómico: otro proceso nunca ve un .so a medias
+    funcion = ctypes.CDLL(biblioteca).kernel
+    arreglo = np.ctypeslib.ndpointer(dtype=np.float64, flags="C_CONTIGUOUS")
+    funcion.argtypes = [arreglo, arreglo, ctypes.c_long]
+    funcion.restype = None
+
+    def evaluar(valores_x):
+        xs = np.require(np.asarray(valores_x, dtype=np.float64), requirements="C")  # conserva la forma 0-d
+        ys = np.empty_like(xs)
+        funcion(xs.reshape(-1), ys.reshape(-1), xs.size)
+        return ys
+
+    return evaluar
@@ -0,0 +1,208 @@
+import argparse
+import json
+import math
+import os
+import queue
+import sys
+import time
+import analisis
+import kernels
+from analisis import ResultadoAnalisis, contexto_procesos, convertir_expresion, perfilarAnalisis
+from cache_disco import VARIABLE_ENTORNO
+from trazas import Traza, trazando
+
+# Analisis por lotes sin interfaz grafica: no importa tkinter ni customtkinter.
+# Uso: python lote.py funciones.txt > resultados.jsonl   (o por stdin: ... | python lote.py -)
+
+# --------------------------------------------------------------
+# ------------- Analisis de una funcion ------------------------
+# --------------------------------------------------------------
+def _numero_json(valor):
+    # JSON no admite NaN ni infinitos
+    return valor if math.isfinite(valor) else None
+
+def analizarTexto(texto_funcion, limite=None):
+    return analizarTextoResultado(texto_funcion, limite)[0]
+
+def analizarTextoResultado(texto_funcion, limite=None):
+    # Devuelve (registro, ResultadoAnalisis o None si hubo error)
+    registro = {"funcion": texto_funcion, "error": None}
+    traza = Traza()
+    resultado = None
+    try:
+        with trazando(traza):
+            expresion = convertir_expresion(texto_funcion)
+        resultado = ResultadoAnalisis(expresion, limite, traza)
+        registro.update(registroAnalisis(resultado))
+    except Exception as e:
+        registro["error"] = f"{type(e).__name__}: {e}"
+        resultado = None
+    # tiempos: resumen por etapa principal (ms); traza: subetapas, llamadas y caminos
+    etapas = traza.como_dict()["etapas"]
+    registro["tiempos"] = {etapa: etapas[etapa]["total_ms"] for etapa in
+                           ("conversion", "dominio", "monotonia", "recorrido", "intersecciones") if etapa in etapas}
+    registro["traza"] = etapas
+    return registro, resultado
+
+def registroAnalisis(resultado):
+    # Resultados de todas las etapas en forma de JSON (las calcula si hace falta)
+    return {
+        "expresion": str(resultado.expresion),
+        "dominio": str(resultado.dominio),
+        "pasos_dominio": resultado.pasos_dominio,
+        "recorrido": resultado.recorrido,
+        "intersecciones_x": resultado.xi,
+        "interseccion_y": _numero_json(resultado.y0),
+        "monotonia": _monotonia_json(resultado.monotonia),
+        "aproximado": sorted(resultado.aproximado),
+    }
+
+def _monotonia_json(monotonia):
+    # Los tramos llegan a -inf / inf: null en JSON
+    return {**monotonia,
+            "tramos": [[_numero_json(desde), _numero_json(hasta), signo] for desde, hasta, signo in monotonia["tramos"]],
+            "extremos": [[_numero_json(x), _numero_json(y), tipo] for x, y, tipo in monotonia["extremos"]],
+            "inflexion": [[_numero_json(x), _numero_json(y)] for x, y in monotonia["inflexion"]]}
+
+# --------------------------------------------------------------
+# ------------- Pool de procesos con tiempo limite -------------
+# --------------------------------------------------------------
+def _trabajador(identificador, tareas, resultados, limite, funcion, argumentos):
+    # Cada trabajador tiene su propia cola de tareas para que el proceso principal
+    # sepa que funcion esta analizando y pueda matarlo si se excede.
+    # funcion(texto, limite, *argumentos) devuelve el registro (analizarTexto por defecto).
+    while True:
+        tarea = tareas.get()
+        if tarea is None:
+            return
+        indice, texto = tarea
+        resultados.put((identificador, None)) # aviso de inicio: desde aqui corre el tiempo maximo
+        registro = funcion(texto, limite, *argumentos)
+        registro["indice"] = indice
+        resultados.put((identificador, registro))
+
+class PoolLote:
+    def __init__(self, procesos, tiempo_maximo, limite=None, funcion=analizarTexto, argumentos=()):
+        # funcion debe estar definida a nivel de modulo (se envia al proceso por nombre)
+        self.ctx = contexto_procesos()
+        self.tiempo_maximo = tiempo_maximo
+        self.limite = limite
+        self.funcion = funcion
+        self.argumentos = argumentos
+        self.resultados = self.ctx.Queue()
+        self.trabajadores = {}
+        for identificador in range(procesos):
+            self._iniciar(identificador)
+
+    def _iniciar(self, identificador):
+        # No son daemon: asi pueden lanzar los procesos de las etapas simbolicas
+        tareas = self.ctx.Queue()
+        proceso = self.ctx.Process(target=_trabajador, args=(identificador, tareas, self.resultados, self.limite,
+                                                             self.funcion, self.argumentos))
+        proceso.start()
+        self.trabajadores[identificador] = {"proceso": proceso, "tareas": tareas, "tarea": None, "inicio": None}
+
+    def _reemplazar(self, identificador):
+        trabajador = self.trabajadores[identificador]
+        trabajador["proceso"].kill()
+        trabajador["proceso"].join()
+        trabajador["tareas"].close()
+        self._iniciar(identificador)
+
+    def procesar(self, funciones):
+        # Generador: entrega cada registro apenas termina (no necesariamente en orden)
+        pendientes = iter(enumerate(funciones))
+        agotado = False
+        while True:
+            for identificador, trabajador in self.trabajadores.items():
+                if trabajador["tarea"] is None and not agotado:
+                    siguiente = next(pendientes, None)
+                    if siguiente is None:
+                        agotado = True
+                        break
+                    trabajador["tarea"] = siguiente
+                    trabajador["inicio"] = None
+                    trabajador["tareas"].put(siguiente)
+            ocupados = [t for t in self.trabajadores.values() if t["tarea"] is not None]
+            if agotado and not ocupados:
+                return
+            try:
+                identificador, registro = self.resultados.get(timeout=0.1)
+                if registro is None:
+                    self.trabajadores[identificador]["inicio"] = time.monotonic()
+                else:
+                    self.trabajadores[identificador]["tarea"] = None
+                    yield registro
+            except queue.Empty:
+                pass
+            ahora = time.monotonic()
+            for identificador, trabajador in list(self.trabajadores.items()):
+                if trabajador["inicio"] is not None and trabajador["tarea"] is not None \
+                        and ahora - trabajador["inicio"] > self.tiempo_maximo:
+                    indice, texto = trabajador["tarea"]
+                    self._reemplazar(identificador)
+                    yield {"indice": indice, "funcion": texto,
+                           "error": f"Tiempo máximo de {self.tiempo_maximo} s superado", "tiempos": {}, "traza": {}}
+
+    def cerrar(self):
+        for trabajador in self.trabajadores.values():
+            if trabajador["tarea"] is None:
+                trabajador["tareas"].put(None)
+            else:
+                trabajador["proceso"].kill()
+        for trabajador in self.trabajadores.values():
+            trabajador["proceso"].join()
+
+# --------------------------------------------------------------
+# ------------- Entrada / salida -------------------------------
+# --------------------------------------------------------------
+def leerFunciones(archivos):
+    # Una funcion por linea; se ignoran lineas vacias y comentarios con '#'
+    for nombre in archivos:
+        entrada = sys.stdin if nombre == "-" else open(nombre, encoding="utf-8")
+        try:
+            for linea in entrada:
+                linea = linea.strip()
+                if linea and not linea.startswith("#"):
+                    yield linea
+        finally:
+            if entrada is not sys.stdin:
+                entrada.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis por lotes de funciones f(x) (salida JSON lines).")
+    parser.add_argument("archivos", nargs="*", default=["-"], help="archivos con una funcion por linea ('-' = stdin)")
+    parser.add_argument("-p", "--procesos", type=int, default=contexto_procesos().cpu_count(), help="procesos en paralelo")
+    parser.add_argument("-t", "--tiempo-maximo", type=float, default=30.0, help="segundos maximos por funcion")
+    parser.add_argument("-l", "--limite-simbolico", type=float, default=analisis.LIMITE_SIMBOLICO,
+                        help="segundos por etapa simbolica antes de usar el camino numerico")
+    parser.add_argument("-o", "--salida", help="archivo de salida (por defecto stdout)")
+    parser.add_argument("--sin-cache", action="store_true", help="no leer ni escribir la cache persistente en disco")
+    parser.add_argument("--kernel", choices=kernels.BACKENDS, default=kernels.BACKEND,
+                        help="como evaluar f(x) sobre mallas (numexpr y c solo si estan disponibles)")
+    parser.add_argument("--perfilar", metavar="FUNCION",
+                        help="analizar solo FUNCION bajo cProfile (en linea, sin limite) e imprimir el perfil")
+    args = parser.parse_args(argv)
+    if args.sin_cache:
+        os.environ[VARIABLE_ENTORNO] = "0" # lo heredan los procesos trabajadores
+    kernels.fijar_backend(args.kernel)
+
+    if args.perfilar:
+        resultado, informe = perfilarAnalisis(convertir_expresion(args.perfilar))
+        print(resultado.traza.resumen())
+        print(informe)
+        return
+
+    salida = open(args.salida, "w", encoding="utf-8") if args.salida else sys.stdout
+    pool = PoolLote(max(1, args.procesos), args.tiempo_maximo, args.limite_simbolico)
+    try:
+        for registro in pool.procesar(leerFunciones(args.archivos)):
+            salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            salida.flush()
+    finally:
+        pool.cerrar()
+        if salida is not sys.stdout:
+            salida.close()
+
+if __name__ == "__main__":
+    main()
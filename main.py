@@ -1,7 +1,22 @@
+import json
+import sys
+import time
+INICIO = time.perf_counter() # antes de cualquier import de la aplicacion
 from ui import App
-def main():
-    app = App()
+
+# Uso: python main.py [--medir-arranque]
+# Con --medir-arranque la ventana se cierra sola al terminar la carga e imprime los
+# tiempos de arranque en ms: ventana_ms (ventana visible), modulos_ms (importar SymPy,
+# NumPy y Matplotlib en segundo plano) y listo_ms (se puede analizar).
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    medir = "--medir-arranque" in argv
+    app = App(inicio=INICIO, cerrar_al_cargar=medir)
+    app.update() # dibujar la ventana ya, sin esperar al loop
+    app.marcarArranque("ventana_ms")
     app.mainloop()
+    if medir:
+        print(json.dumps(app.arranque))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
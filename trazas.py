@@ -0,0 +1,105 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Instrumentación liviana del análisis: tiempos, número de llamadas y camino
+# tomado (simbólico / numérico) por etapa. Si no hay una traza activa en el
+# hilo, medir() no registra nada y su costo es despreciable.
+
+_hilo = threading.local()  # traza activa en este hilo
+
+# --------------------------------------------------------------
+# ------------- Traza de un análisis ---------------------------
+# --------------------------------------------------------------
+class Medicion:
+    __slots__ = ("nombre", "ruta")
+
+    def __init__(self, nombre, ruta=None):
+        self.nombre = nombre
+        self.ruta = ruta  # "simbólico", "numérico", ... lo fija la etapa al terminar
+
+class Traza:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.etapas = {}  # nombre -> {"llamadas", "total_ms", "max_ms", "rutas"}
+        self.eventos = []  # en orden de término: (nombre, desde_ms, duracion_ms, ruta)
+        self._lock = threading.Lock()
+
+    def registrar(self, nombre, desde, duracion, ruta=None):
+        # desde y duracion en segundos; desde relativo al inicio de la traza
+        ms = duracion * 1000
+        with self._lock:
+            etapa = self.etapas.setdefault(nombre, {"llamadas": 0, "total_ms": 0.0, "max_ms": 0.0, "rutas": {}})
+            etapa["llamadas"] += 1
+            etapa["total_ms"] += ms
+            etapa["max_ms"] = max(etapa["max_ms"], ms)
+            if ruta:
+                etapa["rutas"][ruta] = etapa["rutas"].get(ruta, 0) + 1
+            self.eventos.append((nombre, round(desde * 1000, 3), round(ms, 3), ruta))
+
+    def incorporar(self, eventos, desplazamiento=0.0):
+        # Agrega eventos medidos en otro proceso (etapas simbólicas con límite)
+        for nombre, desde_ms, duracion_ms, ruta in eventos:
+            self.registrar(nombre, desplazamiento + desde_ms / 1000, duracion_ms / 1000, ruta)
+
+    def como_dict(self):
+        with self._lock:
+            return {
+                "etapas": {nombre: {"llamadas": e["llamadas"], "total_ms": round(e["total_ms"], 3),
+                                    "max_ms": round(e["max_ms"], 3), "rutas": dict(e["rutas"])}
+                           for nombre, e in self.etapas.items()},
+                "eventos": [list(evento) for evento in self.eventos],
+            }
+
+    def resumen(self, etapas=None):
+        # Texto corto para la interfaz: una línea por etapa principal
+        lineas = []
+        with self._lock:
+            for nombre, e in self.etapas.items():
+                if etapas is not None and nombre not in etapas:
+                    continue
+                rutas = ", ".join(e["rutas"])
+                llamadas = f" x{e['llamadas']}" if e["llamadas"] > 1 else ""
+                lineas.append(f"{nombre}: {e['total_ms']:.1f} ms{llamadas}" + (f" ({rutas})" if rutas else ""))
+        return "\n".join(lineas)
+
+def traza_actual():
+    return getattr(_hilo, "traza", None)
+
+@contextmanager
+def trazando(traza):
+    # Activa la traza en el hilo actual mientras dure el bloque (se puede anidar)
+    anterior = traza_actual()
+    _hilo.traza = traza
+    try:
+        yield traza
+    finally:
+        _hilo.traza = anterior
+
+@contextmanager
+def medir(nombre, ruta=None):
+    medicion = Medicion(nombre, ruta)
+    traza = traza_actual()
+    if traza is None:
+        yield medicion
+        return
+    inicio = time.perf_counter()
+    try:
+        yield medicion
+    finally:
+        traza.registrar(nombre, inicio - traza.inicio, time.perf_counter() - inicio, medicion.ruta)
+
+# --------------------------------------------------------------
+# ------------- Perfil con cProfile (opcional) -----------------
+# --------------------------------------------------------------
+def perfilar(funcion, *args, orden="cumulative", lineas=30):
+    # Ejecuta funcion(*args) bajo cProfile y devuelve (valor, informe de texto).
+    # Solo ve el proceso actual: las etapas simbólicas deben correr en línea.
+    perfil = cProfile.Profile()
+    valor = perfil.runcall(funcion, *args)
+    salida = io.StringIO()
+    pstats.Stats(perfil, stream=salida).sort_stats(orden).print_stats(lineas)
+    return valor, salida.getvalue()
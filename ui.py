@@ -1,14 +1,35 @@
 import customtkinter as ctk
-from matplotlib import pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from tkinter import messagebox
-from sympy import lambdify, symbols, zoo
-from analisis import convertir_expresion, determinarDominio, calcularRecorrido, calcularIntersecciones
-from grafica import graficarFuncion
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+import time
+
+# --------------------------------------------------------------
+# ------------- Carga diferida de SymPy y Matplotlib -----------
+# --------------------------------------------------------------
+# SymPy, NumPy y Matplotlib tardan alrededor de un segundo en importarse: la ventana
+# se muestra antes y estos modulos se cargan en el hilo trabajador (cargarModulos)
+analisis = grafica = sp = Figure = FigureCanvasTkAgg = NavigationToolbar2Tk = None
+
+def cargarModulos():
+    # Devuelve los milisegundos que tomo importar todo
+    global analisis, grafica, sp, Figure, FigureCanvasTkAgg, NavigationToolbar2Tk
+    inicio = time.perf_counter()
+    import sympy as sp
+    import analisis
+    import grafica
+    from matplotlib.figure import Figure # sin pyplot: no hace falta su gestor de figuras
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    return (time.perf_counter() - inicio) * 1000
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, inicio=None, cerrar_al_cargar=False):
         super().__init__()
+        # Tiempos de arranque en ms desde inicio (ver main.py --medir-arranque)
+        self._inicio = time.perf_counter() if inicio is None else inicio
+        self._cerrar_al_cargar = cerrar_al_cargar
+        self.arranque = {}
         self.title("Analizador y Graficador de Funciones")
         self.geometry("1200x600")
         self.resizable(False, False)
@@ -40,7 +61,7 @@ class App(ctk.CTk):
         self.frame_evaluar.grid(row=1, column=0, sticky="nsew", padx=15, pady=15)
         self.label_evaluar = ctk.CTkLabel(self.frame_evaluar, text="Evaluar en x =", font=ctk.CTkFont(size=14, weight="bold"))
         self.label_evaluar.pack(side="left", padx=(0, 5))
-        self.input_evaluar = ctk.CTkEntry(self.frame_evaluar, width=700)
+        self.input_evaluar = ctk.CTkEntry(self.frame_evaluar, width=700, placeholder_text="1; 2,5; pi/4   o un rango desde:hasta:paso, p. ej. -2:2:0,5")
         self.input_evaluar.pack(expand=True, pady=10)
 
         # Botones
@@ -48,8 +69,18 @@ class App(ctk.CTk):
         self.frame_boton.grid(row=0, column=1, rowspan=2, sticky="", padx=5, pady=5)
         self.button_funcion = ctk.CTkButton(self.frame_boton, text="Calcular", width=200, height=40, command=lambda: self.comprobarErrores(self.input.get()))
         self.button_funcion.pack(expand=True, pady=10)
-        self.button_evaluar = ctk.CTkButton(self.frame_boton, text="Evaluar", width=200, height=40)
+        self.button_evaluar = ctk.CTkButton(self.frame_boton, text="Evaluar", width=200, height=40, command=lambda: self.evaluarValores(self.input_evaluar.get()))
         self.button_evaluar.pack(expand=True, pady=10)
+        self.check_pasos = ctk.CTkCheckBox(self.frame_boton, text="Paso a paso al evaluar")
+        self.check_pasos.pack(expand=True, pady=(0, 5))
+        self.switch_vivo = ctk.CTkSwitch(self.frame_boton, text="Vista previa en vivo")
+        self.switch_vivo.pack(expand=True, pady=(0, 10))
+        self._controles = (self.button_funcion, self.button_evaluar, self.check_pasos, self.switch_vivo) # activos al terminar la carga
+
+        # Vista previa mientras se escribe (esperas programadas con after)
+        self._vista_pendiente = None
+        self._completo_pendiente = None
+        self.input.bind("<KeyRelease>", self.alEscribir)
 
         # Elementos para el analisis
         self.frame_analisis = ctk.CTkFrame(self)
@@ -63,65 +94,397 @@ class App(ctk.CTk):
         self.textbox_analisis = ctk.CTkTextbox(self.frame_analisis, height=200, width=300)
         self.textbox_analisis.pack(pady=10, padx=10, fill="both", expand=True)
         
-        # Elementos para la grafica
-        self.fig, self.ax = plt.subplots(figsize=(5,4))
-        self.ax.grid(True)
-        
+        # Elementos para la grafica (la figura se arma en crearGrafica, al terminar la carga)
         self.frame_grafica = ctk.CTkFrame(self)
         self.frame_grafica.grid(row=1, column=1, sticky="nsew", padx=(5,10), pady=(0,10))
+        self.label_cargando = ctk.CTkLabel(self.frame_grafica, text="Cargando el motor de análisis...")
+        self.label_cargando.pack(expand=True)
+        self._remuestreo_pendiente = None
+
+        # Ultimo resultado de analisis mostrado
+        self.resultado = None
+        self.comparacion = None # modo de varias funciones (analisis.Comparacion)
+        self.ventana_tabla = None # tabla de valores del boton Evaluar
+
+        # Analisis en segundo plano: un solo hilo trabajador, los resultados vuelven
+        # al loop de Tk por una cola que se revisa con after()
+        self._ejecutor = ThreadPoolExecutor(max_workers=1)
+        # Los datos de la grafica (muestreo, teselas, cruces) en otro hilo: un pan no
+        # espera a que terminen las etapas simbolicas y Tk solo dibuja
+        self._ejecutor_grafica = ThreadPoolExecutor(max_workers=1)
+        self._eventos = queue.Queue()
+        self._trabajo = 0 # identificador del analisis vigente
+        self._cancelar = None # Event del analisis vigente
+        self._revisando = False
+        self._pendientes = [] # tareas enviadas al trabajador que aun no terminan
+
+        # La primera tarea del trabajador es importar lo pesado; hasta entonces
+        # los controles quedan desactivados
+        for control in self._controles:
+            control.configure(state="disabled")
+        self._carga = self._ejecutor.submit(cargarModulos)
+        self.after(50, self._esperarCarga)
+
+    def _esperarCarga(self):
+        if not self._carga.done():
+            self.after(50, self._esperarCarga)
+            return
+        try:
+            self.arranque["modulos_ms"] = round(self._carga.result(), 1)
+        except Exception as e:
+            messagebox.showerror("Error al iniciar:", f"No se pudo cargar el motor de análisis: {e}")
+            self.destroy()
+            return
+        self.crearGrafica()
+        for control in self._controles:
+            control.configure(state="normal")
+        self.marcarArranque("listo_ms")
+        if self._cerrar_al_cargar:
+            self.destroy()
+
+    def marcarArranque(self, nombre):
+        self.arranque[nombre] = round((time.perf_counter() - self._inicio) * 1000, 1)
+
+    def crearGrafica(self):
+        self.label_cargando.destroy()
+        self.fig = Figure(figsize=(5,4))
+        self.ax = self.fig.add_subplot()
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame_grafica)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.frame_grafica, pack_toolbar=False) # pan y zoom
+        self.toolbar.pack(side="bottom", fill="x")
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        grafica.inicializarGrafica(self) # artistas persistentes: cada analisis solo actualiza sus datos
+
+        # Pan/zoom: al cambiar el intervalo visible se remuestrea (con espera para no recalcular en cada paso)
+        self.ax.callbacks.connect("xlim_changed", lambda ax: self.programarRemuestreo())
+        self.canvas.mpl_connect("scroll_event", self.zoomRueda)
     
     # --------------------------------------------------------------
     # ------------- Comprueba errores en la funcion ----------------
     # --------------------------------------------------------------
     def comprobarErrores(self, texto_funcion):
-        if texto_funcion.strip() == "": # Verificar si la funcion esta vacia
-            messagebox.showerror("Error en la función:", "La función no puede estar vacía.") 
+        expresiones, error = self.validarFunciones(texto_funcion)
+        if error is not None:
+            messagebox.showerror("Error en la función:", error)
             return None
         
+        # Analizar en segundo plano (resultado memoizado: ninguna etapa se resuelve dos veces)
+        if len(expresiones) == 1:
+            self.lanzarAnalisis(expresiones[0])
+        else:
+            self.lanzarComparacion(expresiones)
+
+
+    # Varias funciones separadas por ";" (la coma es decimal): (expresiones, None) o (None, error)
+    def validarFunciones(self, texto_funciones):
+        textos = texto_funciones.split(";")
+        if len(textos) == 1:
+            expresion, error = self.validarFuncion(texto_funciones)
+            return (None, error) if error is not None else ([expresion], None)
+        textos = [texto for texto in textos if texto.strip()] # permite un ";" al final
+        if len(textos) > analisis.MAX_FUNCIONES:
+            return None, f"Se pueden comparar hasta {analisis.MAX_FUNCIONES} funciones."
+        expresiones = []
+        for i, texto in enumerate(textos):
+            expresion, error = self.validarFuncion(texto)
+            if error is not None:
+                return None, f"f{i + 1}: {error}"
+            expresiones.append(expresion)
+        return expresiones, None
+
+
+    # Devuelve (expresion, None) o (None, mensaje de error); no muestra nada en pantalla
+    def validarFuncion(self, texto_funcion):
+        if texto_funcion.strip() == "": # Verificar si la funcion esta vacia
+            return None, "La función no puede estar vacía."
+        
         if "=" in texto_funcion: # Verificar si la funcion tiene igualdades
-            messagebox.showerror("Error en la función:", "La función no puede contener igualdades.")
-            return None
+            return None, "La función no puede contener igualdades."
         
         try:
-            expresion = convertir_expresion(texto_funcion) # Convertir la funcion a una expresion de SymPy
+            expresion = analisis.convertir_expresion_cacheada(texto_funcion) # Convertir la funcion a una expresion de SymPy
         except Exception as e:
-            messagebox.showerror("Error en la función:", f"Expresión inválida: {e}")
-            return None
+            return None, f"Expresión inválida: {e}"
 
 
         if expresion.is_constant(): # Verificar si la funcion es constante
             if expresion.simplify() == 0: # Verificar si la funcion es cero
-                messagebox.showerror("Error en la función:", "La función no puede ser cero.") 
-                return None
+                return None, "La función no puede ser cero."
         
             
         # Verificar si la funcion tiene variables distintas a x
-        variable_x = symbols('x')
         variables_en_funcion = expresion.free_symbols
-        if variables_en_funcion and variables_en_funcion != {variable_x}:
-            messagebox.showerror("Error en la función:", "La función solo puede contener la variable 'x'.")
-            return None
+        if variables_en_funcion and variables_en_funcion != {analisis.x}:
+            return None, "La función solo puede contener la variable 'x'."
 
 
-        if expresion == zoo or expresion.has(zoo): # Verificar si la funcion tiene infinitos
-            messagebox.showerror("Error en la función:", "La función no puede tener infinitos o divisiones por 0.")
-            return None
+        if expresion == sp.zoo or expresion.has(sp.zoo): # Verificar si la funcion tiene infinitos
+            return None, "La función no puede tener infinitos o divisiones por 0."
         
-        
-        # Crear la funcion numerica
+        return expresion, None
+
+
+    # --------------------------------------------------------------
+    # ------------- Vista previa en vivo ---------------------------
+    # --------------------------------------------------------------
+    def alEscribir(self, evento=None):
+        # Cada tecla reinicia las dos esperas: la vista previa (parseo + grafica
+        # vectorizada) sale rapido y el analisis simbolico solo cuando se deja de escribir
+        if not self.switch_vivo.get():
+            return
+        for pendiente in (self._vista_pendiente, self._completo_pendiente):
+            if pendiente is not None:
+                self.after_cancel(pendiente)
+        self._vista_pendiente = self.after(250, self.vistaPrevia)
+        self._completo_pendiente = self.after(1200, self.analisisEnReposo)
+
+    def vistaPrevia(self):
+        self._vista_pendiente = None
+        expresiones, error = self.validarFunciones(self.input.get())
+        if error is not None:
+            self.textbox_analisis.delete("0.0", "end")
+            self.textbox_analisis.insert("0.0", f"Vista previa: {error}\n")
+            return
+        if expresiones == self.expresionesVigentes():
+            return
+        # El texto cambio: el analisis que estuviera en curso ya no sirve
+        if self._cancelar is not None:
+            self._cancelar.set()
+        self._trabajo += 1
+        if len(expresiones) == 1:
+            self.comparacion = None
+            self.resultado = analisis.analizar(expresiones[0])
+            self.mostrarResultado(self.resultado) # lo que ya este en cache aparece de inmediato
+        else:
+            self.resultado = None
+            self.comparacion = analisis.Comparacion(expresiones)
+            self.mostrarComparacion(self.comparacion)
+        self.pedirGrafica(inicial=True)
+
+    def expresionesVigentes(self):
+        if self.comparacion is not None:
+            return self.comparacion.expresiones
+        return [self.resultado.expresion] if self.resultado is not None else []
+
+    def analisisEnReposo(self):
+        self._completo_pendiente = None
+        expresiones, error = self.validarFunciones(self.input.get())
+        if error is None:
+            self.comprobarErrores(self.input.get())
+
+    # --------------------------------------------------------------
+    # ------------- Analisis en segundo plano ----------------------
+    # --------------------------------------------------------------
+    def lanzarAnalisis(self, expresion):
+        # Un nuevo analisis cancela el anterior: solo importa el ultimo pedido
+        if self._cancelar is not None:
+            self._cancelar.set()
+        self._trabajo += 1
+        self._cancelar = threading.Event()
+        self.comparacion = None
+        self.resultado = analisis.analizar(expresion)
+        self.mostrarAnalisis(expresion, None, None, None, None, None)
+        self.enviarTarea(self._analizarEnSegundoPlano, self._trabajo, self.resultado, self._cancelar)
+
+    def lanzarComparacion(self, expresiones):
+        # Varias funciones: malla comun y cruces primero (baratos), luego el analisis
+        # simbolico de todas a la vez (Comparacion.calcular, un hilo por funcion)
+        if self._cancelar is not None:
+            self._cancelar.set()
+        self._trabajo += 1
+        self._cancelar = threading.Event()
+        self.resultado = None
+        self.comparacion = analisis.Comparacion(expresiones)
+        self.mostrarComparacion(self.comparacion)
+        self.enviarTarea(self._compararEnSegundoPlano, self._trabajo, self.comparacion, self._cancelar)
+
+    def _compararEnSegundoPlano(self, trabajo, comparacion, cancelar):
+        analisis.fijar_cancelacion(cancelar)
         try:
-            funcion_numerica = lambdify(variable_x, expresion, 'math')
-            dominio_resultado, pasos_dominio = determinarDominio(expresion) # Determinar el dominio de la funcion
-            recorrido_resultado = calcularRecorrido(expresion) # Calcular recorrido aproximado
-            xi, y0 = calcularIntersecciones(expresion) # Calcular intersecciones
-            self.mostrarAnalisis(expresion, dominio_resultado, pasos_dominio, recorrido_resultado, xi, y0) # Mostrar el analisis en la interfaz
-            graficarFuncion(self, funcion_numerica, expresion) # Pasar tambien la expresion simbolica
+            comparacion.muestra
+            comparacion.cruces()
+            self._eventos.put((trabajo, "muestra_comparacion", None))
+            comparacion.calcular(lambda indice, etapa: self._eventos.put((trabajo, "etapa_comparacion", etapa)), cancelar)
+        except analisis.AnalisisCancelado:
+            return
         except Exception as e:
-            messagebox.showerror("Error en la función:", f"No se pudo crear la función: {e}")
-            return None
+            self._eventos.put((trabajo, "error", e))
+        finally:
+            analisis.fijar_cancelacion(None)
+
+    def enviarTarea(self, funcion, *args, ejecutor=None):
+        # Tarea para el hilo trabajador; sus eventos se revisan hasta que termine
+        self._pendientes.append((ejecutor or self._ejecutor).submit(funcion, *args))
+        if not self._revisando:
+            self._revisando = True
+            self.after(50, self._revisarEventos)
+
+    def _analizarEnSegundoPlano(self, trabajo, resultado, cancelar):
+        # Corre en el hilo trabajador: no toca widgets, solo publica cada etapa al terminar
+        analisis.fijar_cancelacion(cancelar)
+        try:
+            # Primero la grafica (barata), luego las etapas simbolicas
+            # (la monotonia antes que el recorrido: este sale de los extremos si SymPy no puede)
+            for etapa, atributo in (("muestra", "muestra"), ("dominio", "dominio"), ("monotonia", "monotonia"),
+                                    ("recorrido", "recorrido"), ("intersecciones", "xi")):
+                if cancelar.is_set():
+                    return
+                getattr(resultado, atributo)
+                self._eventos.put((trabajo, etapa, None))
+        except analisis.AnalisisCancelado:
+            return
+        except Exception as e:
+            self._eventos.put((trabajo, "error", e))
+        finally:
+            analisis.fijar_cancelacion(None)
+        self._eventos.put((trabajo, "fin", None))
+
+    def pedirGrafica(self, inicial=False):
+        # Los datos de la grafica se calculan en el hilo de la grafica y vuelven como
+        # evento "grafica". inicial: ventana de partida (funcion nueva); si no, la vista actual
+        objetivo = self.comparacion if self.comparacion is not None else self.resultado
+        if objetivo is None:
+            return
+        en_inicio = self.vista == (-10.0, 10.0) and tuple(self.ax.get_xlim()) == self.vista
+        vista = None if inicial or en_inicio else tuple(self.ax.get_xlim())
+        self.enviarTarea(self._graficarEnSegundoPlano, self._trabajo, objetivo, vista, inicial,
+                         ejecutor=self._ejecutor_grafica)
+
+    def _graficarEnSegundoPlano(self, trabajo, objetivo, vista, inicial):
+        try:
+            if isinstance(objetivo, analisis.Comparacion):
+                datos = grafica.datosComparacion(objetivo, vista)
+            else:
+                datos = grafica.datosFuncion(objetivo, vista)
+        except Exception as e:
+            self._eventos.put((trabajo, "error", e))
+            return
+        self._eventos.put((trabajo, "grafica", (objetivo, datos, inicial)))
+
+    def _dibujarGrafica(self, objetivo, datos, inicial):
+        # En el loop de Tk: solo se pasan los datos ya calculados a los artistas
+        if objetivo is not self.comparacion and objetivo is not self.resultado:
+            return
+        if datos["vista"] is not None and datos["vista"] != tuple(self.ax.get_xlim()):
+            return # la vista cambio mientras tanto: ya hay otro pedido en camino
+        comparacion = objetivo is self.comparacion
+        if datos["vista"] is None:
+            (grafica.graficarComparacion if comparacion else grafica.graficarFuncion)(self, objetivo, datos)
+        else:
+            (grafica.graficarVistaComparacion if comparacion else grafica.graficarVista)(self, objetivo, datos)
+        if inicial:
+            self.toolbar.update() # reinicia el historial de vistas del toolbar
+
+    def _revisarEventos(self):
+        # Corre en el loop de Tk: aplica lo que el trabajador haya terminado
+        while True:
+            try:
+                trabajo, etapa, datos = self._eventos.get_nowait()
+            except queue.Empty:
+                break
+            if trabajo != self._trabajo: # resultado de un analisis ya reemplazado
+                continue
+            resultado = self.resultado
+            if etapa == "error":
+                messagebox.showerror("Error en la función:", f"No se pudo crear la función: {datos}")
+            elif etapa == "error_evaluacion":
+                messagebox.showerror("Error al evaluar:", f"No se pudo evaluar: {datos}")
+            elif etapa == "evaluacion":
+                self.mostrarEvaluacion(datos)
+            elif etapa == "grafica":
+                self._dibujarGrafica(*datos)
+            elif etapa == "muestra_comparacion":
+                self.pedirGrafica(inicial=True)
+                self.mostrarComparacion(self.comparacion)
+            elif etapa == "etapa_comparacion":
+                if datos == "dominio":
+                    self.refrescarGrafica() # cortes de la curva en sus singularidades
+                self.mostrarComparacion(self.comparacion)
+            elif etapa == "muestra":
+                self.pedirGrafica(inicial=True) # funcion nueva: vuelve a la ventana inicial
+            elif etapa in ("dominio", "monotonia", "intersecciones"):
+                self.refrescarGrafica() # con el dominio, la muestra agrega los cortes en sus singularidades
+            if etapa in ("dominio", "monotonia", "recorrido", "intersecciones"):
+                self.mostrarResultado(resultado)
+        # una tarea terminada ya dejo todos sus eventos en la cola
+        self._pendientes = [tarea for tarea in self._pendientes if not tarea.done()]
+        if not self._pendientes and self._eventos.empty():
+            self._revisando = False
+        else:
+            self.after(50, self._revisarEventos)
+
+    def mostrarResultado(self, resultado):
+        # Muestra las etapas ya calculadas; las demas aparecen como pendientes
+        dominio = pasos = recorrido = xi = y0 = monotonia = None
+        if resultado.calculado("dominio"):
+            dominio, pasos = resultado.dominio, resultado.pasos_dominio
+        if resultado.calculado("monotonia"):
+            monotonia = resultado.monotonia
+        if resultado.calculado("recorrido"):
+            recorrido = resultado.recorrido
+        if resultado.calculado("intersecciones"):
+            xi, y0 = resultado.xi, resultado.y0
+        self.mostrarAnalisis(resultado.expresion, dominio, pasos, recorrido, xi, y0, monotonia)
+        if None not in (dominio, recorrido, xi, monotonia):
+            # Tiempo y camino (simbolico / numerico) de cada etapa, para ver cual es la lenta
+            etapas = [e for e in resultado.traza.etapas if not e.startswith("tesela.")]
+            self.textbox_analisis.insert("end", f"\nTiempos del análisis:\n{resultado.traza.resumen(etapas)}\n")
+
+    def mostrarComparacion(self, comparacion):
+        # Resumen de cada funcion con lo ya calculado y los cruces entre pares
+        self.textbox_analisis.delete("0.0", "end")
+        for i, resultado in enumerate(comparacion.resultados):
+            dominio = resultado.dominio if resultado.calculado("dominio") else "calculando..."
+            recorrido = resultado.recorrido if resultado.calculado("recorrido") else "calculando..."
+            if resultado.calculado("intersecciones"):
+                xi = ", ".join(f"({x_val:.3f}, 0)" for x_val in resultado.xi[:5]) or "no hay en [-10,10]"
+            else:
+                xi = "calculando..."
+            self.textbox_analisis.insert("end", f"f{i + 1}(x) = {resultado.expresion}\n")
+            self.textbox_analisis.insert("end", f"  Dominio: {dominio}\n  Recorrido: {recorrido}\n  Eje X: {xi}\n\n")
+        self.textbox_analisis.insert("end", "Cruces entre funciones en [-10,10] (f = g):\n")
+        if not comparacion.calculado("cruces"):
+            self.textbox_analisis.insert("end", "calculando...\n")
+            return
+        for i, j, puntos in comparacion.cruces():
+            lista = ", ".join(f"({x_val:.3f}, {y_val:.3f})" for x_val, y_val in puntos[:5])
+            mas = f" y {len(puntos) - 5} más" if len(puntos) > 5 else ""
+            self.textbox_analisis.insert("end", f"• f{i + 1} = f{j + 1}: {lista + mas if puntos else 'no se cruzan'}\n")
+
+    # --------------------------------------------------------------
+    # ------------- Pan / zoom de la grafica -----------------------
+    # --------------------------------------------------------------
+    def programarRemuestreo(self):
+        if (self.resultado is None and self.comparacion is None) or tuple(self.ax.get_xlim()) == self.vista:
+            return # cambio hecho por la propia grafica
+        if self._remuestreo_pendiente is not None:
+            self.after_cancel(self._remuestreo_pendiente)
+        self._remuestreo_pendiente = self.after(150, self.refrescarGrafica)
+
+    def refrescarGrafica(self):
+        self._remuestreo_pendiente = None
+        if self.comparacion is None and (self.resultado is None or not self.resultado.calculado("muestra")):
+            return
+        self.pedirGrafica()
+
+    def zoomRueda(self, evento):
+        # Zoom con la rueda del mouse centrado en el cursor
+        if evento.inaxes is not self.ax:
+            return
+        factor = 1 / 1.2 if evento.button == "up" else 1.2
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        self.ax.set_xlim(evento.xdata - (evento.xdata - x0) * factor, evento.xdata + (x1 - evento.xdata) * factor)
+        self.ax.set_ylim(evento.ydata - (evento.ydata - y0) * factor, evento.ydata + (y1 - evento.ydata) * factor)
+        self.canvas.draw_idle()
+
+    def destroy(self):
+        if self._cancelar is not None:
+            self._cancelar.set()
+        self._ejecutor.shutdown(wait=False, cancel_futures=True)
+        self._ejecutor_grafica.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
     
     
     # --------------------------------------------------------------
@@ -133,36 +496,97 @@ class App(ctk.CTk):
             return None
         
         try:
-            valor_evaluar = float(texto_evaluar) # Convertir el texto a un numero
-            return valor_evaluar
-        except ValueError:
-            messagebox.showerror("Error al evaluar:", "El valor a evaluar debe ser un número real.")
+            return analisis.leer_valores(texto_evaluar) # Valores y rangos a numeros de SymPy
+        except ValueError as e:
+            messagebox.showerror("Error al evaluar:", str(e))
             return None
+
+    # --------------------------------------------------------------
+    # ------------- Tabla de valores (boton Evaluar) ---------------
+    # --------------------------------------------------------------
+    def evaluarValores(self, texto_evaluar):
+        expresiones, error = self.validarFunciones(self.input.get())
+        if error is not None:
+            messagebox.showerror("Error en la función:", error)
+            return
+        valores = self.erroresEvaluar(texto_evaluar)
+        if valores is None:
+            return
+        # Se evalua sobre el analisis de las funciones escritas (si cambiaron, se lanza primero):
+        # la tabla usa su dominio y su nucleo compilado, y queda detras en la cola del trabajador
+        if expresiones != self.expresionesVigentes() or self._cancelar is None or self._cancelar.is_set():
+            self.comprobarErrores(self.input.get())
+        resultados = self.comparacion.resultados if self.comparacion is not None else [self.resultado]
+        self.enviarTarea(self._evaluarEnSegundoPlano, self._trabajo, resultados, valores,
+                         bool(self.check_pasos.get()), self._cancelar)
+
+    def _evaluarEnSegundoPlano(self, trabajo, resultados, valores, con_pasos, cancelar):
+        analisis.fijar_cancelacion(cancelar)
+        try:
+            if not cancelar.is_set():
+                tablas = [(resultado.expresion,) + resultado.evaluar(valores, con_pasos) for resultado in resultados]
+                self._eventos.put((trabajo, "evaluacion", tablas))
+        except analisis.AnalisisCancelado:
+            return
+        except Exception as e:
+            self._eventos.put((trabajo, "error_evaluacion", e))
+        finally:
+            analisis.fijar_cancelacion(None)
+
+    def mostrarEvaluacion(self, tablas):
+        # Ventana aparte con una tabla por funcion; se reutiliza mientras siga abierta
+        if self.ventana_tabla is None or not self.ventana_tabla.winfo_exists():
+            self.ventana_tabla = ctk.CTkToplevel(self)
+            self.ventana_tabla.title("Tabla de valores")
+            self.ventana_tabla.geometry("560x600")
+            self.textbox_tabla = ctk.CTkTextbox(self.ventana_tabla, font=ctk.CTkFont(family="Courier", size=13), wrap="none")
+            self.textbox_tabla.pack(fill="both", expand=True, padx=10, pady=10)
+        self.textbox_tabla.delete("0.0", "end")
+        nombres = ["f"] if len(tablas) == 1 else [f"f{i + 1}" for i in range(len(tablas))]
+        self.textbox_tabla.insert("0.0", "\n\n".join(f"{nombre}(x) = {expresion}\n\n" + analisis.tabla_evaluacion(xs, ys, dentro, pasos)
+                                                     for nombre, (expresion, xs, ys, dentro, pasos) in zip(nombres, tablas)))
+        self.ventana_tabla.lift()
         
     
     # --------------------------------------------------------------
     # ------------- Mostrar analisis en la interfaz ---------------
     # --------------------------------------------------------------
-    def mostrarAnalisis(self, expresion, dominio, pasos_dominio, recorrido, xi, y0):
+    def mostrarAnalisis(self, expresion, dominio, pasos_dominio, recorrido, xi, y0, monotonia=None):
         # Limpiar el textbox
         self.textbox_analisis.delete("0.0", "end")
         
         # Mostrar la funcion
         self.textbox_analisis.insert("0.0", f"Función: f(x) = {expresion}\n\n")
         
-        # Mostrar dominio
-        self.textbox_analisis.insert("end", f"Dominio: {dominio}\n\n")
+        # Las etapas que aun se estan calculando llegan como None
+        if dominio is None:
+            self.textbox_analisis.insert("end", "Dominio: calculando...\n\n")
+        else:
+            # Mostrar dominio
+            self.textbox_analisis.insert("end", f"Dominio: {dominio}\n\n")
+            
+            # Mostrar pasos del dominio
+            self.textbox_analisis.insert("end", f"Justificación del dominio:\n{pasos_dominio}\n\n")
+        
+        # Monotonia, extremos locales e inflexiones (de f' y f'')
+        if monotonia is None:
+            self.textbox_analisis.insert("end", "Monotonía y extremos: calculando...\n\n")
+        else:
+            self.textbox_analisis.insert("end", f"Monotonía y extremos:\n{analisis.texto_monotonia(monotonia)}\n\n")
         
-        # Mostrar pasos del dominio
-        self.textbox_analisis.insert("end", f"Justificación del dominio:\n{pasos_dominio}\n\n")
+        if recorrido is None:
+            self.textbox_analisis.insert("end", "Recorrido: calculando...\n\n")
+            self.textbox_analisis.insert("end", "Intersecciones: calculando...\n")
+            return
         
         # Mostrar recorrido
         self.textbox_analisis.insert("end", f"Recorrido: {recorrido}\n")
-        self.textbox_analisis.insert("end", "Cómo se obtuvo: Se evaluó la función en puntos desde -10 a 10\n")
-        self.textbox_analisis.insert("end", "con pasos de 0.1 y se tomaron los valores mínimo y máximo.\n")
-        self.textbox_analisis.insert("end", "Es una aproximación estimada en [-10,10].\n\n")
+        self.textbox_analisis.insert("end", f"Cómo se obtuvo: {analisis.explicacion_recorrido(recorrido)}\n\n")
         
         # Mostrar intersecciones
+        if xi is None:
+            self.textbox_analisis.insert("end", "Intersecciones: calculando...\n")
+            return
         self.textbox_analisis.insert("end", "Intersecciones:\n")
         if not (str(y0) == 'nan' or y0 == float('inf') or y0 == float('-inf')):
             self.textbox_analisis.insert("end", f"• Eje Y: (0, {y0:.3f})\n")